@@ -98,6 +98,19 @@ export interface BrokerDataSource {
   };
 }
 
+/**
+ * Listing classification used by the Python scrapers
+ * (exported to verticals/verticals.json by scripts/export-verticals.js)
+ */
+export interface VerticalScraperConfig {
+  /** Listings must mention at least one (case-insensitive substring match) */
+  includeKeywords: string[];
+  /** Listings mentioning any of these are filtered out */
+  excludeKeywords: string[];
+  /** BizBuySell category slugs searched for this vertical */
+  bizbuysellCategories?: string[];
+}
+
 /**
  * Email template customization
  */
@@ -165,6 +178,8 @@ export interface VerticalConfig {
   valuationMultiples: ValuationMultiples;
   /** Broker data sources to scrape */
   brokerSources: BrokerDataSource[];
+  /** Keyword classification for scraped listings */
+  scraper: VerticalScraperConfig;
   /** Email template customizations */
   emailTemplates: EmailTemplates;
   /** Industry-specific terminology */
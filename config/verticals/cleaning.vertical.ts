@@ -114,6 +114,44 @@ export const cleaningVertical: VerticalConfig = {
     },
   ],
 
+  scraper: {
+    includeKeywords: [
+      'cleaning',
+      'janitorial',
+      'custodial',
+      'sanitation',
+      'maintenance',
+      'maid service',
+      'housekeeping',
+      'carpet cleaning',
+      'window cleaning',
+      'pressure washing',
+      'commercial cleaning',
+      'residential cleaning',
+      'floor care',
+      'disinfection',
+      'restoration',
+    ],
+    excludeKeywords: [
+      'restaurant',
+      'food service',
+      'hvac',
+      'plumbing',
+      'electrical',
+      'landscaping',
+      'lawn care',
+      'pool',
+      'spa',
+      'salon',
+    ],
+    bizbuysellCategories: [
+      'cleaning-businesses',
+      'janitorial-businesses',
+      'commercial-cleaning',
+      'residential-cleaning',
+    ],
+  },
+
   emailTemplates: {
     welcome: {
       subject: 'Welcome to VendingExits - Your Cleaning Business Marketplace',
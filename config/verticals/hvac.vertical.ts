@@ -120,6 +120,42 @@ export const hvacVertical: VerticalConfig = {
     },
   ],
 
+  scraper: {
+    includeKeywords: [
+      'hvac',
+      'heating',
+      'cooling',
+      'air conditioning',
+      'furnace',
+      'ventilation',
+      'refrigeration',
+      'climate control',
+      'ductwork',
+      'heat pump',
+      'ac repair',
+      'hvac contractor',
+      'hvac service',
+    ],
+    excludeKeywords: [
+      'restaurant',
+      'food service',
+      'cleaning',
+      'janitorial',
+      'landscaping',
+      'lawn care',
+      'pool',
+      'spa',
+      'plumbing',
+      'electrical',
+    ],
+    bizbuysellCategories: [
+      'hvac-businesses',
+      'air-conditioning-businesses',
+      'heating-businesses',
+      'refrigeration-businesses',
+    ],
+  },
+
   emailTemplates: {
     welcome: {
       subject: 'Welcome to HVACExits - Your HVAC Business Marketplace',
@@ -120,6 +120,42 @@ export const landscapeVertical: VerticalConfig = {
     },
   ],
 
+  scraper: {
+    includeKeywords: [
+      'landscape',
+      'landscaping',
+      'lawn care',
+      'lawn maintenance',
+      'irrigation',
+      'hardscape',
+      'tree service',
+      'snow removal',
+      'lawn mowing',
+      'garden',
+      'turf care',
+      'lawn treatment',
+      'landscape design',
+      'outdoor living',
+    ],
+    excludeKeywords: [
+      'restaurant',
+      'food service',
+      'hvac',
+      'plumbing',
+      'electrical',
+      'cleaning',
+      'janitorial',
+      'pool',
+      'spa',
+    ],
+    bizbuysellCategories: [
+      'landscape-businesses',
+      'lawn-care-businesses',
+      'tree-service-businesses',
+      'irrigation-businesses',
+    ],
+  },
+
   emailTemplates: {
     welcome: {
       subject: 'Welcome to LandscapeExits - Your Landscape Business Marketplace',
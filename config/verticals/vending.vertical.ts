@@ -54,6 +54,15 @@ export const vendingVertical: VerticalConfig = {
     { name: 'BusinessBroker.net', url: 'https://www.businessbroker.net/businesses-for-sale/vending-coin-operated/', active: false },
   ],
 
+  scraper: {
+    includeKeywords: [
+      'vending', 'vending route', 'vending machine', 'micro market', 'micro-market',
+      'coin operated', 'coin-operated', 'snack route', 'amusement route',
+    ],
+    excludeKeywords: ['restaurant', 'hvac', 'janitorial', 'landscaping', 'lawn care', 'laundromat', 'car wash'],
+    bizbuysellCategories: ['vending-businesses'],
+  },
+
   emailTemplates: {
     welcome: {
       subject: 'Welcome to VendingExits - Your Vending Business Marketplace',
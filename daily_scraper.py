@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import hashlib
 import csv
@@ -12,6 +13,11 @@ import logging
 import time
 import random
 
+# Shared BizBuySell token manager lives in scrapers/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrapers'))
+from token_manager import TokenManager
+from proxy_pool import ProxyPool
+
 # Initialize colorama for colored logging
 init(autoreset=True)
 
@@ -47,19 +53,27 @@ class BizBuySellScraper:
         # UPDATED: Use a supported user agent for impersonation
         self.session = requests.Session(impersonate="chrome101")
         
-        proxy_url = os.getenv('PROXY_URL')
-        if proxy_url:
-            # Strip any leading/trailing whitespace or newlines
-            proxy_url = proxy_url.strip()
-            # Use `http://` or `https://` prefix
-            if not proxy_url.startswith(('http://', 'https://')):
-                proxy_url = 'http://' + proxy_url
-            self.session.proxies = {'http': proxy_url, 'https': proxy_url}
-            logger.info("Proxy configured for the scraper session.")
+        # Proxy pool from BBS_PROXY_FILE / BBS_PROXIES, or the single PROXY_URL.
+        # Each request takes a proxy and reports its outcome back to the pool.
+        self.proxy_pool = ProxyPool.from_env(log=lambda level, message: getattr(logger, level)(message))
+        if self.proxy_pool:
+            logger.info(f"Using {len(self.proxy_pool)} proxies; tokens are fetched per proxy.")
+        self.proxy = None  # Proxy the current token was fetched through
 
         self.auth_token = None
         self.auth_token_timestamp = None
-        self.base_url = "https://www.bizbuysell.com/api"
+        self.base_url = os.getenv("BIZBUYSELL_BASE_URL", "https://www.bizbuysell.com/api")
+
+        self.token_manager = TokenManager(
+            session=self.session,
+            headers={
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "User-Agent": random.choice(self.user_agents),
+                "Accept-Language": "en-US,en;q=0.9",
+            },
+            max_retries=5,
+            log=lambda level, message: getattr(logger, level)(message)
+        )
 
     def get_supabase_client(self):
         """Creates and returns a Supabase client."""
@@ -70,47 +84,25 @@ class BizBuySellScraper:
         
     def get_auth_token(self):
         """
-        Obtains a new authentication token from the BizBuySell API.
+        Obtains the BizBuySell authentication token.
         This is a critical step to prevent 403 Forbidden errors.
+        The token comes from the shared on-disk cache when another run already
+        fetched one, and is refreshed before it expires. With a proxy pool the
+        token is fetched through the best-scoring proxy and stays bound to it.
         """
-        if self.auth_token and self.auth_token_timestamp and (datetime.now(timezone.utc) - self.auth_token_timestamp).total_seconds() < 3600:
-            logger.info("Using cached token.")
-            return
-        
-        url = f"{self.base_url}/search/listings?listType=business-for-sale&sort=updated_desc"
-        headers = {
-            "Accept": "application/json, text/plain, */*",
-            "X-App-Id": "1",
-            "User-Agent": random.choice(self.user_agents),
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-        
-        max_retries = 5
-        for attempt in range(1, max_retries + 1):
-            try:
-                logger.info("Obtaining authentication token...")
-                response = self.session.get(url, headers=headers, timeout=10)
-                response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-                
-                if "X-Auth-Token" in response.headers:
-                    self.auth_token = response.headers["X-Auth-Token"]
-                    self.auth_token_timestamp = datetime.now(timezone.utc)
-                    logger.info("Authentication token obtained successfully.")
-                    return
-                else:
-                    logger.error("X-Auth-Token not found in response headers.")
-                    
-            except requests.exceptions.HTTPError as http_err:
-                logger.error(f"HTTP Error {http_err.response.status_code}: {http_err.response.text}")
-            except requests.exceptions.RequestException as req_err:
-                logger.error(f"Error getting token (attempt {attempt}): {req_err}")
-                
-            if attempt < max_retries:
-                delay = random.uniform(2, 8)  # Random delay to mimic human behavior
-                logger.info(f"Retry {attempt + 1}/{max_retries} after {delay:.1f}s delay")
-                time.sleep(delay)
-        
-        logger.error("All token attempts failed")
+        proxy = self.proxy_pool.acquire() if self.proxy_pool else None
+        manager = self.token_manager.for_proxy(proxy.url if proxy else None)
+        self.auth_token = None
+        try:
+            self.auth_token = manager.get_token()
+        finally:
+            if proxy:
+                self.proxy_pool.release(proxy, ok=bool(self.auth_token))
+        self.proxy = proxy
+        if self.auth_token:
+            self.auth_token_timestamp = datetime.fromtimestamp(manager.issued_at, timezone.utc)
+        else:
+            logger.error("All token attempts failed")
         
     def fetch_listings(self):
         """Fetches listings from the BizBuySell API based on keywords and categories."""
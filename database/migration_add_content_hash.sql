@@ -0,0 +1,20 @@
+-- ============================================================================
+-- MIGRATION: Content hash for change detection
+-- ============================================================================
+-- Adds listings.content_hash, a hash of the listing's material columns
+-- written by the scrapers (scrapers/change_detector.py). Before each batch
+-- the scrapers read the stored hashes and skip rows whose hash is unchanged,
+-- so a typical daily run only writes new and changed listings.
+--
+-- Existing rows start with NULL and get their hash the next time they are
+-- scraped. Until this migration is applied the scrapers keep the hashes in a
+-- local file instead (LISTING_HASH_INDEX).
+--
+-- SAFE: Non-destructive, adds a nullable column only
+-- ============================================================================
+
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- ============================================================================
+-- END OF MIGRATION
+-- ============================================================================
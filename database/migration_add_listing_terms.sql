@@ -0,0 +1,147 @@
+-- ============================================================================
+-- MIGRATION: Token index over listings for targeted re-classification
+-- ============================================================================
+-- Adds an inverted index (term -> listing ids) over listing title,
+-- description and business_type, kept current by triggers, plus the keyword
+-- snapshot reclassify.py diffs against. After a change to include_keywords or
+-- exclude_keywords, reclassify.py looks up only the listings containing the
+-- changed terms instead of scanning the listings table.
+--
+-- Run once after schema.sql (the backfill at the end is the only full pass
+-- over listings).
+-- ============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ----------------------------------------------------------------------------
+-- TABLE: listing_terms
+-- One row per distinct token per listing
+-- ----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS listing_terms (
+  term TEXT NOT NULL,                     -- Lowercased [a-z0-9]+ run
+  listing_id TEXT NOT NULL,               -- FK to listings
+  PRIMARY KEY (term, listing_id),
+  CONSTRAINT fk_listing_terms_listing FOREIGN KEY (listing_id) REFERENCES listings(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_listing_terms_listing_id ON listing_terms(listing_id);
+
+
+-- ----------------------------------------------------------------------------
+-- TABLE: listing_term_vocab
+-- Every term ever indexed; keywords are matched as substrings, so the job
+-- finds the terms containing a keyword here (trigram index) before touching
+-- listing_terms. Terms are never removed - a stale term only adds candidates.
+-- ----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS listing_term_vocab (
+  term TEXT PRIMARY KEY
+);
+
+CREATE INDEX IF NOT EXISTS idx_listing_term_vocab_trgm ON listing_term_vocab USING gin (term gin_trgm_ops);
+
+
+-- ----------------------------------------------------------------------------
+-- TABLE: vertical_keyword_snapshots
+-- Keywords each vertical's stored listings were last classified with
+-- ----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS vertical_keyword_snapshots (
+  vertical_slug TEXT PRIMARY KEY,
+  include_keywords TEXT[] NOT NULL,
+  exclude_keywords TEXT[] NOT NULL,
+  applied_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+
+-- ----------------------------------------------------------------------------
+-- FUNCTIONS / TRIGGERS
+-- ----------------------------------------------------------------------------
+
+-- Tokens of the text vertical keywords are matched against
+-- (scrapers/reclassify.py TERM_RE must split the same way: runs of [a-z0-9] in lowercased text)
+CREATE OR REPLACE FUNCTION listing_search_terms(title TEXT, description TEXT, business_type TEXT)
+RETURNS SETOF TEXT AS $$
+  SELECT DISTINCT term
+  FROM regexp_split_to_table(lower(concat_ws(' ', title, description, business_type)), '[^a-z0-9]+') AS term
+  WHERE term <> '';
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION refresh_listing_terms()
+RETURNS TRIGGER AS $$
+BEGIN
+  DELETE FROM listing_terms WHERE listing_id = NEW.id;
+
+  INSERT INTO listing_term_vocab (term)
+  SELECT listing_search_terms(NEW.title, NEW.description, NEW.business_type)
+  ON CONFLICT (term) DO NOTHING;
+
+  INSERT INTO listing_terms (term, listing_id)
+  SELECT term, NEW.id
+  FROM listing_search_terms(NEW.title, NEW.description, NEW.business_type) AS term;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS index_listing_terms_insert ON listings;
+CREATE TRIGGER index_listing_terms_insert
+  AFTER INSERT ON listings
+  FOR EACH ROW
+  EXECUTE FUNCTION refresh_listing_terms();
+
+-- Upserts rewrite every column; only re-index when the text actually changed
+DROP TRIGGER IF EXISTS index_listing_terms_update ON listings;
+CREATE TRIGGER index_listing_terms_update
+  AFTER UPDATE OF title, description, business_type ON listings
+  FOR EACH ROW
+  WHEN (OLD.title IS DISTINCT FROM NEW.title
+        OR OLD.description IS DISTINCT FROM NEW.description
+        OR OLD.business_type IS DISTINCT FROM NEW.business_type)
+  EXECUTE FUNCTION refresh_listing_terms();
+
+
+-- ----------------------------------------------------------------------------
+-- ROW LEVEL SECURITY
+-- ----------------------------------------------------------------------------
+
+ALTER TABLE listing_terms ENABLE ROW LEVEL SECURITY;
+ALTER TABLE listing_term_vocab ENABLE ROW LEVEL SECURITY;
+ALTER TABLE vertical_keyword_snapshots ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role has full access" ON listing_terms;
+CREATE POLICY "Service role has full access" ON listing_terms
+  FOR ALL
+  TO service_role
+  USING (true)
+  WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role has full access" ON listing_term_vocab;
+CREATE POLICY "Service role has full access" ON listing_term_vocab
+  FOR ALL
+  TO service_role
+  USING (true)
+  WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Service role has full access" ON vertical_keyword_snapshots;
+CREATE POLICY "Service role has full access" ON vertical_keyword_snapshots
+  FOR ALL
+  TO service_role
+  USING (true)
+  WITH CHECK (true);
+
+
+-- ----------------------------------------------------------------------------
+-- BACKFILL existing listings
+-- ----------------------------------------------------------------------------
+
+INSERT INTO listing_terms (term, listing_id)
+SELECT term, l.id
+FROM listings l, LATERAL listing_search_terms(l.title, l.description, l.business_type) AS term
+ON CONFLICT DO NOTHING;
+
+INSERT INTO listing_term_vocab (term)
+SELECT DISTINCT term FROM listing_terms
+ON CONFLICT (term) DO NOTHING;
+
+-- ============================================================================
+-- END OF MIGRATION
+-- ============================================================================
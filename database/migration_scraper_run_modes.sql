@@ -0,0 +1,31 @@
+-- ============================================================================
+-- MIGRATION: Scraper run status and types for partial, replay and backfill runs
+-- ============================================================================
+-- - Allows scraper_runs.status = 'partial': the run finished, but some pages
+--   failed or a query ran past --max-pages, so listings may be missing.
+--   Incremental BizBuySell runs only take their high-water mark from
+--   'completed' runs, so the next run searches that gap again
+-- - Allows scraper_runs.scraper_type = 'bizbuysell_replay' for --replay runs
+--   (served from the response cache) and 'bizbuysell_backfill' for --backfill
+--   runs (re-saved from a raw archive), which must not move that mark either
+--
+-- Until this is applied a partial run's status update is rejected and the
+-- run stays 'running', which is also never used as a high-water mark; replay
+-- and backfill runs are not recorded at all.
+--
+-- SAFE: Non-destructive, widens constraints only
+-- ============================================================================
+
+ALTER TABLE scraper_runs DROP CONSTRAINT IF EXISTS valid_scraper_status;
+ALTER TABLE scraper_runs
+ADD CONSTRAINT valid_scraper_status
+CHECK (status IN ('running', 'completed', 'partial', 'failed'));
+
+ALTER TABLE scraper_runs DROP CONSTRAINT IF EXISTS valid_scraper_type;
+ALTER TABLE scraper_runs
+ADD CONSTRAINT valid_scraper_type
+CHECK (scraper_type IN ('bizbuysell', 'bizbuysell_replay', 'bizbuysell_backfill', 'unified', 'specialized'));
+
+-- ============================================================================
+-- END OF MIGRATION
+-- ============================================================================
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- MIGRATION: Vertical registry (vending vertical + scraper-readable configs)
+-- ============================================================================
+-- - Allows the 'vending' vertical the TypeScript configs already define
+-- - Adds vertical_configs.bizbuysell_categories so the scrapers can load
+--   their full config from the table (VERTICAL_CONFIG_SOURCE=supabase)
+--
+-- Fill the table afterwards from config/verticals/verticals.json:
+--   python scrapers/vertical_registry.py --sync-table
+--
+-- SAFE: Non-destructive, widens constraints only
+-- ============================================================================
+
+ALTER TABLE vertical_configs ADD COLUMN IF NOT EXISTS bizbuysell_categories TEXT[];
+
+ALTER TABLE listings DROP CONSTRAINT IF EXISTS valid_vertical;
+ALTER TABLE listings
+ADD CONSTRAINT valid_vertical
+CHECK (vertical_slug IN ('cleaning', 'landscape', 'hvac', 'vending'));
+
+ALTER TABLE scraper_runs DROP CONSTRAINT IF EXISTS valid_scraper_vertical;
+ALTER TABLE scraper_runs
+ADD CONSTRAINT valid_scraper_vertical
+CHECK (vertical_slug IN ('cleaning', 'landscape', 'hvac', 'vending'));
+
+ALTER TABLE vertical_configs DROP CONSTRAINT IF EXISTS valid_vertical_slug;
+ALTER TABLE vertical_configs
+ADD CONSTRAINT valid_vertical_slug
+CHECK (slug IN ('cleaning', 'landscape', 'hvac', 'vending'));
+
+-- ============================================================================
+-- END OF MIGRATION
+-- ============================================================================
@@ -1,7 +1,7 @@
 -- ============================================================================
 -- MULTI-TENANT SCRAPER SYSTEM - SUPABASE SCHEMA
 -- ============================================================================
--- This schema supports 3 verticals: cleaning, landscape, hvac
+-- This schema supports 4 verticals: cleaning, landscape, hvac, vending
 -- Compatible with 3 scraper types: BizBuySell, Unified Broker, Specialized
 -- ============================================================================
 
@@ -14,7 +14,7 @@ CREATE TABLE IF NOT EXISTS listings (
   id TEXT PRIMARY KEY,                    -- SHA256 hash of unique identifier
 
   -- Vertical identification
-  vertical_slug TEXT NOT NULL,            -- 'cleaning' | 'landscape' | 'hvac'
+  vertical_slug TEXT NOT NULL,            -- 'cleaning' | 'landscape' | 'hvac' | 'vending'
 
   -- Core listing fields
   title TEXT NOT NULL,                    -- Business name/title
@@ -57,12 +57,13 @@ CREATE TABLE IF NOT EXISTS listings (
 
   -- Tracking
   scraper_run_id TEXT,                    -- FK to scraper_runs table
+  content_hash TEXT,                      -- Hash of the material columns (change detection)
   scraped_at TIMESTAMPTZ NOT NULL,        -- When scraped from source
   created_at TIMESTAMPTZ DEFAULT NOW(),   -- When added to our system
   updated_at TIMESTAMPTZ DEFAULT NOW(),   -- Last update
 
   -- Constraints
-  CONSTRAINT valid_vertical CHECK (vertical_slug IN ('cleaning', 'landscape', 'hvac')),
+  CONSTRAINT valid_vertical CHECK (vertical_slug IN ('cleaning', 'landscape', 'hvac', 'vending')),
   CONSTRAINT valid_status CHECK (status IN ('pending', 'approved', 'archived'))
 );
 
@@ -96,12 +97,12 @@ CREATE TABLE IF NOT EXISTS scraper_runs (
   -- Run identification
   vertical_slug TEXT NOT NULL,            -- Which vertical was scraped
   broker_source TEXT NOT NULL,            -- Which broker: 'BizBuySell', 'Murphy', etc.
-  scraper_type TEXT NOT NULL,             -- 'bizbuysell' | 'unified' | 'specialized'
+  scraper_type TEXT NOT NULL,             -- 'bizbuysell' | 'bizbuysell_replay' | 'bizbuysell_backfill' | 'unified' | 'specialized'
 
   -- Execution tracking
   started_at TIMESTAMPTZ NOT NULL,        -- When scraper started
   completed_at TIMESTAMPTZ,               -- When scraper finished
-  status TEXT NOT NULL DEFAULT 'running', -- 'running' | 'completed' | 'failed'
+  status TEXT NOT NULL DEFAULT 'running', -- 'running' | 'completed' | 'partial' | 'failed'
 
   -- Results tracking
   total_listings_found INTEGER DEFAULT 0,  -- Total listings scraped
@@ -121,9 +122,9 @@ CREATE TABLE IF NOT EXISTS scraper_runs (
   created_at TIMESTAMPTZ DEFAULT NOW(),
 
   -- Constraints
-  CONSTRAINT valid_scraper_vertical CHECK (vertical_slug IN ('cleaning', 'landscape', 'hvac')),
-  CONSTRAINT valid_scraper_status CHECK (status IN ('running', 'completed', 'failed')),
-  CONSTRAINT valid_scraper_type CHECK (scraper_type IN ('bizbuysell', 'unified', 'specialized'))
+  CONSTRAINT valid_scraper_vertical CHECK (vertical_slug IN ('cleaning', 'landscape', 'hvac', 'vending')),
+  CONSTRAINT valid_scraper_status CHECK (status IN ('running', 'completed', 'partial', 'failed')),
+  CONSTRAINT valid_scraper_type CHECK (scraper_type IN ('bizbuysell', 'bizbuysell_replay', 'bizbuysell_backfill', 'unified', 'specialized'))
 );
 
 -- Indexes
@@ -171,11 +172,13 @@ CREATE INDEX IF NOT EXISTS idx_scraper_logs_run_timestamp ON scraper_logs(scrape
 -- ----------------------------------------------------------------------------
 -- TABLE: vertical_configs (optional - for storing configs in DB)
 -- Stores vertical configuration in database instead of code
--- This is OPTIONAL - you can continue using TypeScript configs
+-- This is OPTIONAL - scrapers read it with VERTICAL_CONFIG_SOURCE=supabase;
+-- fill it from the TypeScript configs with
+-- `python scrapers/vertical_registry.py --sync-table`
 -- ----------------------------------------------------------------------------
 CREATE TABLE IF NOT EXISTS vertical_configs (
   -- Primary key
-  slug TEXT PRIMARY KEY,                  -- 'cleaning' | 'landscape' | 'hvac'
+  slug TEXT PRIMARY KEY,                  -- 'cleaning' | 'landscape' | 'hvac' | 'vending'
 
   -- Basic info
   name TEXT NOT NULL,                     -- 'Cleaning Services'
@@ -186,6 +189,7 @@ CREATE TABLE IF NOT EXISTS vertical_configs (
   include_keywords TEXT[],                -- Keywords to include
   exclude_keywords TEXT[],                -- Keywords to exclude
   seo_keywords TEXT[],                    -- SEO keywords
+  bizbuysell_categories TEXT[],           -- BizBuySell category slugs searched
 
   -- Broker sources
   broker_sources JSONB,                   -- Array of broker source configs
@@ -202,7 +206,7 @@ CREATE TABLE IF NOT EXISTS vertical_configs (
   updated_at TIMESTAMPTZ DEFAULT NOW(),
 
   -- Constraints
-  CONSTRAINT valid_vertical_slug CHECK (slug IN ('cleaning', 'landscape', 'hvac'))
+  CONSTRAINT valid_vertical_slug CHECK (slug IN ('cleaning', 'landscape', 'hvac', 'vending'))
 );
 
 -- Seed vertical configs (example - optional)
@@ -11,6 +11,7 @@ BizBuySell Listing Scraper (hybrid, stable)
 """
 
 import os
+import sys
 import json
 import csv
 import time
@@ -24,6 +25,11 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from colorama import Fore, Style, init
 from curl_cffi import requests
 
+# Shared BizBuySell token manager lives in scrapers/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapers'))
+from token_manager import AUTH_ERROR_STATUSES, TokenManager
+from proxy_pool import ProxyPool, as_requests_proxies
+
 # --- robust optional Supabase import (works from root OR scraper/) ---
 PUSH_TO_SUPABASE = os.getenv("PUSH_TO_SUPABASE", "0") == "1"
 push_daily_candidates = None
@@ -47,6 +53,8 @@ WORKERS = int(os.getenv("WORKERS", "10"))
 DAYS_LISTED_AGO = int(os.getenv("DAYS_LISTED_AGO", "1"))  # last N days
 PAGE_PAUSE = float(os.getenv("PAGE_PAUSE", "0.25"))       # politeness delay
 
+API_URL = os.getenv("BIZBUYSELL_API_URL", "https://api.bizbuysell.com/bff/v2/BbsBfsSearchResults")
+
 class BizBuySellScraper:
     def __init__(self):
         # cURL impersonation: "chrome120" / "chrome" both fine
@@ -68,38 +76,54 @@ class BizBuySellScraper:
             'X-Correlation-Id': 'b5492b02-712f-4ee8-be99-cc27c8668908'
         }
         self.token: Optional[str] = None
+        self.token_manager = TokenManager(session=self.session, headers=self.headers)
+        # Optional proxies (BBS_PROXY_FILE / BBS_PROXIES / PROXY_URL); each keeps its own token
+        self.proxy_pool = ProxyPool.from_env(log=lambda level, message: print(f"{Fore.YELLOW}[!] {message}"))
         self.get_auth_token()  # hybrid: ok if it fails
 
     # ------------------------- token (hybrid) -------------------------
     def get_auth_token(self):
         print(f"{Fore.CYAN}[*] Obtaining authentication token (cookie)…")
-        try:
-            r = self.session.get(
-                'https://www.bizbuysell.com/businesses-for-sale/new-york-ny/',
-                headers=self.headers,
-                timeout=30,
-                allow_redirects=True
-            )
-            self.token = (
-                r.cookies.get('_track_tkn')
-                or r.cookies.get('track_tkn')
-                or None
-            )
-            if self.token:
-                print(f"{Fore.GREEN}[+] _track_tkn cookie found; will use Authorization")
-            else:
-                print(f"{Fore.YELLOW}[!] No _track_tkn cookie; proceeding without Authorization")
-        except Exception as e:
-            print(f"{Fore.YELLOW}[!] Token fetch error: {e}; proceeding without Authorization")
-            self.token = None
+        if self.proxy_pool:
+            print(f"{Fore.CYAN}[*] Using {len(self.proxy_pool)} proxies; tokens are fetched per proxy")
+            proxy = self.proxy_pool.acquire()
+            self.token = self.token_manager.for_proxy(proxy.url).get_token()
+            self.proxy_pool.release(proxy, ok=bool(self.token))
+        else:
+            self.token = self.token_manager.get_token()
+        if self.token:
+            print(f"{Fore.GREEN}[+] _track_tkn cookie found; will use Authorization")
+        else:
+            print(f"{Fore.YELLOW}[!] No _track_tkn cookie; proceeding without Authorization")
 
     # ------------------------- HTTP helpers --------------------------
     def _post_with_retry(self, url: str, headers: Dict[str, str], payload: Dict[str, Any],
                          tries: int = 5, base: float = 0.8, cap: float = 12.0) -> Optional[requests.Response]:
-        """POST with 429/5xx backoff."""
+        """POST with 429/5xx backoff; a rejected token is refreshed and the call replayed.
+        With a proxy pool every attempt uses the best-scoring proxy and that proxy's token."""
         for attempt in range(1, tries + 1):
+            proxy = self.proxy_pool.acquire() if self.proxy_pool else None
+            manager = self.token_manager.for_proxy(proxy.url if proxy else None)
+            proxy_ok = False
+            started = time.monotonic()
             try:
-                resp = self.session.post(url, headers=headers, json=payload, timeout=45)
+                if proxy:
+                    token = manager.get_token()
+                    headers = {**headers, 'Authorization': f'Bearer {token}'} if token else \
+                        {k: v for k, v in headers.items() if k != 'Authorization'}
+                    started = time.monotonic()
+                resp = self.session.post(url, headers=headers, json=payload, timeout=45,
+                                         proxies=as_requests_proxies(proxy.url if proxy else None))
+                if resp.status_code in AUTH_ERROR_STATUSES and (self.token or proxy):
+                    stale = headers.get('Authorization', '').replace('Bearer ', '')
+                    token = manager.refresh(stale)
+                    if manager is self.token_manager:
+                        self.token = token or self.token
+                        token = self.token
+                    print(f"{Fore.YELLOW}[{resp.status_code}] token rejected; refreshed and replaying (attempt {attempt}/{tries})")
+                    if token:
+                        headers = {**headers, 'Authorization': f'Bearer {token}'}
+                    continue
                 if resp.status_code == 429:
                     delay = min(cap, base * (2 ** (attempt - 1)) + random.uniform(0, 0.4))
                     print(f"{Fore.YELLOW}[429] backoff {delay:.1f}s (attempt {attempt}/{tries})")
@@ -111,11 +135,15 @@ class BizBuySellScraper:
                     time.sleep(delay)
                     continue
                 resp.raise_for_status()
+                proxy_ok = True
                 return resp
             except Exception as e:
                 delay = min(cap, base * (2 ** (attempt - 1)) + random.uniform(0, 0.4))
                 print(f"{Fore.YELLOW}[!] POST failed {e}; retry in {delay:.1f}s (attempt {attempt}/{tries})")
                 time.sleep(delay)
+            finally:
+                if proxy:
+                    self.proxy_pool.release(proxy, proxy_ok, time.monotonic() - started if proxy_ok else None)
         return None
 
     # ------------------------- core scrape ---------------------------
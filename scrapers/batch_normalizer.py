@@ -0,0 +1,223 @@
+"""
+Batch Normalizer
+Columnar classify/normalize for re-processing archives of raw BizBuySell listings
+- Raw listings become one pandas DataFrame (one column per LISTING_FIELDS entry)
+- Financial columns, URL, city and state are computed with pandas/NumPy
+  string and numeric operations instead of per-listing Python; vertical
+  masks come from one KeywordMatcher scan per row into a NumPy array
+- Output is the same ListingRecords BizBuySellScraperV2.normalize_listing
+  builds, all stamped with one timestamp
+"""
+
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from keyword_matcher import KeywordMatcher
+from listing_decoder import LISTING_FIELDS, SearchListing, iter_page_listings, loads
+from listing_record import ListingRecord
+from response_cache import MANIFEST_FILE
+
+
+# ============================================================================
+# LOADING
+# ============================================================================
+
+def iter_raw_listings(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Raw search listings from an archive
+
+    Args:
+        path: JSON array or JSON-lines file of raw listings, or a response
+              cache directory (every cached search page in it)
+    """
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.endswith('.json') and name != MANIFEST_FILE:
+                    with open(os.path.join(root, name), 'rb') as f:
+                        yield from iter_page_listings(loads(f.read()))
+        return
+
+    with open(path, 'rb') as f:
+        body = f.read()
+    if body.lstrip()[:1] == b'[':
+        yield from (row for row in loads(body) if isinstance(row, dict))
+    else:
+        yield from (loads(line) for line in body.splitlines() if line.strip())
+
+
+def listings_frame(raw_listings: Iterable[Dict[str, Any]], archive: bool = False,
+                   fields: Iterable[str] = LISTING_FIELDS) -> pd.DataFrame:
+    """
+    One row per raw listing, one object column per field
+
+    `list_number` keeps normalize_listing's str(listNumber) exactly (a
+    missing key and None hash differently). With archive, `raw` holds each
+    listing's full dict.
+    """
+    rows = [row.to_dict() if isinstance(row, SearchListing) else row for row in raw_listings]
+    frame = pd.DataFrame({field: pd.Series([row.get(field) for row in rows], dtype=object)
+                          for field in fields})
+    frame['list_number'] = pd.Series([str(row.get('listNumber', '')) for row in rows], dtype=object)
+    if archive:
+        frame['raw'] = pd.Series([dict(row) for row in rows], dtype=object)
+    return frame
+
+
+# ============================================================================
+# COLUMN OPERATIONS
+# ============================================================================
+
+def _text(column: pd.Series) -> pd.Series:
+    """Column as plain Python str objects, missing values as ''"""
+    return column.where(column.notna(), '').astype(str).astype(object)
+
+
+# Columns search_text reads
+SEARCH_FIELDS = ('header', 'description', 'category')
+
+
+def search_text(frame: pd.DataFrame) -> pd.Series:
+    """Lowercased header + description + category (BizBuySellScraperV2.search_text)"""
+    return (_text(frame['header']) + ' ' + _text(frame['description']) + ' ' + _text(frame['category'])).str.lower()
+
+
+def vertical_masks(frame: pd.DataFrame, matcher: KeywordMatcher) -> np.ndarray:
+    """
+    Bitmask of matching verticals per row (test with masks & matcher.bits[slug])
+
+    The text column is built with vectorized string ops and scanned once by
+    the compiled matcher; that beat one str.contains pass per keyword
+    (object-dtype string ops still loop per row) by ~3x at 50 keywords.
+    """
+    text = search_text(frame)
+    return np.fromiter(map(matcher.match_mask, text.tolist()), dtype=np.int64, count=len(text))
+
+
+def parse_financial(column: pd.Series) -> pd.Series:
+    """
+    Column version of listing_record.parse_financial
+
+    Numbers pass through, strings lose '$' and ',' before parsing; empty,
+    zero-valued numbers and unparseable values become NaN.
+    """
+    kinds = column.map(type)
+    is_str = kinds.eq(str).to_numpy()
+    is_num = kinds.isin([int, float, bool]).to_numpy()
+
+    values = np.full(len(column), np.nan)
+    if is_num.any():
+        numbers = column[is_num].astype(float).to_numpy()
+        values[is_num] = np.where(numbers == 0, np.nan, numbers)
+    if is_str.any():
+        cleaned = column[is_str].astype(str).str.replace('$', '', regex=False) \
+            .str.replace(',', '', regex=False).str.strip()
+        values[is_str] = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=float)
+    return pd.Series(values, index=column.index)
+
+
+def split_location(locations: pd.Series):
+    """(city, state) columns; None unless the location contains a comma"""
+    text = _text(locations)
+    has_comma = text.str.contains(',', regex=False).to_numpy()
+    parts = text.str.split(',', n=2, expand=True).reindex(columns=[0, 1])
+    city = parts[0].str.strip().where(has_comma, None)
+    state = parts[1].str.strip().where(has_comma & parts[1].notna().to_numpy(), None)
+    return city, state
+
+
+def _values(column: pd.Series) -> List[Any]:
+    """Column as a list with NaN turned into None"""
+    return column.astype(object).where(column.notna(), None).tolist()
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+def normalize_frame(frame: pd.DataFrame, vertical_slug: str, now: Optional[str] = None) -> List[ListingRecord]:
+    """
+    Listing records for every row of a listings frame
+
+    Args:
+        frame: listings_frame() output (already filtered to the vertical)
+        vertical_slug: Vertical the rows are saved under
+        now: ISO timestamp for created_at/updated_at (default: now)
+
+    Returns:
+        Records equal to BizBuySellScraperV2.normalize_listing's
+    """
+    if frame.empty:
+        return []
+    now = now or datetime.now(timezone.utc).isoformat()
+
+    titles = _text(frame['header'])
+    url_stubs = _text(frame['urlStub'])
+    list_numbers = frame['list_number'].tolist()
+    ids = [hashlib.sha256(f"{number}--{stub}--{title}".encode()).hexdigest()
+           for number, stub, title in zip(list_numbers, url_stubs.tolist(), titles.tolist())]
+    urls = url_stubs.where(url_stubs.str.startswith('http'), 'https://www.bizbuysell.com' + url_stubs)
+    city, state = split_location(frame['location'])
+
+    images = [img[0] if isinstance(img, list) and img and img[0] else
+              img if isinstance(img, str) and img else None
+              for img in frame['img'].tolist()]
+
+    contact_lower = frame['brokercontactfullname']
+    contacts = contact_lower.where(contact_lower.notna() & _text(contact_lower).ne(''),
+                                   frame['brokerContactFullName'])
+    flags = {field: frame[field].eq('true').tolist() for field in ('hotProperty', 'recentlyAdded', 'recentlyUpdated')}
+    raws = frame['raw'].tolist() if 'raw' in frame else [None] * len(frame)
+
+    columns = zip(
+        ids, titles.tolist(), _values(frame['description']), _values(city), _values(state),
+        _values(parse_financial(frame['price'])), _values(parse_financial(frame['grossSales'])),
+        _values(parse_financial(frame['cashFlow'])), _values(parse_financial(frame['ebitda'])),
+        _values(frame['category']), list_numbers, url_stubs.tolist(), urls.tolist(), images,
+        _values(frame['brokerCompany']), _values(contacts), _values(frame['region']),
+        flags['hotProperty'], flags['recentlyAdded'], flags['recentlyUpdated'], raws
+    )
+    return [
+        ListingRecord(
+            id=listing_id, vertical_slug=vertical_slug, source='BizBuySell', title=title,
+            description=description, city=city_value, state=state_value,
+            asking_price=price, revenue=revenue, cash_flow=cash_flow, ebitda=ebitda, category=category,
+            list_number=list_number, url_stub=url_stub, listing_url=url, image_url=image_url,
+            broker_company=broker_company, broker_contact=broker_contact, region=region,
+            hot_property=hot, recently_added=added, recently_updated=updated, raw=raw, scraped_at=now
+        )
+        for (listing_id, title, description, city_value, state_value, price, revenue, cash_flow, ebitda,
+             category, list_number, url_stub, url, image_url, broker_company, broker_contact, region,
+             hot, added, updated, raw) in columns
+    ]
+
+
+def classify_and_normalize(raw_listings: List[Dict[str, Any]], matcher: KeywordMatcher,
+                           verticals: List[str], archive: bool = False) -> Dict[str, List[ListingRecord]]:
+    """
+    Classify raw listings once and normalize each vertical's matches
+
+    Only the columns search_text reads are framed for classification; the
+    full frame is built for rows that match at least one vertical.
+
+    Returns:
+        Vertical slug -> listing records
+    """
+    masks = vertical_masks(listings_frame(raw_listings, fields=SEARCH_FIELDS), matcher)
+    wanted = 0
+    for vertical in verticals:
+        wanted |= matcher.bits[vertical]
+    keep = np.flatnonzero(masks & wanted)
+    frame = listings_frame([raw_listings[i] for i in keep], archive=archive)
+    masks = masks[keep]
+
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        vertical: normalize_frame(frame[(masks & matcher.bits[vertical]) != 0], vertical, now)
+        for vertical in verticals
+    }
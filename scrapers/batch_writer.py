@@ -0,0 +1,217 @@
+"""
+Batch Writer
+Concurrent, fault-isolating writer for listing batches
+- Up to `concurrency` batches are written at once on a thread pool;
+  submit() blocks while that many are in flight, so the sink in front of
+  it feels the backpressure
+- Transient failures (connection errors, timeouts, 429/5xx, serialization
+  failures, deadlocks) are retried with backoff
+- A batch rejected for its data (check/constraint violations, bad values:
+  SQLSTATE classes 22, 23 and 42) is split in half and each half written
+  again, down to single rows, so one bad row no longer sinks the other 499;
+  any other failure rejects the whole batch once
+- Rows that still fail go to a dead-letter file (JSON lines: table, error,
+  row) instead of being dropped
+- Writes must be idempotent (upserts): a retried or split batch may resend
+  rows that were already written
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from fetch_engine import backoff_delay
+
+# Batches written at once
+WRITE_CONCURRENCY = int(os.getenv('LISTINGS_WRITE_CONCURRENCY', '4'))
+
+# Attempts per batch after the first, for transient failures
+WRITE_RETRIES = int(os.getenv('LISTINGS_WRITE_RETRIES', '3'))
+
+DEFAULT_DEAD_LETTER = os.getenv(
+    'LISTINGS_DEAD_LETTER',
+    os.path.join(tempfile.gettempdir(), 'listings_dead_letter.jsonl')
+)
+
+# SQLSTATE classes that mean the rows themselves were rejected
+_DATA_ERROR_CLASSES = ('22', '23', '42')
+
+# SQLSTATE classes worth retrying: connection, transaction rollback, resources, operator intervention
+_TRANSIENT_ERROR_CLASSES = ('08', '40', '53', '57')
+
+# Exception type names (httpx, psycopg, builtins) of network and server hiccups
+_TRANSIENT_NAMES = ('Timeout', 'Connect', 'Network', 'Protocol', 'Operational', 'Pool')
+
+
+def error_code(error: BaseException) -> str:
+    """SQLSTATE or HTTP status of a PostgREST/psycopg error ('' when it has none)"""
+    code = getattr(error, 'code', None) or getattr(error, 'sqlstate', None)
+    return str(code) if code is not None else ''
+
+
+def is_data_error(error: BaseException) -> bool:
+    """Rejected for the rows it carried: splitting the batch can isolate the bad ones"""
+    code = error_code(error)
+    return code[:2] in _DATA_ERROR_CLASSES and len(code) == 5
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Worth retrying unchanged: the request failed, not the rows"""
+    code = error_code(error)
+    if code[:2] in _DATA_ERROR_CLASSES and len(code) == 5:
+        return False
+    if code[:2] in _TRANSIENT_ERROR_CLASSES and len(code) == 5:
+        return True
+    if len(code) == 3 and code.isdigit():
+        return code == '429' or code.startswith('5')
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(name in type(error).__name__ for name in _TRANSIENT_NAMES)
+
+
+class BatchWriter:
+    """Writes batches concurrently, retrying transient failures and bisecting rejected ones"""
+
+    def __init__(self, write: Callable[[List[Dict[str, Any]]], Any], concurrency: int = WRITE_CONCURRENCY,
+                 retries: int = WRITE_RETRIES, dead_letter_path: str = DEFAULT_DEAD_LETTER,
+                 table: str = 'listings', log: Callable[[str, str], None] = None,
+                 on_reject: Callable[[List[Dict[str, Any]], BaseException], None] = None):
+        """
+        Initialize writer
+
+        Args:
+            write: Writes one batch of rows, raising on failure (called from
+                   pool threads, so its bookkeeping must be thread-safe)
+            concurrency: Batches in flight at once (1 = in order, one at a time)
+            retries: Attempts after the first for transient failures
+            dead_letter_path: JSON-lines file for rejected rows
+            table: Table name recorded with dead-lettered rows
+            log: Optional callable(level, message)
+            on_reject: Optional callable(rows, error) for dead-lettered rows
+                       (pool threads)
+        """
+        self.write = write
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.dead_letter_path = dead_letter_path
+        self.table = table
+        self.log = log or (lambda level, message: None)
+        self.on_reject = on_reject
+
+        self.stats = {'batches': 0, 'rows': 0, 'written': 0, 'retries': 0, 'splits': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='batch-writer')
+        self._futures: List[Future] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def submit(self, rows: List[Dict[str, Any]]):
+        """Queue a batch (blocks while `concurrency` batches are in flight)"""
+        if not rows:
+            return
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(self._write_batch, rows)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self._futures = [f for f in self._futures if not f.done()] + [future]
+
+    def wait(self):
+        """Block until every submitted batch is written or dead-lettered"""
+        with self._lock:
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """wait() and stop the pool"""
+        self.wait()
+        self._pool.shutdown(wait=True)
+
+    def summary(self) -> str:
+        text = (f"{self.stats['written']}/{self.stats['rows']} rows in {self.stats['batches']} batches, "
+                f"{self.stats['retries']} retries, {self.stats['splits']} splits, "
+                f"{self.stats['rejected']} rejected")
+        if self.stats['rejected']:
+            text += f" (see {self.dead_letter_path})"
+        return text
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _write_batch(self, rows: List[Dict[str, Any]]):
+        self._count('batches')
+        self._count('rows', len(rows))
+        try:
+            self._write_isolating(rows)
+        except Exception as e:  # Never let one batch take the pool down
+            self.log('error', f"Batch writer failed: {e}")
+            self._reject(rows, e)
+
+    def _write_isolating(self, rows: List[Dict[str, Any]]):
+        try:
+            self._write_with_retries(rows)
+        except Exception as e:
+            if len(rows) == 1 or not is_data_error(e):
+                self._reject(rows, e)  # Splitting can't help when the request, not the rows, failed
+                return
+            self._count('splits')
+            mid = len(rows) // 2
+            self._write_isolating(rows[:mid])
+            self._write_isolating(rows[mid:])
+            return
+        self._count('written', len(rows))
+
+    def _write_with_retries(self, rows: List[Dict[str, Any]]):
+        attempt = 0
+        while True:
+            try:
+                return self.write(rows)
+            except Exception as e:
+                if attempt >= self.retries or not is_transient_error(e):
+                    raise
+                attempt += 1
+                self._count('retries')
+                self.log('warning', f"Write of {len(rows)} rows failed ({e}); retry {attempt}/{self.retries}")
+                time.sleep(backoff_delay(attempt))
+
+    def _reject(self, rows: List[Dict[str, Any]], error: BaseException):
+        """Dead-letter rows the database would not take"""
+        self._count('rejected', len(rows))
+        message = str(error).splitlines()[0] if str(error) else type(error).__name__
+        self.log('error', f"✗ Rejected {len(rows)} row(s) ({message}); written to {self.dead_letter_path}")
+        rejected_at = datetime.now(timezone.utc).isoformat()
+        lines = ''.join(json.dumps({
+            'table': self.table,
+            'rejected_at': rejected_at,
+            'error': str(error),
+            'error_code': error_code(error),
+            'row': row,
+        }, default=str) + '\n' for row in rows)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.dead_letter_path) or '.', exist_ok=True)
+                with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+            except OSError as e:
+                self.log('warning', f"Could not write dead-letter file: {e}")
+        if self.on_reject:
+            self.on_reject(rows, error)
@@ -1,93 +1,95 @@
 """
 BizBuySell Scraper V2 - Multi-Tenant Support
 Integrates with vertical configuration system
-Supports: cleaning, landscape, hvac verticals
+Supports every vertical in the vertical registry (vertical_registry.py)
 """
 
 from curl_cffi import requests
-import hashlib
+import asyncio
 import json
 import time
 import os
 import uuid
 from datetime import datetime, timezone
-from typing import List, Dict, Optional, Any
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from colorama import Fore, Style, init
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from batch_writer import WRITE_CONCURRENCY, BatchWriter
+from change_detector import ChangeDetector, upsert_changes
+from copy_loader import COPY_BATCH_SIZE, DEFAULT_SINK, LISTINGS_SINKS, CopyLoader, open_copy_loader
+from detail_enricher import DEFAULT_DETAIL_IN_FLIGHT, DetailCache, DetailEnricher
+from fetch_engine import AsyncFetchEngine, backoff_delay, is_throttle_status
+from listing_decoder import SearchListing, decode_search_page
+from listing_record import ListingRecord, to_rows
+from log_sink import shared_log_sink
+from location_planner import plan_location_shards, split_shard
+from page_planner import PagePlanner
+from pipeline import PAGE_QUEUE_SIZE, ROW_QUEUE_SIZE, BatchSink, iter_in_background
+from proxy_pool import ProxyPool, ProxyState, as_requests_proxies
+from query_planner import FULL_CRAWL, describe_query, plan_queries
+from response_cache import ResponseCache
+from token_manager import AUTH_ERROR_STATUSES, TokenManager
+from vertical_registry import REGISTRY, VERTICAL_CONFIGS
+
 # Initialize
 init(autoreset=True)
 load_dotenv()
 
 
-# ============================================================================
-# VERTICAL CONFIGURATIONS
-# ============================================================================
+# Override to point at a stand-in server (see fake_bizbuysell_api.py)
+SEARCH_API_URL = os.getenv('BIZBUYSELL_API_URL', 'https://api.bizbuysell.com/bff/v2/BbsBfsSearchResults')
+
+# 'async' runs all pages on one event loop; 'threads' is the legacy
+# ThreadPoolExecutor path kept for comparison
+FETCH_ENGINES = ['async', 'threads']
+
+# The async engine starts at --workers and grows toward this ceiling while
+# the API answers cleanly (halving on 429/5xx)
+DEFAULT_MAX_IN_FLIGHT = 100
+
+# Attempts per page after the first before it is given up as failed
+PAGE_RETRIES = 4
+
+# Results per search page, if known (the request doesn't set it); lets a
+# reported total count end the crawl before the first empty page
+SEARCH_PAGE_SIZE = int(os.getenv('BBS_SEARCH_PAGE_SIZE', '0')) or None
+
+# Rows per listings upsert
+SAVE_BATCH_SIZE = 500
+
+# Raw listings per DataFrame when backfilling an archive (bounds memory)
+BACKFILL_CHUNK_SIZE = 50000
 
-VERTICAL_CONFIGS = {
-    'cleaning': {
-        'name': 'Cleaning Services',
-        'domain': 'VendingExits.com',
-        'include_keywords': [
-            'cleaning', 'janitorial', 'custodial', 'sanitation', 'maintenance',
-            'maid service', 'housekeeping', 'carpet cleaning', 'window cleaning',
-            'pressure washing', 'commercial cleaning', 'residential cleaning',
-            'floor care', 'disinfection', 'restoration'
-        ],
-        'exclude_keywords': [
-            'restaurant', 'food service', 'hvac', 'plumbing', 'electrical',
-            'landscaping', 'lawn care', 'pool', 'spa', 'salon'
-        ],
-        'bizbuysell_categories': [
-            'cleaning-businesses',
-            'janitorial-businesses',
-            'commercial-cleaning',
-            'residential-cleaning'
-        ]
-    },
-    'landscape': {
-        'name': 'Landscape Services',
-        'domain': 'landscapeexits.com',
-        'include_keywords': [
-            'landscape', 'landscaping', 'lawn care', 'lawn maintenance',
-            'irrigation', 'hardscape', 'tree service', 'snow removal',
-            'lawn mowing', 'garden', 'turf care', 'lawn treatment',
-            'landscape design', 'outdoor living'
-        ],
-        'exclude_keywords': [
-            'restaurant', 'food service', 'hvac', 'plumbing', 'electrical',
-            'cleaning', 'janitorial', 'pool', 'spa'
-        ],
-        'bizbuysell_categories': [
-            'landscape-businesses',
-            'lawn-care-businesses',
-            'tree-service-businesses',
-            'irrigation-businesses'
-        ]
-    },
-    'hvac': {
-        'name': 'HVAC Services',
-        'domain': 'hvacexits.com',
-        'include_keywords': [
-            'hvac', 'heating', 'cooling', 'air conditioning', 'furnace',
-            'ventilation', 'refrigeration', 'climate control', 'ductwork',
-            'heat pump', 'ac repair', 'hvac contractor', 'hvac service'
-        ],
-        'exclude_keywords': [
-            'restaurant', 'food service', 'cleaning', 'janitorial',
-            'landscaping', 'lawn care', 'pool', 'spa', 'plumbing', 'electrical'
-        ],
-        'bizbuysell_categories': [
-            'hvac-businesses',
-            'air-conditioning-businesses',
-            'heating-businesses',
-            'refrigeration-businesses'
-        ]
-    }
-}
+# Crawl-level stats copied from the shared crawler to each vertical's run
+CRAWL_STATS = ('pages_requested', 'requests_saved', 'pages_retried', 'retries', 'pages_failed',
+               'effective_rate', 'final_in_flight', 'peak_in_flight',
+               'shards', 'shards_split', 'shards_truncated', 'queries_truncated')
+
+# daysListedAgo values offered by the BizBuySell search UI. A full sweep uses
+# the largest; incremental runs pick the smallest one covering the gap since
+# the last completed run.
+DAYS_LISTED_AGO_WINDOWS = [1, 3, 7, 14, 30, 60]
+FULL_SWEEP_DAYS = DAYS_LISTED_AGO_WINDOWS[-1]
+
+# Extra overlap so listings indexed late by BizBuySell are not missed
+INCREMENTAL_OVERLAP_DAYS = 1
+
+
+def choose_days_listed_ago(last_completed_at: Optional[datetime], now: datetime = None) -> int:
+    """Smallest daysListedAgo window covering the time since last_completed_at"""
+    if last_completed_at is None:
+        return FULL_SWEEP_DAYS
+    now = now or datetime.now(timezone.utc)
+    gap_days = (now - last_completed_at).total_seconds() / 86400 + INCREMENTAL_OVERLAP_DAYS
+    for days in DAYS_LISTED_AGO_WINDOWS:
+        if gap_days <= days:
+            return days
+    return FULL_SWEEP_DAYS
 
 
 # ============================================================================
@@ -130,6 +132,8 @@ class BizBuySellScraperV2:
         if not supabase_url or not supabase_key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
         self.supabase: Client = create_client(supabase_url, supabase_key)
+        # scraper_logs rows are inserted in batches on a background thread
+        self.log_sink = shared_log_sink(self.supabase)
 
         # Tracking
         self.token = None
@@ -138,12 +142,79 @@ class BizBuySellScraperV2:
             'total_found': 0,
             'new_listings': 0,
             'updated_listings': 0,
+            'unchanged_listings': 0,
             'filtered_out': 0,
-            'errors': 0
+            'errors': 0,
+            'pages_requested': 0,
+            'requests_saved': 0,
+            'pages_retried': 0,
+            'retries': 0,
+            'pages_failed': 0,
+            'effective_rate': 0.0,
+            'final_in_flight': 0,
+            'peak_in_flight': 0,
+            'matched': 0,
+            'batches': 0,
+            'first_row_seconds': None,
+            'pipeline_seconds': 0.0,
+            'filter_seconds': 0.0,
+            'save_seconds': 0.0,
+            'detail_lookups': 0,
+            'detail_cache_hits': 0,
+            'details_fetched': 0,
+            'details_enriched': 0,
+            'shards': 0,
+            'shards_split': 0,
+            'shards_truncated': 0,
+            'queries_truncated': 0
         }
+        self.run_started_at: Optional[float] = None
+        # created_at/updated_at for every row of the run (reset by start_run)
+        self.run_at = datetime.now(timezone.utc).isoformat()
+        # The sink thread updates save counters while the main thread filters
+        self.stats_lock = Lock()
+
+        self.token_manager = TokenManager(session=self.session, headers=self.headers, log=self.log)
+
+        # Optional outbound proxies (BBS_PROXY_FILE / BBS_PROXIES / PROXY_URL)
+        self.proxy_pool: Optional[ProxyPool] = ProxyPool.from_env(log=self.log)
+
+        # Search window; narrowed by plan_incremental_window()
+        self.days_listed_ago = FULL_SWEEP_DAYS
+
+        # Raw search response cache; see enable_response_cache()
+        self.response_cache: Optional[ResponseCache] = None
+        self.replay = False
+
+        # Re-processing an archive (run_backfill); recorded as its own run type
+        self.backfill = False
+
+        # Keep each listing's full search payload in custom_fields (--archive-raw);
+        # otherwise only the fields normalize_listing reads are decoded
+        self.archive_raw = False
+
+        # Optional detail-page stage for matched rows (--enrich-details)
+        self.enrich_details = False
+        self.detail_in_flight = DEFAULT_DETAIL_IN_FLIGHT
+        self.enricher: Optional[DetailEnricher] = None
+
+        # How rows are written: 'postgrest' upserts or 'copy' (COPY + merge
+        # over DATABASE_URL); see open_writer()
+        self.sink = DEFAULT_SINK
+        self.copy_loader: Optional[CopyLoader] = None
+        # Writes save_batch's rows concurrently and isolates rejected rows
+        self.batch_writer: Optional[BatchWriter] = None
+
+        # Skips rows whose content hash is unchanged (postgrest sink); created
+        # by open_writer unless a shared one is assigned (run_shared_crawl, run_backfill)
+        self.change_detector: Optional[ChangeDetector] = None
+
+        # Queue workers set this to hand split shards back to the coordinator
+        # instead of crawling them here (see crawl_shard)
+        self.split_handoff: Optional[Callable[[List[Dict[str, Any]]], None]] = None
 
     def log(self, level: str, message: str, context: Dict = None):
-        """Log to console and scraper_logs table (if table exists)"""
+        """Log to console and queue a scraper_logs row (written in the background; never blocks)"""
         # Console logging
         colors = {
             'debug': Fore.CYAN,
@@ -154,19 +225,9 @@ class BizBuySellScraperV2:
         color = colors.get(level, Fore.WHITE)
         print(f"{color}[{level.upper()}] {message}")
 
-        # Database logging (silently skip if table doesn't exist)
+        # Database logging (the sink silently drops rows if the table doesn't exist)
         if self.scraper_run_id:
-            try:
-                self.supabase.table('scraper_logs').insert({
-                    'id': str(uuid.uuid4()),
-                    'scraper_run_id': self.scraper_run_id,
-                    'timestamp': datetime.now(timezone.utc).isoformat(),
-                    'level': level,
-                    'message': message,
-                    'context': context or {}
-                }).execute()
-            except Exception:
-                pass  # Silently skip if table doesn't exist
+            self.log_sink.emit(self.scraper_run_id, level, message, context)
 
     def create_scraper_run(self):
         """Create a scraper run record (optional - continues if table doesn't exist)"""
@@ -176,7 +237,9 @@ class BizBuySellScraperV2:
                 'id': self.scraper_run_id,
                 'vertical_slug': self.vertical_slug,
                 'broker_source': self.broker_source,
-                'scraper_type': 'bizbuysell',
+                # Replays and backfills must not move the incremental high-water mark
+                'scraper_type': 'bizbuysell_backfill' if self.backfill else
+                                'bizbuysell_replay' if self.replay else 'bizbuysell',
                 'started_at': datetime.now(timezone.utc).isoformat(),
                 'status': 'running',
                 'total_listings_found': 0,
@@ -208,174 +271,145 @@ class BizBuySellScraperV2:
             self.log('info', f"Updated scraper run: {status}")
         except Exception:
             pass  # Silently skip if table doesn't exist
+        self.log_sink.flush()  # The run's logs are stored by the time it returns
 
-    def get_auth_token(self):
-        """Obtain authentication token from BizBuySell"""
-        self.log('info', 'Obtaining authentication token...')
-        try:
-            response = self.session.get(
-                'https://www.bizbuysell.com/businesses-for-sale/new-york-ny/',
-                headers=self.headers
-            )
-            cookies = response.cookies
-            self.token = cookies.get('_track_tkn')
-            if self.token:
-                self.log('info', 'Authentication token obtained successfully')
-            else:
-                self.log('error', 'Failed to get authentication token')
-        except Exception as e:
-            self.log('error', f'Error obtaining token: {str(e)}')
+    def get_last_completed_at(self, verticals: List[str] = None) -> Optional[datetime]:
+        """
+        High-water mark: completed_at of the last successful BizBuySell run
 
-    def matches_vertical(self, listing: Dict[str, Any]) -> bool:
-        """Check if listing matches vertical keywords"""
-        # Get searchable text
-        title = (listing.get('header') or '').lower()
-        description = (listing.get('description') or '').lower()
-        category = (listing.get('category') or '').lower()
-        search_text = f"{title} {description} {category}"
-
-        # Check exclude keywords first
-        for keyword in self.vertical_config['exclude_keywords']:
-            if keyword.lower() in search_text:
-                return False
-
-        # Check include keywords
-        for keyword in self.vertical_config['include_keywords']:
-            if keyword.lower() in search_text:
-                return True
-
-        return False
-
-    def normalize_listing(self, raw_listing: Dict[str, Any]) -> Dict[str, Any]:
-        """Convert BizBuySell listing to match ACTUAL Supabase production schema"""
-        # Generate unique ID
-        list_number = str(raw_listing.get('listNumber', ''))
-        url_stub = raw_listing.get('urlStub', '')
-        title_text = raw_listing.get('header', '')
-        unique_str = f"{list_number}--{url_stub}--{title_text}"
-        listing_id = hashlib.sha256(unique_str.encode()).hexdigest()
-
-        # Generate slug from title
-        import re
-        slug = re.sub(r'[^a-z0-9]+', '-', title_text.lower()).strip('-')[:100]
-
-        # Extract image URL
-        img = raw_listing.get("img")
-        image_url = None
-        if isinstance(img, list) and img:
-            image_url = img[0]
-        elif isinstance(img, str):
-            image_url = img
-
-        # Parse financial values
-        def parse_financial(value):
-            if not value:
-                return None
+        Partial runs (failed pages, queries cut off at max_pages) don't count,
+        so listings they missed are searched for again.
+
+        With several verticals the oldest of their marks is used, so every
+        vertical is covered. Returns None if any vertical has no completed run
+        or scraper_runs is unavailable.
+        """
+        marks = []
+        for vertical in verticals or [self.vertical_slug]:
             try:
-                if isinstance(value, (int, float)):
-                    return float(value)
-                # Remove $, commas, and convert
-                cleaned = str(value).replace('$', '').replace(',', '').strip()
-                return float(cleaned) if cleaned else None
-            except:
-                return None
+                response = self.supabase.table('scraper_runs') \
+                    .select('completed_at') \
+                    .eq('scraper_type', 'bizbuysell') \
+                    .eq('vertical_slug', vertical) \
+                    .eq('status', 'completed') \
+                    .order('completed_at', desc=True) \
+                    .limit(1) \
+                    .execute()
+                if not response.data or not response.data[0].get('completed_at'):
+                    return None
+                marks.append(datetime.fromisoformat(response.data[0]['completed_at'].replace('Z', '+00:00')))
+            except Exception:
+                return None  # Table doesn't exist or unparsable - do a full sweep
+        return min(marks) if marks else None
+
+    def plan_incremental_window(self, full_sweep: bool = False, verticals: List[str] = None) -> int:
+        """Set days_listed_ago from the high-water mark (or the full sweep window)"""
+        if full_sweep:
+            self.days_listed_ago = FULL_SWEEP_DAYS
+            self.log('info', f"Full sweep: daysListedAgo={self.days_listed_ago}")
+            return self.days_listed_ago
+
+        last_completed_at = self.get_last_completed_at(verticals)
+        self.days_listed_ago = choose_days_listed_ago(last_completed_at)
+        if last_completed_at:
+            self.log('info', f"Incremental crawl: last completed run {last_completed_at.isoformat()}, "
+                             f"daysListedAgo={self.days_listed_ago}")
+        else:
+            self.log('info', f"No completed run found - full sweep (daysListedAgo={self.days_listed_ago})")
+        return self.days_listed_ago
 
-        # Build listing URL
-        listing_url = url_stub
-        if not listing_url.startswith('http'):
-            listing_url = f"https://www.bizbuysell.com{url_stub}"
-
-        # Parse location (try to extract city/state)
-        location = raw_listing.get("location", "")
-        city = None
-        state = None
-        if location and ',' in location:
-            parts = location.split(',')
-            city = parts[0].strip() if len(parts) > 0 else None
-            state = parts[1].strip() if len(parts) > 1 else None
-
-        # Map to ACTUAL Supabase production schema (user confirmed)
-        return {
-            # Primary fields
-            'id': listing_id,
-            'vertical_id': None,  # Set by database default or trigger
-            'vertical_slug': self.vertical_slug,
-            'title': title_text,
-            'description': raw_listing.get("description"),
-            'slug': slug,
-
-            # Location fields
-            'city': city,
-            'state': state,
-            'country': 'US',
-            'zip_code': None,  # Not provided by BizBuySell
-
-            # Financial fields - ACTUAL Supabase column names
-            'asking_price': parse_financial(raw_listing.get("price")),
-            'revenue': parse_financial(raw_listing.get("grossSales")),
-            'sde': parse_financial(raw_listing.get("cashFlow")),
-            'ebitda': parse_financial(raw_listing.get("ebitda")),
-            'cash_flow': parse_financial(raw_listing.get("cashFlow")),
-            'inventory_value': None,  # Not provided by BizBuySell
-
-            # Business details
-            'year_established': None,  # Not provided by BizBuySell
-            'employees_count': None,  # Not provided by BizBuySell
-            'category': raw_listing.get("category"),
-            'status': 'pending',
-
-            # Source/broker fields - ACTUAL Supabase column names
-            'broker_id': None,  # Set by database or leave null
-            'source': 'BizBuySell',
-            'external_id': list_number,
-            'external_url': listing_url,
-
-            # Media fields
-            'images': [image_url] if image_url else [],
-            'documents': [],
-
-            # SEO fields
-            'meta_title': title_text,
-            'meta_description': raw_listing.get("description", "")[:160] if raw_listing.get("description") else None,
-
-            # Custom fields (store extra BizBuySell data as JSON)
-            'custom_fields': {
-                'bizbuysell': {
-                    'list_number': list_number,
-                    'url_stub': url_stub,
-                    'broker_company': raw_listing.get("brokerCompany"),
-                    'broker_contact': (raw_listing.get("brokercontactfullname") or
-                                     raw_listing.get("brokerContactFullName")),
-                    'region': raw_listing.get("region"),
-                    'hot_property': raw_listing.get("hotProperty") == "true",
-                    'recently_added': raw_listing.get("recentlyAdded") == "true",
-                    'recently_updated': raw_listing.get("recentlyUpdated") == "true",
-                }
-            },
-
-            # Timestamps
-            'created_at': datetime.now(timezone.utc).isoformat(),
-            'updated_at': datetime.now(timezone.utc).isoformat(),
-            # SKIP these 4 fields that cause cache errors:
-            # - created_by
-            # - updated_by
-            # - published_at
-            # - archived_at
-        }
+    def get_auth_token(self):
+        """Obtain authentication token (shared on-disk cache, refreshed before expiry)"""
+        if not self.proxy_pool:
+            self.token = self.token_manager.get_token()
+            return
+        # Proxied runs hold one token per proxy; warm up the first one
+        proxy = self.proxy_pool.acquire()
+        self.token = self.token_manager_for(proxy).get_token()
+        self.proxy_pool.release(proxy, ok=bool(self.token))
+
+    def refresh_auth_token(self, stale_token: Optional[str], manager: TokenManager = None):
+        """Replace a token the API rejected; other callers' refreshes are reused"""
+        self.log('warning', 'Authentication token rejected - refreshing')
+        manager = manager or self.token_manager
+        token = manager.refresh(stale_token)
+        if manager is self.token_manager:
+            self.token = token or self.token
+        return token
+
+    def token_manager_for(self, proxy: Optional[ProxyState]) -> TokenManager:
+        """Token manager bound to proxy (the default one when not proxied)"""
+        return self.token_manager.for_proxy(proxy.url if proxy else None)
+
+    def release_proxy(self, proxy: Optional[ProxyState], ok: bool, started: float = None):
+        """Feed a request outcome back into the proxy pool"""
+        if proxy:
+            latency = time.monotonic() - started if ok and started else None
+            self.proxy_pool.release(proxy, ok, latency)
+
+    def enable_response_cache(self, replay: bool = False, cache: ResponseCache = None):
+        """
+        Serve search pages from the on-disk response cache
+
+        Args:
+            replay: Serve the whole crawl from the cache with no API calls;
+                    uncached pages count as past the end of results
+            cache: Shared cache instance (default: new one at BBS_RESPONSE_CACHE)
+        """
+        self.response_cache = cache or ResponseCache(log=self.log)
+        self.replay = replay
+
+    def load_replay_window(self) -> int:
+        """Reuse the daysListedAgo of the last live crawl so replayed payloads hit the cache"""
+        manifest = self.response_cache.read_manifest() or {}
+        self.days_listed_ago = manifest.get('days_listed_ago', self.days_listed_ago)
+        self.log('info', f"Replay: serving search pages from {self.response_cache.cache_dir} "
+                         f"(daysListedAgo={self.days_listed_ago})")
+        return self.days_listed_ago
+
+    def get_cached_page(self, payload: Dict[str, Any]) -> Optional[Tuple[List[SearchListing], Optional[int]]]:
+        """Decoded cached page for a payload (stale entries allowed in replay)"""
+        if not self.response_cache:
+            return None
+        body = self.response_cache.get_raw(payload, allow_stale=self.replay)
+        if body is None:
+            return None
+        try:
+            return self.decode_page(body)
+        except ValueError:
+            return None  # Truncated entry - refetch
 
-    def scrape_listings(self, max_pages: int = 100, workers: int = 10) -> List[Dict[str, Any]]:
-        """Scrape listings from BizBuySell API"""
-        if not self.token:
-            self.log('error', 'No authentication token available. Cannot proceed.')
-            return []
+    def store_page(self, payload: Dict[str, Any], body: bytes):
+        if self.response_cache and not self.replay:
+            self.response_cache.put_raw(payload, body)
 
-        self.log('info', f"Starting to scrape {self.vertical_config['name']} listings with {workers} workers...")
+    def decode_page(self, body: bytes) -> Tuple[List[SearchListing], Optional[int]]:
+        """(listings, total count) from a raw search response body"""
+        return decode_search_page(body, archive=self.archive_raw)
 
-        api_headers = self.headers.copy()
-        api_headers['Authorization'] = f'Bearer {self.token}'
+    @staticmethod
+    def search_text(listing: Dict[str, Any]) -> str:
+        """Text the vertical keywords are matched against"""
+        return f"{listing.get('header') or ''} {listing.get('description') or ''} {listing.get('category') or ''}"
 
-        # Payload template
-        payload_template = {
+    def matches_vertical(self, listing: Dict[str, Any]) -> bool:
+        """Check if listing matches vertical keywords"""
+        return REGISTRY.matcher.matches(self.search_text(listing), self.vertical_slug)
+
+    def normalize_listing(self, raw_listing: Dict[str, Any]) -> ListingRecord:
+        """
+        Compact record for a matched listing
+
+        Serialized to the production listings schema only when its batch is
+        saved (ListingRecord.to_bizbuysell_row), stamped with the run's
+        timestamp.
+        """
+        return ListingRecord.from_bizbuysell(raw_listing, self.vertical_slug, self.run_at,
+                                             archive=self.archive_raw)
+
+    def build_search_payload(self, page_number: int = 1, criteria: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Build BbsBfsSearchResults payload for a page, applying criteria overrides"""
+        payload = {
             "bfsSearchCriteria": {
                 "siteId": 20,
                 "languageId": 10,
@@ -384,13 +418,13 @@ class BizBuySellScraperV2:
                 "excludeLocations": None,
                 "askingPriceMax": 0,
                 "askingPriceMin": 0,
-                "pageNumber": 1,
+                "pageNumber": page_number,
                 "keyword": None,
                 "cashFlowMin": 0,
                 "cashFlowMax": 0,
                 "grossIncomeMin": 0,
                 "grossIncomeMax": 0,
-                "daysListedAgo": 60,
+                "daysListedAgo": self.days_listed_ago,
                 "establishedAfterYear": 0,
                 "listingsWithNoAskingPrice": 0,
                 "homeBasedListings": 0,
@@ -406,70 +440,502 @@ class BizBuySellScraperV2:
                 "seoSearchType": None
             }
         }
+        if criteria:
+            payload["bfsSearchCriteria"].update(criteria)
+        return payload
+
+    def get_detail_headers(self) -> Dict[str, str]:
+        """Browser headers for listing detail pages (HTML, not the JSON API)"""
+        browser_keys = ('User-Agent', 'Accept-Language', 'Accept-Encoding',
+                        'Sec-Ch-Ua', 'Sec-Ch-Ua-Mobile', 'Sec-Ch-Ua-Platform', 'Referer')
+        headers = {key: self.headers[key] for key in browser_keys if key in self.headers}
+        headers['Accept'] = 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+        return headers
+
+    def get_api_headers(self, token: Optional[str] = None) -> Dict[str, str]:
+        """Headers for API calls, including the bearer token (default: self.token)"""
+        api_headers = self.headers.copy()
+        api_headers['Authorization'] = f'Bearer {token or self.token}'
+        return api_headers
+
+    @staticmethod
+    def dedupe_listings(listings: List[Dict[str, Any]], listing_ids: set) -> List[Dict[str, Any]]:
+        """Return listings not seen before (by listNumber), recording their ids in listing_ids"""
+        new_listings = []
+        for listing in listings:
+            listing_id = listing.get('listNumber') or f"{listing.get('urlStub')}--{listing.get('header')}"
+            if listing_id and listing_id not in listing_ids:
+                listing_ids.add(listing_id)
+                new_listings.append(listing)
+        return new_listings
+
+    def iter_pages(self, max_pages: int = 100, workers: int = 10, engine: str = 'async',
+                   timeout: float = 30.0, queries: Optional[List[Dict[str, Any]]] = None,
+                   max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, shard_locations: bool = False,
+                   queue_size: int = PAGE_QUEUE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream raw search results from the BizBuySell API, one deduped page at a time
+
+        The crawl runs on a background thread and hands pages over through a
+        bounded queue, so memory does not grow with max_pages. Closing the
+        generator early stops the crawl.
+
+        Args:
+            max_pages: Maximum pages to fetch per query
+            workers: Starting in-flight limit (async) or thread count (threads)
+            engine: 'async' (default) or 'threads' (legacy fallback)
+            timeout: Per-request timeout in seconds
+            queries: Narrowed search criteria (see query_planner). Results are
+                     merged by listNumber; if they come back empty the full
+                     crawl runs instead. Default: full crawl only.
+            max_in_flight: Ceiling for the adaptive in-flight limit (async only)
+            shard_locations: Split each query into location shards (see location_planner)
+                   crawled concurrently; shards that hit max_pages are split
+                   again, so max_pages caps depth per shard, not the crawl
+            queue_size: Pages that may wait for the consumer before the crawl pauses
+        """
+        if not self.token and not self.replay:
+            self.log('error', 'No authentication token available. Cannot proceed.')
+            return
+
+        if engine not in FETCH_ENGINES:
+            raise ValueError(f"Invalid engine: {engine}. Must be one of: {FETCH_ENGINES}")
+
+        queries = queries or [FULL_CRAWL]
+        split = None
+        if shard_locations:
+            queries = [location for query in queries for location in plan_location_shards(query)]
+            split = split_shard
+        self.log('info', f"Starting to scrape {self.vertical_config['name']} listings "
+                         f"({engine} engine, {workers} in flight, {len(queries)} queries)...")
+        self.stats.update(pages_retried=0, retries=0, pages_failed=0)
+        found = []
+
+        def crawl(emit):
+            found.append(self._run_queries(queries, max_pages, workers, engine, timeout, max_in_flight, emit, split))
+            fallback = plan_location_shards() if shard_locations else [FULL_CRAWL]
+            if not found[-1] and queries != fallback:
+                self.log('warning', 'Narrowed queries returned nothing - falling back to full crawl')
+                found.append(self._run_queries(fallback, max_pages, workers, engine, timeout, max_in_flight, emit, split))
+
+        yield from iter_in_background(crawl, queue_size)
+
+        if self.response_cache:
+            if not self.replay:
+                self.response_cache.write_manifest({'days_listed_ago': self.days_listed_ago})
+            self.log('info', f"Response cache: {self.response_cache.summary()}")
+        if self.proxy_pool and not self.replay:
+            self.log('info', f"Proxies: {self.proxy_pool.summary()}")
+
+        self.log('info', f'Scraping complete! Total unique listings scraped: {sum(found)}')
+
+    def crawl_shard(self, criteria: Dict[str, Any], max_pages: int = 100, workers: int = 10,
+                    engine: str = 'async', timeout: float = 30.0,
+                    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Crawl one query or location shard for a queue worker
+
+        A shard that runs past max_pages is not split here; its children are
+        returned so the coordinator can queue them for any worker.
+
+        Returns:
+            (listing dicts, child shards still to crawl). Crawl counters in
+            self.stats cover this shard only.
+        """
+        if not self.token and not self.replay:
+            self.get_auth_token()
+            if not self.token:
+                raise Exception("Failed to obtain authentication token")
 
-        all_listings = []
+        for key in CRAWL_STATS:
+            self.stats[key] = 0
+        listings: List[Dict[str, Any]] = []
+        children: List[Dict[str, Any]] = []
+        self.split_handoff = children.extend
+        try:
+            self._run_queries([criteria], max_pages, workers, engine, timeout, max_in_flight,
+                              listings.extend, split_shard)
+        finally:
+            self.split_handoff = None
+        return [listing.to_dict() if isinstance(listing, SearchListing) else listing
+                for listing in listings], children
+
+    def scrape_listings(self, **kwargs) -> List[Dict[str, Any]]:
+        """Every raw search result in one list (see iter_pages for arguments)"""
+        return [listing for page in self.iter_pages(**kwargs) for listing in page]
+
+    def iter_listings(self, **kwargs) -> Iterator[ListingRecord]:
+        """
+        Listing records matching this vertical, yielded as their page arrives
+
+        Takes the same arguments as iter_pages. Counts go to self.stats.
+        """
+        for page in self.iter_pages(**kwargs):
+            yield from self.filter_page(page)
+
+    def _run_queries(self, queries: List[Dict[str, Any]], max_pages: int, workers: int,
+                     engine: str, timeout: float, max_in_flight: int,
+                     on_page: Callable[[List[Dict[str, Any]]], None],
+                     split: Optional[Callable[[Dict[str, Any]], List[Dict[str, Any]]]] = None) -> int:
+        """
+        Crawl queries, passing each page's new listings to on_page; returns the unique count
+
+        With split, a query that runs past max_pages is replaced by the
+        queries split() returns for it (location shards).
+        """
+        if engine == 'threads':
+            return self._scrape_listings_threaded(queries, max_pages, workers, timeout, on_page, split)
+        return asyncio.run(self._scrape_listings_async(queries, max_pages, workers,
+                                                       max(workers, max_in_flight), timeout, on_page, split))
+
+    async def _scrape_listings_async(self, queries: List[Dict[str, Any]], max_pages: int,
+                                     initial_in_flight: int, max_in_flight: int, timeout: float,
+                                     on_page: Callable[[List[Dict[str, Any]]], None],
+                                     split: Optional[Callable[[Dict[str, Any]], List[Dict[str, Any]]]] = None) -> int:
+        """
+        Crawl every query concurrently on one event loop, sharing one AIMD in-flight limit
+
+        The limit starts at initial_in_flight, grows while responses are
+        healthy and halves on 429/5xx/timeouts, never exceeding max_in_flight.
+        Queries running at the same time split the limit between their
+        page windows.
+        """
+        unique = 0
         listing_ids = set()
-        lock = Lock()
+        active = 0
+
+        async with AsyncFetchEngine(max_in_flight=max_in_flight, timeout=timeout,
+                                    initial_in_flight=initial_in_flight) as fetcher:
+
+            async def fetch_page(criteria, page_number):
+                """
+                Returns (listings, total_count), or None if every attempt failed
+
+                429/5xx, timeouts and network errors put the page back in line
+                after a jittered backoff; the slot is released while it waits.
+                With a proxy pool each attempt goes out through the best-scoring
+                proxy, using the token that proxy obtained.
+                """
+                payload = self.build_search_payload(page_number, criteria)
+                cached = self.get_cached_page(payload)
+                if cached is not None:
+                    return cached
+                if self.replay:
+                    return [], None
+
+                auth_refreshed = False
+                attempt = 0
+                while True:
+                    reason = None
+                    proxy = self.proxy_pool.acquire() if self.proxy_pool else None
+                    manager = self.token_manager_for(proxy)
+                    proxy_ok = False
+                    started = time.monotonic()
+                    try:
+                        token = manager.token if manager.is_fresh() else \
+                            await asyncio.to_thread(manager.get_token)
+                        if not token and proxy:
+                            raise ConnectionError(f'no auth token through proxy {proxy.label}')
+                        started = time.monotonic()
+                        response = await fetcher.post(
+                            SEARCH_API_URL,
+                            headers=self.get_api_headers(token),
+                            json=payload,
+                            proxies=as_requests_proxies(proxy.url if proxy else None)
+                        )
+                        if response.status_code == 200:
+                            page = self.decode_page(response.content)
+                            proxy_ok = True
+                            self.store_page(payload, response.content)
+                            return page
+                        if response.status_code in AUTH_ERROR_STATUSES and not auth_refreshed:
+                            # A stale token, not the proxy's fault - don't count it against the proxy
+                            proxy_ok = True
+                            auth_refreshed = True
+                            await asyncio.to_thread(self.refresh_auth_token, token, manager)
+                            continue
+                        if not is_throttle_status(response.status_code):
+                            proxy_ok = response.status_code not in AUTH_ERROR_STATUSES
+                            self.log('error', f'Failed to get data for page {page_number}. Status: {response.status_code}')
+                            break
+                        reason = f'status {response.status_code}'
+                    except asyncio.TimeoutError:
+                        reason = f'timed out after {timeout}s'
+                    except Exception as e:
+                        reason = str(e)
+                    finally:
+                        self.release_proxy(proxy, proxy_ok, started)
+
+                    attempt += 1
+                    if attempt > PAGE_RETRIES:
+                        self.log('error', f'Giving up on page {page_number} after {PAGE_RETRIES} retries ({reason})')
+                        break
+                    if attempt == 1:
+                        self.stats['pages_retried'] += 1
+                    self.stats['retries'] += 1
+                    await asyncio.sleep(backoff_delay(attempt))
+
+                self.stats['pages_failed'] += 1
+                return None
+
+            async def crawl_query(criteria):
+                nonlocal unique, active
+                active += 1
+                planner = PagePlanner(max_pages, window=fetcher.current_limit, page_size=SEARCH_PAGE_SIZE)
+                found = 0
+                while not planner.done:
+                    # Stop early once a total count shows the query needs splitting
+                    if split and planner.truncated:
+                        break
+                    # Windows track the AIMD limit so healthy runs probe wider
+                    planner.window = max(1, fetcher.current_limit // active)
+                    if not self.proxy_pool:
+                        self.token = await asyncio.to_thread(self.token_manager.get_token) or self.token
+                    tasks = {page: fetcher.submit(fetch_page(criteria, page)) for page in planner.next_window()}
+                    for page, task in sorted(tasks.items()):
+                        await asyncio.wait([task])
+                        if task.cancelled() or task.exception() or task.result() is None:
+                            continue
+                        listings, total_count = task.result()
+                        planner.record(page, len(listings), total_count)
+                        found += len(listings)
+                        new_listings = self.dedupe_listings(listings, listing_ids)
+                        if new_listings:
+                            unique += len(new_listings)
+                            # Blocks while the pipeline is backed up
+                            await asyncio.to_thread(on_page, new_listings)
+
+                        # Drop in-flight pages the planner now knows are empty
+                        for later_page, later_task in tasks.items():
+                            if planner.is_past_end(later_page) and not later_task.done():
+                                later_task.cancel()
+
+                active -= 1
+                self._record_paging_stats(planner, criteria, found, split)
+                children = self._split_truncated(planner, criteria, split)
+                if children:
+                    await asyncio.gather(*(crawl_query(child) for child in children))
 
-        def fetch_page(page_number):
-            payload = json.loads(json.dumps(payload_template))  # deep copy
-            payload["bfsSearchCriteria"]["pageNumber"] = page_number
             try:
-                response = self.session.post(
-                    'https://api.bizbuysell.com/bff/v2/BbsBfsSearchResults',
-                    headers=api_headers,
-                    json=payload
-                )
+                await asyncio.gather(*(crawl_query(criteria) for criteria in queries))
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                fetcher.cancel()
+                raise
+
+        self.stats['effective_rate'] = round(fetcher.effective_rate, 2)
+        self.stats['final_in_flight'] = fetcher.current_limit
+        self.stats['peak_in_flight'] = int(fetcher.controller.peak_limit)
+        self.log('info', f"Concurrency: ended at {fetcher.current_limit} in flight (peak "
+                         f"{int(fetcher.controller.peak_limit)}, {fetcher.controller.decreases} backoffs), "
+                         f"{fetcher.effective_rate:.2f} pages/s, {self.stats['pages_retried']} pages retried")
+        return unique
+
+    def _scrape_listings_threaded(self, queries: List[Dict[str, Any]], max_pages: int, workers: int,
+                                  timeout: float, on_page: Callable[[List[Dict[str, Any]]], None],
+                                  split: Optional[Callable[[Dict[str, Any]], List[Dict[str, Any]]]] = None) -> int:
+        """Crawl queries one after another with a thread pool sharing one blocking session"""
+        unique = 0
+        listing_ids = set()
+
+        def fetch_page(criteria, page_number):
+            """Returns (listings, total_count), or None if the request failed"""
+            payload = self.build_search_payload(page_number, criteria)
+            cached = self.get_cached_page(payload)
+            if cached is not None:
+                return cached
+            if self.replay:
+                return [], None
+
+            proxy = self.proxy_pool.acquire() if self.proxy_pool else None
+            manager = self.token_manager_for(proxy)
+            proxy_ok = False
+            started = time.monotonic()
+            try:
+                for attempt in range(2):
+                    token = manager.get_token()
+                    if not token and proxy:
+                        raise ConnectionError(f'no auth token through proxy {proxy.label}')
+                    started = time.monotonic()
+                    response = self.session.post(
+                        SEARCH_API_URL,
+                        headers=self.get_api_headers(token),
+                        json=payload,
+                        timeout=timeout,
+                        proxies=as_requests_proxies(proxy.url if proxy else None)
+                    )
+                    if response.status_code not in AUTH_ERROR_STATUSES or attempt:
+                        break
+                    self.refresh_auth_token(token, manager)
+
                 if response.status_code == 200:
-                    data = response.json()
-                    listings = data.get("value", {}).get("bfsSearchResult", {}).get("value", [])
-                    new_listings = []
-                    with lock:
-                        for listing in listings:
-                            listing_id = f"{listing.get('urlStub')}--{listing.get('header')}"
-                            if listing_id and listing_id not in listing_ids:
-                                listing_ids.add(listing_id)
-                                new_listings.append(listing)
-                    return new_listings
+                    page = self.decode_page(response.content)
+                    proxy_ok = True
+                    self.store_page(payload, response.content)
+                    return page
                 else:
+                    proxy_ok = not is_throttle_status(response.status_code) and \
+                        response.status_code not in AUTH_ERROR_STATUSES
                     self.log('error', f'Failed to get data for page {page_number}. Status: {response.status_code}')
             except Exception as e:
                 self.log('error', f'Error fetching page {page_number}: {str(e)}')
-            return []
+            finally:
+                self.release_proxy(proxy, proxy_ok, started)
+            return None
 
-        # Parallel scraping
+        # Parallel scraping, one planner window at a time
         with ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = [executor.submit(fetch_page, page) for page in range(1, max_pages + 1)]
-            for future in as_completed(futures):
-                page_listings = future.result()
-                if page_listings:
-                    all_listings.extend(page_listings)
-
-        self.log('info', f'Scraping complete! Total unique listings scraped: {len(all_listings)}')
-        return all_listings
-
-    def filter_and_normalize(self, raw_listings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Filter listings by vertical keywords and normalize format"""
-        self.log('info', f"Filtering {len(raw_listings)} listings for {self.vertical_config['name']}...")
-
+            pending = list(queries)
+            while pending:
+                criteria = pending.pop(0)
+                planner = PagePlanner(max_pages, window=workers, page_size=SEARCH_PAGE_SIZE)
+                found = 0
+                while not planner.done:
+                    if split and planner.truncated:
+                        break
+                    if not self.proxy_pool:
+                        self.token = self.token_manager.get_token() or self.token
+                    futures = {executor.submit(fetch_page, criteria, page): page for page in planner.next_window()}
+                    for future in as_completed(futures):
+                        result = None if future.cancelled() else future.result()
+                        if result is None:
+                            continue
+                        listings, total_count = result
+                        planner.record(futures[future], len(listings), total_count)
+                        found += len(listings)
+                        new_listings = self.dedupe_listings(listings, listing_ids)
+                        if new_listings:
+                            unique += len(new_listings)
+                            on_page(new_listings)
+
+                        for later_future, later_page in futures.items():
+                            if planner.is_past_end(later_page):
+                                later_future.cancel()
+
+                self._record_paging_stats(planner, criteria, found, split)
+                pending.extend(self._split_truncated(planner, criteria, split))
+
+        return unique
+
+    def _record_paging_stats(self, planner: PagePlanner, criteria: Dict[str, Any], found: int,
+                             split: Optional[Callable] = None):
+        """Copy planner results into run stats"""
+        self.stats['pages_requested'] += planner.pages_requested
+        self.stats['requests_saved'] += planner.requests_saved
+        if split:
+            self.stats['shards'] += 1
+        elif planner.truncated:
+            self.stats['queries_truncated'] += 1
+        end = planner.last_page if planner.last_page is not None else 'not reached'
+        self.log('info', f"Paging [{describe_query(criteria)}]: requested {planner.pages_requested}/"
+                         f"{planner.max_pages} pages, {found} results "
+                         f"(last page: {end}, saved {planner.requests_saved} requests)")
+
+    def _split_truncated(self, planner: PagePlanner, criteria: Dict[str, Any],
+                         split: Optional[Callable[[Dict[str, Any]], List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Child queries to crawl when a sharded query ran past max_pages"""
+        if not split or not planner.truncated:
+            return []
+        children = split(criteria)
+        if children:
+            self.stats['shards_split'] += 1
+            self.log('info', f"Shard [{describe_query(criteria)}] exceeds {planner.max_pages} pages - "
+                             f"splitting into {len(children)}")
+            if self.split_handoff:
+                self.split_handoff(children)
+                return []
+        else:
+            self.stats['shards_truncated'] += 1
+            self.log('warning', f"Shard [{describe_query(criteria)}] exceeds {planner.max_pages} pages and "
+                                f"cannot be split further - raise --max-pages to reach the rest")
+        return children
+
+    def filter_page(self, raw_listings: List[Dict[str, Any]],
+                    matched: Optional[List[bool]] = None) -> List[ListingRecord]:
+        """
+        Matching listings from one page as ListingRecords (counts go to self.stats)
+
+        Args:
+            raw_listings: Search results
+            matched: Precomputed matches_vertical() per listing (the shared
+                     crawl classifies a page for all verticals in one pass)
+        """
+        started = time.perf_counter()
+        if matched is None:
+            matched = REGISTRY.matcher.match_many(map(self.search_text, raw_listings), self.vertical_slug)
         filtered_listings = []
-        for raw_listing in raw_listings:
-            if self.matches_vertical(raw_listing):
+        for raw_listing, is_match in zip(raw_listings, matched):
+            if is_match:
                 try:
-                    normalized = self.normalize_listing(raw_listing)
-                    filtered_listings.append(normalized)
+                    filtered_listings.append(self.normalize_listing(raw_listing))
                 except Exception as e:
                     self.log('error', f"Error normalizing listing: {e}")
-                    self.stats['errors'] += 1
+                    with self.stats_lock:
+                        self.stats['errors'] += 1
             else:
                 self.stats['filtered_out'] += 1
 
+        self.stats['total_found'] += len(raw_listings)
+        self.stats['matched'] += len(filtered_listings)
+        self.stats['filter_seconds'] += time.perf_counter() - started
+        return filtered_listings
+
+    def filter_and_normalize(self, raw_listings: List[Dict[str, Any]]) -> List[ListingRecord]:
+        """Filter listings by vertical keywords and normalize format"""
+        self.log('info', f"Filtering {len(raw_listings)} listings for {self.vertical_config['name']}...")
+
+        filtered_listings = self.filter_page(raw_listings)
+
         self.log('info', f"Filtered to {len(filtered_listings)} {self.vertical_config['name']} listings")
         self.log('info', f"Filtered out {self.stats['filtered_out']} non-matching listings")
 
         return filtered_listings
 
-    def save_to_supabase(self, listings: List[Dict[str, Any]]):
+    def save_batch(self, batch: List[ListingRecord]):
+        """
+        Serialize one batch of listing records and hand it to the batch writer
+
+        Called from the sink thread; blocks while the writer has
+        LISTINGS_WRITE_CONCURRENCY batches in flight.
+        """
+        self.stats['batches'] += 1
+        self.batch_writer.submit(to_rows(batch, 'bizbuysell'))
+
+    def write_rows(self, rows: List[Dict[str, Any]]):
+        """
+        Upsert the new and changed rows of a batch (batch writer thread)
+
+        Rows whose content hash matches the stored one are skipped (by the
+        change detector, or by the COPY loader's key join with --sink copy).
+        Raises on failure so the batch writer can retry or bisect.
+        """
+        started = time.perf_counter()
+        try:
+            if self.copy_loader:
+                new, updated, unchanged = self.copy_loader.load(rows)
+            else:
+                new_rows, updated_rows, unchanged = self.change_detector.split(rows)
+                upsert_changes(self.supabase, new_rows, updated_rows)
+                self.change_detector.commit(new_rows, updated_rows, unchanged)
+                new, updated = len(new_rows), len(updated_rows)
+        finally:
+            with self.stats_lock:
+                self.stats['save_seconds'] += time.perf_counter() - started
+
+        with self.stats_lock:
+            self.stats['new_listings'] += new
+            self.stats['updated_listings'] += updated
+            self.stats['unchanged_listings'] += unchanged
+            if self.stats['first_row_seconds'] is None and self.run_started_at is not None:
+                self.stats['first_row_seconds'] = round(time.perf_counter() - self.run_started_at, 2)
+
+        self.log('info', f"✓ Saved {len(rows)} rows ({new} new, {updated} updated, {unchanged} unchanged)")
+
+    def count_rejected(self, rows: List[Dict[str, Any]], error: BaseException):
+        """Rows the batch writer gave up on (dead-lettered)"""
+        with self.stats_lock:
+            self.stats['errors'] += len(rows)
+
+    def save_to_supabase(self, listings: List[ListingRecord]):
         """Save listings to Supabase in batches"""
         if not listings:
             self.log('warning', 'No listings to save')
@@ -477,68 +943,259 @@ class BizBuySellScraperV2:
 
         self.log('info', f"Saving {len(listings)} listings to Supabase...")
 
-        batch_size = 500
+        batch_size = self.open_writer()
         for i in range(0, len(listings), batch_size):
-            batch = listings[i:i+batch_size]
+            self.save_batch(listings[i:i+batch_size])
+        self.close_writer()
+
+        self.log('info', f"Save complete! New: {self.stats['new_listings']}, "
+                         f"Updated: {self.stats['updated_listings']}, Errors: {self.stats['errors']}")
+
+    def open_writer(self) -> int:
+        """
+        Set up the sink save_batch writes through (no-op if already open)
+
+        Returns:
+            Batch size for that sink
+        """
+        if self.copy_loader is None:
+            self.copy_loader = open_copy_loader(self.sink, log=self.log)
+        if self.change_detector is None and not self.copy_loader:
+            self.change_detector = ChangeDetector(self.supabase, log=self.log)
+        if self.batch_writer is None:
+            # One COPY connection can only run one load at a time
+            self.batch_writer = BatchWriter(self.write_rows, log=self.log, on_reject=self.count_rejected,
+                                            concurrency=1 if self.copy_loader else WRITE_CONCURRENCY)
+        return COPY_BATCH_SIZE if self.copy_loader else SAVE_BATCH_SIZE
+
+    def close_writer(self):
+        """Finish in-flight batches, persist the local hash index and close the COPY connection"""
+        if self.batch_writer:
+            self.batch_writer.close()
+            self.log('info', f"Batch writer: {self.batch_writer.summary()}")
+            self.batch_writer = None
+        if self.change_detector:
+            self.change_detector.save()
+        if self.copy_loader:
+            self.copy_loader.close()
+            self.copy_loader = None
+
+    def open_sink(self) -> BatchSink:
+        """Background writer that saves rows as they are queued"""
+        batch_size = self.open_writer()
+        return BatchSink(self.save_batch, batch_size=batch_size, queue_size=max(ROW_QUEUE_SIZE, batch_size))
+
+    def start_enrichment(self, sink: BatchSink, cache: DetailCache = None):
+        """
+        Send matched rows through the detail-page stage on their way to sink
+
+        No-op unless enrich_details is set. Cached rows pass straight through;
+        the rest reach the sink once their detail page is in.
+        """
+        if not self.enrich_details:
+            return
+        self.enricher = DetailEnricher(
+            sink.put,
+            headers=self.get_detail_headers(),
+            cache=cache or DetailCache(log=self.log),
+            max_in_flight=self.detail_in_flight,
+            proxy_pool=self.proxy_pool,
+            offline=self.replay,
+            log=self.log
+        )
+
+    def queue_rows(self, rows: List[ListingRecord], sink: BatchSink):
+        """Hand listing records to the sink (via the enricher when enabled)"""
+        if self.enricher:
+            rows = self.enricher.enrich(rows)
+        sink.put_many(rows)
+
+    def finish_enrichment(self):
+        """Wait for outstanding detail pages and record the cache stats"""
+        if not self.enricher:
+            return
+        self.enricher.close()
+        self.stats['detail_lookups'] = self.enricher.stats['lookups']
+        self.stats['detail_cache_hits'] = self.enricher.stats['hits'] + self.enricher.stats['revalidated']
+        self.stats['details_fetched'] = self.enricher.stats['fetched']
+        self.stats['details_enriched'] = self.enricher.stats['enriched']
+        self.log('info', f"Detail pages: {self.enricher.summary()}")
+
+    def save_stream(self, pages: Iterable[List[Dict[str, Any]]]):
+        """
+        Filter, normalize and save raw pages as they arrive
+
+        Each page's matches are queued to the sink right away; the sink
+        flushes whatever is waiting, so rows land while the crawl is running.
+        """
+        with self.open_sink() as sink:
+            self.start_enrichment(sink)
             try:
-                response = self.supabase.table('listings').upsert(
-                    batch,
-                    on_conflict='id'
-                ).execute()
-
-                # Count as new (simplified - in reality would check existing)
-                self.stats['new_listings'] += len(response.data)
-
-                self.log('info', f"✓ Saved batch {i//batch_size + 1} ({len(batch)} listings)")
-            except Exception as e:
-                self.log('error', f"✗ Failed to save batch {i//batch_size + 1}: {e}")
-                self.stats['errors'] += len(batch)
-
-        self.log('info', f"Save complete! New: {self.stats['new_listings']}, Errors: {self.stats['errors']}")
-
-    def run(self, max_pages: int = 100, workers: int = 10):
-        """Main execution flow"""
+                for page in pages:
+                    self.queue_rows(self.filter_page(page), sink)
+            finally:
+                self.finish_enrichment()
+        self.batch_writer.wait()
+        self.log('info', f"Save complete! Matched: {self.stats['matched']}, New: {self.stats['new_listings']}, "
+                         f"Updated: {self.stats['updated_listings']}, Unchanged: {self.stats['unchanged_listings']}, "
+                         f"Errors: {self.stats['errors']}")
+
+    def print_header(self, max_pages: int, workers: int, engine: str, narrow: bool, source: str = None):
         print(f"\n{Fore.CYAN}{'='*70}")
         print(f"{Fore.CYAN}BizBuySell Scraper V2 - Multi-Tenant")
         print(f"{Fore.CYAN}{'='*70}")
         print(f"{Fore.CYAN}Vertical: {self.vertical_config['name']} ({self.vertical_slug})")
         print(f"{Fore.CYAN}Max Pages: {max_pages}")
         print(f"{Fore.CYAN}Workers: {workers}")
+        print(f"{Fore.CYAN}Engine: {engine}")
+        print(f"{Fore.CYAN}Narrowed Queries: {'on' if narrow else 'off'}")
+        if self.proxy_pool:
+            print(f"{Fore.CYAN}Proxies: {len(self.proxy_pool)}")
+        if self.sink != 'postgrest':
+            print(f"{Fore.CYAN}Sink: {self.sink}")
+        if source:
+            print(f"{Fore.CYAN}Source: {source}")
         print(f"{Fore.CYAN}{'='*70}\n")
 
-        try:
-            # Create scraper run
-            self.create_scraper_run()
+    def start_run(self):
+        """Record the scraper run and start the clock for time-to-first-row"""
+        self.run_started_at = time.perf_counter()
+        self.run_at = datetime.now(timezone.utc).isoformat()
+        self.create_scraper_run()
+
+    @property
+    def crawl_complete(self) -> bool:
+        """Every page of every query was fetched (no failed pages, nothing left past max_pages)"""
+        return not (self.stats['pages_failed'] or self.stats['shards_truncated']
+                    or self.stats['queries_truncated'])
+
+    def finish_run(self, engine: str):
+        """Mark the run completed (partial if the crawl missed pages) and print the summary"""
+        self.stats['pipeline_seconds'] = round(time.perf_counter() - self.run_started_at, 2)
+        self.close_writer()
+        if self.crawl_complete:
+            self.update_scraper_run(status='completed')
+        else:
+            # Not a high-water mark: the next incremental run must search this gap again
+            self.update_scraper_run(status='partial',
+                                    error_message=f"Incomplete crawl: {self.stats['pages_failed']} pages failed, "
+                                                  f"{self.stats['shards_truncated'] + self.stats['queries_truncated']} "
+                                                  f"queries past the page cap")
+
+        print(f"\n{Fore.GREEN}{'='*70}")
+        print(f"{Fore.GREEN}SCRAPING COMPLETE")
+        print(f"{Fore.GREEN}{'='*70}")
+        print(f"{Fore.GREEN}Vertical: {self.vertical_config['name']}")
+        print(f"{Fore.GREEN}Total Found: {self.stats['total_found']}")
+        print(f"{Fore.GREEN}Matched Vertical: {self.stats['matched']}")
+        print(f"{Fore.GREEN}Filtered Out: {self.stats['filtered_out']}")
+        print(f"{Fore.GREEN}New Listings: {self.stats['new_listings']}")
+        print(f"{Fore.GREEN}Updated Listings: {self.stats['updated_listings']} "
+              f"({self.stats['unchanged_listings']} unchanged, not written)")
+        print(f"{Fore.GREEN}Errors: {self.stats['errors']}")
+        print(f"{Fore.GREEN}Pages Requested: {self.stats['pages_requested']} (saved {self.stats['requests_saved']})")
+        print(f"{Fore.GREEN}Days Listed Ago: {self.days_listed_ago}")
+        if not self.crawl_complete:
+            print(f"{Fore.YELLOW}Partial Crawl: {self.stats['pages_failed']} pages failed, "
+                  f"{self.stats['shards_truncated'] + self.stats['queries_truncated']} queries past "
+                  f"the page cap (not used as the next run's high-water mark)")
+        if self.stats['shards']:
+            print(f"{Fore.GREEN}Location Shards: {self.stats['shards']} crawled, {self.stats['shards_split']} split, "
+                  f"{self.stats['shards_truncated']} still over the page cap")
+        if engine == 'async':
+            print(f"{Fore.GREEN}Effective Rate: {self.stats['effective_rate']} pages/s "
+                  f"(in flight: final {self.stats['final_in_flight']}, peak {self.stats['peak_in_flight']})")
+            print(f"{Fore.GREEN}Retried Pages: {self.stats['pages_retried']} "
+                  f"({self.stats['retries']} retries, {self.stats['pages_failed']} gave up)")
+        print(f"{Fore.GREEN}Time To First Row: {self.stats['first_row_seconds']}s "
+              f"(total {self.stats['pipeline_seconds']}s)")
+        if self.enricher:
+            lookups = self.stats['detail_lookups']
+            rate = self.stats['detail_cache_hits'] / lookups * 100 if lookups else 0.0
+            print(f"{Fore.GREEN}Detail Pages: {self.stats['details_enriched']} enriched, "
+                  f"{self.stats['details_fetched']} fetched, cache hit rate {rate:.0f}% "
+                  f"({self.stats['detail_cache_hits']}/{lookups})")
+        print(f"{Fore.GREEN}Stage Busy Times: filter/normalize {self.stats['filter_seconds']:.2f}s, "
+              f"save {self.stats['save_seconds']:.2f}s")
+        print(f"{Fore.GREEN}{'='*70}\n")
+
+    def run(self, max_pages: int = 100, workers: int = 10, engine: str = 'async',
+            raw_listings: Optional[List[Dict[str, Any]]] = None, narrow: bool = False,
+            full_sweep: bool = False, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+            cache: bool = True, replay: bool = False, archive_raw: bool = False,
+            enrich_details: bool = False, detail_in_flight: int = DEFAULT_DETAIL_IN_FLIGHT,
+            shard_locations: bool = False, sink: str = DEFAULT_SINK):
+        """
+        Main execution flow
+
+        Pages stream through fetch -> filter/normalize -> upsert with bounded
+        queues in between, so rows are saved while the crawl is still running.
+
+        Args:
+            workers: Starting in-flight limit (async) or thread count (threads)
+            max_in_flight: Ceiling the async engine may grow to while the API
+                           stays healthy
+            full_sweep: Ignore the high-water mark and search the full 60-day
+                        window (picks up edits to older listings)
+            narrow: Search by the vertical's categories and keywords instead
+                    of downloading the whole national feed
+            shard_locations: Crawl by region/state shards in parallel so
+                             max_pages limits each shard, not the whole feed
+            raw_listings: Pre-fetched search results. When given, no token or
+                          API calls are made.
+            cache: Reuse search responses cached within the TTL
+            replay: Serve every search page from the response cache (no API
+                    calls, no token); stage timings make this an offline
+                    benchmark for filter/normalize/save
+            archive_raw: Store each listing's full search payload under
+                         custom_fields.bizbuysell.raw
+            enrich_details: Fill year_established, employees_count,
+                            inventory_value and zip_code from detail pages
+                            (cached per listing; only new/changed ones fetched)
+            detail_in_flight: Ceiling on concurrent detail page requests
+            sink: 'postgrest' (batched upserts) or 'copy' (COPY + merge over
+                  DATABASE_URL, copy_loader.py)
+        """
+        self.sink = sink
+        self.archive_raw = archive_raw
+        self.enrich_details = enrich_details
+        self.detail_in_flight = detail_in_flight
+        shared = raw_listings is not None
+        if (cache or replay) and not shared and not self.response_cache:
+            self.enable_response_cache(replay=replay)
+        source = f"pre-fetched ({len(raw_listings)} raw listings)" if shared else \
+            'replay from response cache' if self.replay else None
+        self.print_header(max_pages, workers, engine, narrow, source)
 
-            # Get auth token
-            self.get_auth_token()
-            if not self.token:
-                raise Exception("Failed to obtain authentication token")
+        try:
+            # Pick the search window before this run is recorded
+            if not shared:
+                if self.replay:
+                    self.load_replay_window()
+                else:
+                    self.plan_incremental_window(full_sweep=full_sweep)
 
-            # Scrape raw listings
-            raw_listings = self.scrape_listings(max_pages=max_pages, workers=workers)
-            self.stats['total_found'] = len(raw_listings)
+            # Create scraper run
+            self.start_run()
 
-            # Filter and normalize
-            filtered_listings = self.filter_and_normalize(raw_listings)
+            if shared:
+                pages = [raw_listings]
+            else:
+                # Get auth token
+                if not self.replay:
+                    self.get_auth_token()
+                    if not self.token:
+                        raise Exception("Failed to obtain authentication token")
 
-            # Save to database
-            self.save_to_supabase(filtered_listings)
+                queries = plan_queries([self.vertical_config]) if narrow else None
+                pages = self.iter_pages(max_pages=max_pages, workers=workers, engine=engine,
+                                        queries=queries, max_in_flight=max_in_flight,
+                                        shard_locations=shard_locations)
 
-            # Update scraper run
-            self.update_scraper_run(status='completed')
+            # Filter, normalize and save each page as it arrives
+            self.save_stream(pages)
 
-            # Print summary
-            print(f"\n{Fore.GREEN}{'='*70}")
-            print(f"{Fore.GREEN}SCRAPING COMPLETE")
-            print(f"{Fore.GREEN}{'='*70}")
-            print(f"{Fore.GREEN}Vertical: {self.vertical_config['name']}")
-            print(f"{Fore.GREEN}Total Found: {self.stats['total_found']}")
-            print(f"{Fore.GREEN}Matched Vertical: {len(filtered_listings)}")
-            print(f"{Fore.GREEN}Filtered Out: {self.stats['filtered_out']}")
-            print(f"{Fore.GREEN}New Listings: {self.stats['new_listings']}")
-            print(f"{Fore.GREEN}Errors: {self.stats['errors']}")
-            print(f"{Fore.GREEN}{'='*70}\n")
+            self.finish_run(engine)
 
         except Exception as e:
             self.log('error', f"Scraper failed: {e}")
@@ -546,6 +1203,193 @@ class BizBuySellScraperV2:
             raise
 
 
+# ============================================================================
+# SHARED CRAWL
+# ============================================================================
+
+def run_shared_crawl(verticals: List[str], max_pages: int = 100, workers: int = 10,
+                     engine: str = 'async', narrow: bool = False, full_sweep: bool = False,
+                     max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, cache: bool = True,
+                     replay: bool = False, archive_raw: bool = False, enrich_details: bool = False,
+                     detail_in_flight: int = DEFAULT_DETAIL_IN_FLIGHT,
+                     shard_locations: bool = False, sink: str = DEFAULT_SINK,
+                     page_source: Optional[Callable[..., Iterable[List[Dict[str, Any]]]]] = None
+                     ) -> Dict[str, BizBuySellScraperV2]:
+    """
+    Download BizBuySell search pages once and classify them into every vertical
+
+    The search payload does not depend on the vertical, so one crawl serves
+    all of them. Each vertical still gets its own scraper run, filter pass
+    and sink; every page is fanned out to all verticals as it arrives.
+
+    Args:
+        verticals: Verticals to classify into
+        max_pages: Maximum pages to fetch
+        workers: Starting in-flight limit
+        engine: 'async' or 'threads'
+        narrow: Run the union of all verticals' narrowed queries
+        shard_locations: Crawl by region/state shards in parallel
+        full_sweep: Ignore the high-water mark and search the full window
+        max_in_flight: Ceiling for the adaptive in-flight limit
+        cache: Reuse search responses cached within the TTL
+        replay: Serve the crawl from the response cache with no API calls
+        archive_raw: Keep each listing's full search payload in custom_fields
+        enrich_details: Fill the detail-page fields of matched listings
+        detail_in_flight: Ceiling on concurrent detail page requests per vertical
+        sink: 'postgrest' or 'copy' (each vertical gets its own COPY connection)
+        page_source: Called as page_source(crawler, **iter_pages kwargs) instead
+                     of crawler.iter_pages (QueueCoordinator.iter_pages crawls
+                     through queue workers, which fetch their own tokens)
+
+    Returns:
+        Dict mapping vertical slug to its finished scraper (for stats)
+    """
+    crawler = BizBuySellScraperV2(vertical_slug=verticals[0])
+    crawler.log('info', f"Shared crawl for verticals: {', '.join(verticals)}")
+    crawler.archive_raw = archive_raw
+    if cache or replay:
+        crawler.enable_response_cache(replay=replay)
+    if replay:
+        crawler.load_replay_window()
+    else:
+        crawler.plan_incremental_window(full_sweep=full_sweep, verticals=verticals)
+    if page_source is None:
+        page_source = BizBuySellScraperV2.iter_pages
+        if not replay:
+            crawler.get_auth_token()
+            if not crawler.token:
+                raise Exception("Failed to obtain authentication token")
+
+    scrapers = {}
+    for vertical in verticals:
+        scraper = BizBuySellScraperV2(vertical_slug=vertical)
+        scraper.days_listed_ago = crawler.days_listed_ago
+        scraper.replay = replay
+        scraper.archive_raw = archive_raw
+        scraper.enrich_details = enrich_details
+        scraper.detail_in_flight = detail_in_flight
+        scraper.sink = sink
+        scraper.print_header(max_pages, workers, engine, narrow, source='shared crawl')
+        scraper.start_run()
+        scrapers[vertical] = scraper
+
+    queries = plan_queries([VERTICAL_CONFIGS[v] for v in verticals]) if narrow else None
+    matcher = REGISTRY.matcher  # One config version for the whole crawl
+    if sink == 'postgrest':
+        change_detector = ChangeDetector(crawler.supabase, log=crawler.log)
+        for scraper in scrapers.values():
+            scraper.change_detector = change_detector
+    sinks = {vertical: scraper.open_sink() for vertical, scraper in scrapers.items()}
+    detail_cache = DetailCache(log=crawler.log) if enrich_details else None
+    for vertical, scraper in scrapers.items():
+        scraper.start_enrichment(sinks[vertical], cache=detail_cache)
+    try:
+        try:
+            for page in page_source(crawler, max_pages=max_pages, workers=workers, engine=engine,
+                                    queries=queries, max_in_flight=max_in_flight,
+                                    shard_locations=shard_locations):
+                masks = matcher.mask_many(map(BizBuySellScraperV2.search_text, page))
+                for vertical, scraper in scrapers.items():
+                    bit = matcher.bits[vertical]
+                    scraper.queue_rows(scraper.filter_page(page, [bool(mask & bit) for mask in masks]),
+                                       sinks[vertical])
+        finally:
+            for scraper in scrapers.values():
+                scraper.finish_enrichment()
+            for sink in sinks.values():
+                sink.close()
+    except Exception as e:
+        for scraper in scrapers.values():
+            scraper.log('error', f"Shared crawl failed: {e}")
+            scraper.update_scraper_run(status='failed', error_message=str(e))
+        raise
+
+    for scraper in scrapers.values():
+        for key in CRAWL_STATS:
+            scraper.stats[key] = crawler.stats[key]
+        scraper.finish_run(engine)
+
+    return scrapers
+
+
+# ============================================================================
+# BACKFILL
+# ============================================================================
+
+def run_backfill(verticals: List[str], source: str, archive_raw: bool = False,
+                 chunk_size: int = BACKFILL_CHUNK_SIZE, sink: str = DEFAULT_SINK) -> Dict[str, BizBuySellScraperV2]:
+    """
+    Re-classify and re-save an archive of raw search results
+
+    Uses the columnar path in batch_normalizer (pandas/NumPy) instead of
+    filter_page, reading the archive in chunks of chunk_size listings.
+    Listings are deduped by listNumber across the whole archive.
+
+    Args:
+        verticals: Verticals to classify into
+        source: JSON/JSON-lines file of raw listings, or a response cache directory
+        archive_raw: Keep each listing's full payload in custom_fields
+        sink: 'postgrest' or 'copy' (the COPY sink suits whole-archive loads)
+
+    Returns:
+        Dict mapping vertical slug to its finished scraper (for stats)
+    """
+    from batch_normalizer import classify_and_normalize, iter_raw_listings
+
+    scrapers = {}
+    for vertical in verticals:
+        scraper = BizBuySellScraperV2(vertical_slug=vertical)
+        scraper.backfill = True
+        scraper.archive_raw = archive_raw
+        scraper.sink = sink
+        scraper.log('info', f"Backfilling {scraper.vertical_config['name']} from {source}")
+        scraper.start_run()
+        scrapers[vertical] = scraper
+
+    log = scrapers[verticals[0]].log
+    if sink == 'postgrest':
+        change_detector = ChangeDetector(scrapers[verticals[0]].supabase, log=log)
+        for scraper in scrapers.values():
+            scraper.change_detector = change_detector
+    sinks = {vertical: scraper.open_sink() for vertical, scraper in scrapers.items()}
+    matcher = REGISTRY.matcher
+    listing_ids: set = set()
+    listings = iter_raw_listings(source)
+    try:
+        try:
+            while True:
+                raw_chunk = list(islice(listings, chunk_size))
+                if not raw_chunk:
+                    break
+                chunk = BizBuySellScraperV2.dedupe_listings(raw_chunk, listing_ids)
+                if not chunk:
+                    continue
+
+                started = time.perf_counter()
+                rows = classify_and_normalize(chunk, matcher, verticals, archive=archive_raw)
+                elapsed = time.perf_counter() - started
+                log('info', f"Backfill: classified and normalized {len(chunk)} listings in {elapsed:.2f}s")
+
+                for vertical, scraper in scrapers.items():
+                    scraper.stats['total_found'] += len(chunk)
+                    scraper.stats['matched'] += len(rows[vertical])
+                    scraper.stats['filtered_out'] += len(chunk) - len(rows[vertical])
+                    scraper.stats['filter_seconds'] += elapsed
+                    sinks[vertical].put_many(rows[vertical])
+        finally:
+            for sink in sinks.values():
+                sink.close()
+    except Exception as e:
+        for scraper in scrapers.values():
+            scraper.log('error', f"Backfill failed: {e}")
+            scraper.update_scraper_run(status='failed', error_message=str(e))
+        raise
+
+    for scraper in scrapers.values():
+        scraper.finish_run('batch')
+    return scrapers
+
+
 # ============================================================================
 # CLI INTERFACE
 # ============================================================================
@@ -557,7 +1401,7 @@ if __name__ == "__main__":
     parser.add_argument(
         '--vertical',
         type=str,
-        choices=['cleaning', 'landscape', 'hvac'],
+        choices=list(VERTICAL_CONFIGS),
         default='cleaning',
         help='Vertical to scrape (default: cleaning)'
     )
@@ -571,11 +1415,89 @@ if __name__ == "__main__":
         '--workers',
         type=int,
         default=10,
-        help='Number of parallel workers (default: 10)'
+        help='Starting requests in flight (async) or worker threads (threads) (default: 10)'
+    )
+    parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help=f'Ceiling the async engine may grow to while the API stays healthy (default: {DEFAULT_MAX_IN_FLIGHT})'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always hit the API instead of reusing search responses cached within the TTL'
+    )
+    parser.add_argument(
+        '--replay',
+        action='store_true',
+        help='Serve the whole run from the response cache with no BizBuySell API calls'
+    )
+    parser.add_argument(
+        '--archive-raw',
+        action='store_true',
+        help="Keep each listing's full search payload in custom_fields.bizbuysell.raw"
+    )
+    parser.add_argument(
+        '--enrich-details',
+        action='store_true',
+        help='Fetch detail pages of matched listings for year established, employees, inventory and zip'
+    )
+    parser.add_argument(
+        '--detail-in-flight',
+        type=int,
+        default=DEFAULT_DETAIL_IN_FLIGHT,
+        help=f'Concurrent detail page requests with --enrich-details (default: {DEFAULT_DETAIL_IN_FLIGHT})'
+    )
+    parser.add_argument(
+        '--engine',
+        type=str,
+        choices=FETCH_ENGINES,
+        default='async',
+        help='Fetch engine: async event loop or legacy thread pool (default: async)'
+    )
+    parser.add_argument(
+        '--narrow',
+        action='store_true',
+        help='Search by vertical categories/keywords instead of the full national feed'
+    )
+    parser.add_argument(
+        '--shard-locations',
+        action='store_true',
+        help='Crawl by region/state shards in parallel; --max-pages then caps each shard'
+    )
+    parser.add_argument(
+        '--full-sweep',
+        action='store_true',
+        help=f'Search the full {FULL_SWEEP_DAYS}-day window instead of only since the last completed run'
+    )
+    parser.add_argument(
+        '--sink',
+        type=str,
+        choices=LISTINGS_SINKS,
+        default=DEFAULT_SINK,
+        help=f'How listings are written: PostgREST upserts or COPY + merge over DATABASE_URL '
+             f'(default: {DEFAULT_SINK}, env LISTINGS_SINK)'
+    )
+
+    parser.add_argument(
+        '--backfill',
+        type=str,
+        metavar='PATH',
+        help='Re-classify and save an archive of raw listings (JSON/JSON-lines file or response cache dir) '
+             'with the vectorized batch path instead of crawling'
     )
 
     args = parser.parse_args()
 
+    if args.backfill:
+        run_backfill([args.vertical], args.backfill, archive_raw=args.archive_raw, sink=args.sink)
+        raise SystemExit(0)
+
     # Run scraper
     scraper = BizBuySellScraperV2(vertical_slug=args.vertical)
-    scraper.run(max_pages=args.max_pages, workers=args.workers)
+    scraper.run(max_pages=args.max_pages, workers=args.workers, engine=args.engine, narrow=args.narrow,
+                full_sweep=args.full_sweep, max_in_flight=args.max_in_flight,
+                cache=not args.no_cache, replay=args.replay, archive_raw=args.archive_raw,
+                enrich_details=args.enrich_details, detail_in_flight=args.detail_in_flight,
+                shard_locations=args.shard_locations, sink=args.sink)
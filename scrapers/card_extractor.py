@@ -0,0 +1,162 @@
+"""
+Card Extractor
+Field extraction for broker listing cards
+- Price, revenue, cash flow, location and business type come from
+  precompiled patterns run on a card text lowercased once; results are
+  the same as SmartExtractor's original per-field regexes, except that
+  amounts with a unit ($1.2M, 1.2 million, 450K) are read whole
+- Label patterns are searched in priority order and stop at the first
+  usable amount, so a typical card costs one search per field
+- card_nodes() finds a card's link and title candidates in one walk of
+  its subtree instead of one BeautifulSoup find() per tag
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Labels in priority order; a label's first amount must clear the minimum
+REVENUE_LABELS = ('revenue', 'gross sales', 'annual sales', 'sales')
+CASHFLOW_LABELS = ('cash flow', 'net income', 'ebitda', 'sde', 'owner benefit')
+MIN_REVENUE = 10000
+MIN_CASHFLOW = 1000
+
+# Category -> keywords (case-insensitive substrings); the first category with a hit wins
+BUSINESS_TYPES = {
+    'restaurant': ('restaurant', 'cafe', 'diner', 'bistro'),
+    'bar': ('bar', 'tavern', 'pub', 'lounge'),
+    'retail': ('store', 'shop', 'boutique'),
+    'service': ('salon', 'spa', 'cleaning'),
+}
+
+# Unit multipliers for amounts like 450K, $1.2M and 1.2 million
+MONEY_UNITS = {'k': 1e3, 'm': 1e6, 'mm': 1e6, 'mil': 1e6, 'million': 1e6}
+
+_UNIT = r'(?:\.\d+)?\s*(?:million|mil|mm|m|k)\b'
+_MONEY_UNIT = re.compile(r'\s*(million|mil|mm|m|k)$')
+
+# A label, then the amount after it (first occurrence that has one)
+_REVENUE_PATTERNS = [re.compile(rf"{re.escape(label)}[:\s]*\$?([\d,]+(?:{_UNIT})?)", re.I)
+                     for label in REVENUE_LABELS]
+_CASHFLOW_PATTERNS = [re.compile(rf"{re.escape(label)}[:\s]*\$?([\d,]+(?:{_UNIT})?)", re.I)
+                      for label in CASHFLOW_LABELS]
+
+_PRICE = re.compile(rf'\$[\d,]+(?:{_UNIT}|\.\d{{2}})?', re.I)
+_CITY_STATE = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*([A-Z]{2})\b')
+_STATE = re.compile(r'\b([A-Z]{2})\b')
+_SENTENCE = re.compile(r'[.!?]\s+')
+
+TITLE_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'b')
+_TITLE_TAG_SET = frozenset(TITLE_TAGS)
+
+
+def parse_money_value(text: Any) -> Optional[float]:
+    """Parse $123,456, 123456, 450K, $1.2M or 1.2 million into float"""
+    if not text:
+        return None
+    try:
+        cleaned = str(text).replace('$', '').replace(',', '').strip().lower()
+        unit = _MONEY_UNIT.search(cleaned)
+        if unit:
+            return float(cleaned[:unit.start()]) * MONEY_UNITS[unit.group(1)]
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def extract_city_state(location: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Extract city and state from location string"""
+    if not location:
+        return None, None
+    m = _CITY_STATE.search(location)
+    if m:
+        return m.group(1).strip(), m.group(2).strip()
+    state_match = _STATE.search(location)
+    if state_match:
+        return None, state_match.group(1)
+    return None, None
+
+
+def extract_card_fields(text: str) -> Dict[str, Any]:
+    """
+    Price, financials, location and business type from a card's text
+
+    Price is the largest dollar amount on the card. Revenue and cash flow
+    come from the first label, in REVENUE_LABELS / CASHFLOW_LABELS order,
+    whose first amount clears the minimum. Location is the first "City, ST".
+    """
+    lowered = text.lower()
+    price_text = _largest_amount(text)
+    location_match = _CITY_STATE.search(text)
+    city, state = location_match.groups() if location_match else (None, None)
+
+    return {
+        'price': parse_money_value(price_text),
+        'price_text': price_text,
+        'revenue': _first_labeled(lowered, _REVENUE_PATTERNS, MIN_REVENUE),
+        'cash_flow': _first_labeled(lowered, _CASHFLOW_PATTERNS, MIN_CASHFLOW),
+        'location': f"{city}, {state}" if city else None,
+        'city': city,
+        'state': state,
+        'business_type': next((category for category, keywords in BUSINESS_TYPES.items()
+                               if any(keyword in lowered for keyword in keywords)), None),
+    }
+
+
+def _largest_amount(text: str) -> Optional[str]:
+    """The dollar amount with the largest value (ties: the larger string)"""
+    amounts = []
+    for match in _PRICE.findall(text):
+        value = parse_money_value(match)
+        if value is not None:  # Not '$,'
+            amounts.append((value, match))
+    return max(amounts)[1] if amounts else None
+
+
+def _first_labeled(lowered: str, patterns: List[re.Pattern], minimum: float) -> Optional[float]:
+    for pattern in patterns:
+        match = pattern.search(lowered)
+        if match:
+            value = parse_money_value(match.group(1))
+            if value and value > minimum:
+                return value
+    return None
+
+
+# ============================================================================
+# CARD NODES
+# ============================================================================
+
+def card_nodes(element) -> Tuple[Optional[Any], Dict[str, Any]]:
+    """
+    One walk of a BeautifulSoup element's subtree
+
+    Returns:
+        (first <a href> inside it, first descendant per TITLE_TAGS name and 'a')
+    """
+    link = None
+    first: Dict[str, Any] = {}
+    for node in element.descendants:
+        name = node.name
+        if name is None:
+            continue
+        if name == 'a':
+            if link is None and node.get('href') is not None:
+                link = node
+            first.setdefault('a', node)
+        elif name in _TITLE_TAG_SET:
+            first.setdefault(name, node)
+    return link, first
+
+
+def pick_title(first: Dict[str, Any], text: str) -> str:
+    """Listing title: first heading/bold tag, else the link, else a sentence of the text"""
+    for tag in TITLE_TAGS + ('a',):
+        el = first.get(tag)
+        if el is not None:
+            t = el.get_text(strip=True)
+            if 10 < len(t) < 200:
+                return t
+    for s in _SENTENCE.split(text):
+        if 10 < len(s) < 200:
+            return s.strip()
+    return text[:100]
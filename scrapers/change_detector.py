@@ -0,0 +1,260 @@
+"""
+Change Detector
+Content-hash change detection in front of the listings upserts
+- content_hash() hashes a serialized row's material columns: everything
+  except run bookkeeping (timestamps, scraper_run_id)
+- Known hashes come from the listings.content_hash column
+  (database/migration_add_content_hash.sql), read in chunks per batch. Before
+  that migration is applied they come from a local hash index instead
+  (one JSON file, listing id -> hash)
+- split() sorts a batch into new, updated and unchanged rows. Only new and
+  updated rows are written; unchanged rows cost no write and fire no triggers
+- Updated rows are written without created_at, so a listing keeps its
+  first-seen time
+- Rows are upserted in groups with the same columns: a bulk upsert sets a
+  column some rows leave out to NULL for them, and a left-out column must
+  keep its stored value
+- The local index learns a hash only after its write succeeded; save()
+  merges this process's hashes into the file under a lock, so runs that
+  share the file don't drop each other's entries
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional - standard json gives the same bytes, just slower
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # Windows - index still works, just without cross-process locking
+    fcntl = None
+
+DEFAULT_HASH_INDEX = os.getenv(
+    'LISTING_HASH_INDEX',
+    os.path.join(tempfile.gettempdir(), 'listing_hashes.json')
+)
+
+# Columns that change on every run without the listing changing
+VOLATILE_COLUMNS = frozenset({'created_at', 'updated_at', 'scraped_at', 'scraper_run_id', 'content_hash'})
+
+# Columns an update must not overwrite
+INSERT_ONLY_COLUMNS = ('created_at',)
+
+# Ids per content_hash lookup (keeps the PostgREST query string short)
+LOOKUP_CHUNK_SIZE = 100
+
+
+def canonical_json(data: Any) -> bytes:
+    """
+    Compact UTF-8 JSON with sorted keys
+
+    orjson and json produce the same bytes for listing rows (strings,
+    finite floats, ints, bools, lists, dicts), so hashes don't depend on
+    which one is installed. Other types go through str().
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=str,
+                            option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str).encode()
+
+
+def content_hash(row: Dict[str, Any]) -> str:
+    """Stable hash of a row's material columns (key order and run timestamps don't matter)"""
+    material = {key: value for key, value in row.items() if key not in VOLATILE_COLUMNS}
+    return hashlib.blake2b(canonical_json(material), digest_size=16).hexdigest()
+
+
+def group_by_columns(rows: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Rows grouped by their key set, in first-seen order (usually a single group)"""
+    groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(frozenset(row), []).append(row)
+    return list(groups.values())
+
+
+def upsert_changes(supabase, new_rows: List[Dict[str, Any]], updated_rows: List[Dict[str, Any]],
+                   table: str = 'listings'):
+    """
+    Write the output of ChangeDetector.split()
+
+    Both groups are upserts, so a row the detector wrongly thinks is new
+    (a stale local index) still lands. Updated rows leave out
+    INSERT_ONLY_COLUMNS. Rows with different columns go in separate
+    requests (group_by_columns).
+    """
+    for group in group_by_columns(new_rows):
+        supabase.table(table).upsert(group, on_conflict='id').execute()
+    updated_rows = [{key: value for key, value in row.items() if key not in INSERT_ONLY_COLUMNS}
+                    for row in updated_rows]
+    for group in group_by_columns(updated_rows):
+        supabase.table(table).upsert(group, on_conflict='id').execute()
+
+
+# ============================================================================
+# CHANGE DETECTOR
+# ============================================================================
+
+class ChangeDetector:
+    """Known content hashes per listing id, from the content_hash column or a local index"""
+
+    def __init__(self, supabase=None, table: str = 'listings', index_path: str = DEFAULT_HASH_INDEX,
+                 log: Callable[[str, str], None] = None):
+        """
+        Initialize detector
+
+        Args:
+            supabase: Client; probed once for the content_hash column
+                      (None = local index only)
+            table: Listings table
+            index_path: JSON file for the local index (used without the column)
+            log: Optional callable(level, message)
+        """
+        self.supabase = supabase
+        self.table = table
+        self.index_path = index_path
+        self.log = log or (lambda level, message: None)
+        self._lock = threading.Lock()
+        self.stats = {'new': 0, 'updated': 0, 'unchanged': 0, 'lookups': 0}
+
+        self.use_column = supabase is not None and self._probe_column()
+        self.index: Dict[str, str] = {} if self.use_column else self._load()
+        self._learned: Dict[str, str] = {}  # Hashes not yet merged into the file
+
+    @property
+    def mode(self) -> str:
+        return 'content_hash column' if self.use_column else 'local hash index'
+
+    def _probe_column(self) -> bool:
+        try:
+            self.supabase.table(self.table).select('id, content_hash').limit(1).execute()
+            return True
+        except Exception as e:
+            self.log('warning', f"listings.content_hash not readable ({e}); "
+                                f"using the local hash index {self.index_path}")
+            return False
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def known_hashes(self, ids: List[str]) -> Dict[str, str]:
+        """
+        Stored hash per id
+
+        Ids that were never written are absent; rows written before the
+        column existed map to None. So do the ids of a failed lookup: their
+        rows are written again as updates (not counted as new, created_at
+        left alone) rather than skipped.
+        """
+        if not self.use_column:
+            with self._lock:
+                return {lid: self.index[lid] for lid in ids if lid in self.index}
+
+        known = {}
+        for i in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+            try:
+                response = self.supabase.table(self.table).select('id, content_hash') \
+                    .in_('id', ids[i:i+LOOKUP_CHUNK_SIZE]).execute()
+            except Exception as e:
+                chunk = ids[i:i+LOOKUP_CHUNK_SIZE]
+                self.log('warning', f"content_hash lookup failed, rewriting {len(chunk)} rows as updates: {e}")
+                known.update(dict.fromkeys(chunk))
+                continue
+            with self._lock:
+                self.stats['lookups'] += 1
+            for row in response.data or []:
+                known[row['id']] = row.get('content_hash')
+        return known
+
+    def split(self, rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+        """
+        Sort serialized rows by what a write would do
+
+        In column mode each changed row gets its content_hash column set.
+
+        Returns:
+            (new rows, updated rows, number of unchanged rows)
+        """
+        hashes = [content_hash(row) for row in rows]
+        known = self.known_hashes([row['id'] for row in rows])
+
+        new_rows, updated_rows = [], []
+        for row, digest in zip(rows, hashes):
+            if row['id'] not in known:
+                target = new_rows
+            elif known[row['id']] != digest:
+                target = updated_rows
+            else:
+                continue
+            if self.use_column:
+                row['content_hash'] = digest
+            target.append(row)
+
+        return new_rows, updated_rows, len(rows) - len(new_rows) - len(updated_rows)
+
+    def commit(self, new_rows: List[Dict[str, Any]], updated_rows: List[Dict[str, Any]], unchanged: int = 0):
+        """
+        A split() batch was written - count it and remember its hashes (the column already holds them)
+
+        Counting here rather than in split() keeps the stats right when a
+        failed batch is split again and retried.
+        """
+        with self._lock:
+            self.stats['new'] += len(new_rows)
+            self.stats['updated'] += len(updated_rows)
+            self.stats['unchanged'] += unchanged
+        if self.use_column or not (new_rows or updated_rows):
+            return
+        hashes = {row['id']: content_hash(row) for row in new_rows + updated_rows}
+        with self._lock:
+            self.index.update(hashes)
+            self._learned.update(hashes)
+
+    def save(self):
+        """
+        Merge the hashes learned since the last save into the local index file
+
+        The file is re-read and rewritten under an exclusive lock on
+        <index_path>.lock, so concurrent runs sharing it keep each other's
+        entries. No-op in column mode or when nothing was learned.
+        """
+        with self._lock:
+            learned, self._learned = self._learned, {}
+        if not learned:
+            return
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+            with open(f"{self.index_path}.lock", 'a+') as lock:
+                if fcntl:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                index = self._load()
+                index.update(learned)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(index, f, separators=(',', ':'))
+                os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            with self._lock:
+                self._learned = {**learned, **self._learned}  # Try again on the next save
+            self.log('warning', f'Could not write listing hash index: {e}')
+            return
+        with self._lock:
+            self.index = {**index, **self.index}
+
+    def summary(self) -> str:
+        written = self.stats['new'] + self.stats['updated']
+        total = written + self.stats['unchanged']
+        skipped = self.stats['unchanged'] / total * 100 if total else 0.0
+        return (f"{self.stats['new']} new, {self.stats['updated']} updated, "
+                f"{self.stats['unchanged']} unchanged ({skipped:.0f}% of writes skipped, {self.mode})")
@@ -0,0 +1,219 @@
+"""
+Copy Loader
+Bulk listings writer over a direct Postgres connection (DATABASE_URL)
+- Rows are streamed with COPY into UNLOGGED staging tables and merged
+  into listings with one INSERT ... ON CONFLICT (id) DO UPDATE, instead of
+  one PostgREST JSON request per 50-500 rows
+- Two steps per load: the (id, content_hash) pairs are COPYed first and
+  joined against listings; only rows that are new or whose hash
+  (change_detector.py) differs are serialized and COPYed in full
+- Full rows are staged as one JSON document each (orjson when installed)
+  and expanded to typed columns by json_populate_record in the merge, so
+  Python does one serialization per row instead of adapting every value
+- The staging table is created and dropped inside the load's transaction,
+  so a failed or killed load leaves nothing behind and concurrent loaders
+  never share one
+- Selected with LISTINGS_SINK=copy (BizBuySell: --sink copy); needs psycopg 3
+  and the content_hash column (database/migration_add_content_hash.sql)
+"""
+
+import json
+import os
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from change_detector import INSERT_ONLY_COLUMNS, content_hash, group_by_columns, orjson
+
+try:
+    import psycopg
+    from psycopg import sql
+except ImportError:  # Only needed for LISTINGS_SINK=copy
+    psycopg = None
+
+# How listings are written: 'postgrest' (supabase-py upserts) or 'copy' (CopyLoader)
+LISTINGS_SINKS = ['postgrest', 'copy']
+DEFAULT_SINK = os.getenv('LISTINGS_SINK', 'postgrest')
+
+# Largest batch per COPY + merge (also the row queue size in front of it)
+COPY_BATCH_SIZE = int(os.getenv('LISTINGS_COPY_BATCH_SIZE', '20000'))
+
+# Staged documents per COPY write
+_WRITE_CHUNK = 1000
+
+# COPY text format escapes (for ids; hashes are hex)
+_TEXT_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+# CSV with quote/delimiter bytes that JSON text always escapes, so a
+# document passes through COPY untouched (text format would unescape '\\')
+_COPY_OPTIONS = "FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02'"
+
+
+class CopyLoader:
+    """COPY + merge writer for one listings table (one connection; not shared across threads)"""
+
+    def __init__(self, dsn: Optional[str] = None, table: str = 'listings',
+                 log: Callable[[str, str], None] = None):
+        """
+        Connect and read the table's columns
+
+        Args:
+            dsn: Postgres connection string (default: DATABASE_URL; on Supabase
+                 the direct or session pooler URI, COPY needs a real session)
+            table: Target table (unqualified name on the search_path)
+            log: Optional callable(level, message)
+
+        Raises:
+            ImportError: psycopg is not installed
+            ValueError: No dsn, no such table, or no content_hash column
+        """
+        if psycopg is None:
+            raise ImportError("The COPY sink needs psycopg 3: pip install 'psycopg[binary]'")
+        dsn = dsn or os.getenv('DATABASE_URL')
+        if not dsn:
+            raise ValueError("DATABASE_URL must be set for the COPY sink")
+
+        self.table = table
+        self.log = log or (lambda level, message: None)
+        self.conn = psycopg.connect(dsn, autocommit=True)
+        self.stats = {'loads': 0, 'rows': 0, 'new': 0, 'updated': 0, 'unchanged': 0}
+        self._ignored_columns: set = set()
+
+        self.column_types = dict(self.conn.execute(
+            "SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped",
+            (table,)
+        ).fetchall())
+        if not self.column_types:
+            self.conn.close()
+            raise ValueError(f"Table {table} not found")
+        if 'content_hash' not in self.column_types:
+            self.conn.close()
+            raise ValueError(f"{table}.content_hash is missing - run database/migration_add_content_hash.sql")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _columns(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """The rows' keys (one group_by_columns group) the table has, plus content_hash"""
+        keys = list(rows[0])
+        new_ignored = {key for key in keys if key not in self.column_types} - self._ignored_columns
+        if new_ignored:
+            self._ignored_columns |= new_ignored
+            self.log('warning', f"COPY sink: {self.table} has no column(s) {', '.join(sorted(new_ignored))}; not loaded")
+        return [key for key in keys if key in self.column_types and key != 'content_hash'] + ['content_hash']
+
+    def load(self, rows: List[Dict[str, Any]]) -> Tuple[int, int, int]:
+        """
+        Merge serialized rows into the table through COPY, in one transaction
+
+        Rows are merged in groups with the same columns, so a column a row
+        leaves out keeps its stored value (or its default on insert). When an
+        id repeats, the last row wins. Updates leave INSERT_ONLY_COLUMNS alone.
+
+        Returns:
+            (new, updated, unchanged) row counts
+        """
+        unique = {row['id']: row for row in rows}
+        if not unique:
+            return 0, 0, 0
+        hashes = {lid: content_hash(row) for lid, row in unique.items()}
+
+        target = sql.Identifier(self.table)
+        name = f"{self.table}_staging_{uuid.uuid4().hex[:12]}"
+        keys, staging = sql.Identifier(f"{name}_keys"), sql.Identifier(name)
+
+        new = updated = 0
+        with self.conn.transaction(), self.conn.cursor() as cur:
+            # Step 1: which ids are new or changed
+            cur.execute(sql.SQL('CREATE UNLOGGED TABLE {} AS SELECT id, content_hash FROM {} WITH NO DATA')
+                        .format(keys, target))
+            with cur.copy(sql.SQL('COPY {} (id, content_hash) FROM STDIN').format(keys)) as copy:
+                copy.write(''.join(f"{lid.translate(_TEXT_ESCAPES)}\t{digest}\n"
+                                   for lid, digest in hashes.items()).encode())
+            cur.execute(sql.SQL(
+                'SELECT k.id FROM {} k LEFT JOIN {} t ON t.id = k.id '
+                'WHERE t.content_hash IS DISTINCT FROM k.content_hash'
+            ).format(keys, target))
+            changed = [lid for (lid,) in cur.fetchall()]
+            cur.execute(sql.SQL('DROP TABLE {}').format(keys))
+
+            # Step 2: full rows for those ids only
+            for group in group_by_columns([unique[lid] for lid in changed]):
+                merged = self._merge(cur, group, [hashes[row['id']] for row in group],
+                                     target, staging, self._columns(group))
+                new += merged[0]
+                updated += merged[1]
+
+        unchanged = len(rows) - new - updated
+        self.stats['loads'] += 1
+        self.stats['rows'] += len(rows)
+        self.stats['new'] += new
+        self.stats['updated'] += updated
+        self.stats['unchanged'] += unchanged
+        return new, updated, unchanged
+
+    def _merge(self, cur, rows: List[Dict[str, Any]], hashes: List[str], target, staging,
+               columns: List[str]) -> Tuple[int, int]:
+        """COPY full rows as JSON documents and upsert them; returns (new, updated)"""
+        column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+        record_columns = sql.SQL(', ').join(sql.SQL('r.{}').format(sql.Identifier(column)) for column in columns)
+        updates = sql.SQL(', ').join(
+            sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(column))
+            for column in columns if column != 'id' and column not in INSERT_ONLY_COLUMNS
+        )
+
+        cur.execute(sql.SQL('CREATE UNLOGGED TABLE {} (doc json)').format(staging))
+        with cur.copy(sql.SQL('COPY {} (doc) FROM STDIN WITH ({})')
+                      .format(staging, sql.SQL(_COPY_OPTIONS))) as copy:
+            for i in range(0, len(rows), _WRITE_CHUNK):
+                copy.write(b'\n'.join(
+                    _dumps({**row, 'content_hash': digest})
+                    for row, digest in zip(rows[i:i+_WRITE_CHUNK], hashes[i:i+_WRITE_CHUNK])
+                ) + b'\n')
+        # The WHERE skips rows another writer brought up to date since step 1
+        cur.execute(sql.SQL("""
+            WITH merged AS (
+                INSERT INTO {target} ({columns})
+                SELECT {record_columns}
+                FROM {staging} s, json_populate_record(NULL::{target}, s.doc) r
+                ON CONFLICT (id) DO UPDATE SET {updates}
+                WHERE {target}.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged
+        """).format(target=target, columns=column_list, record_columns=record_columns,
+                     staging=staging, updates=updates))
+        new, updated = cur.fetchone()
+        cur.execute(sql.SQL('DROP TABLE {}').format(staging))
+        return new, updated
+
+    def load_all(self, rows: List[Dict[str, Any]]) -> Tuple[int, int, int]:
+        """load() in COPY_BATCH_SIZE chunks; summed counts"""
+        totals = [0, 0, 0]
+        for i in range(0, len(rows), COPY_BATCH_SIZE):
+            for j, count in enumerate(self.load(rows[i:i+COPY_BATCH_SIZE])):
+                totals[j] += count
+        return totals[0], totals[1], totals[2]
+
+    def summary(self) -> str:
+        return (f"{self.stats['new']} new, {self.stats['updated']} updated, "
+                f"{self.stats['unchanged']} unchanged in {self.stats['loads']} COPY load(s)")
+
+
+def _dumps(row: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(row, default=str)
+    return json.dumps(row, separators=(',', ':'), ensure_ascii=False, default=str).encode()
+
+
+def open_copy_loader(sink: str = DEFAULT_SINK, log: Callable[[str, str], None] = None) -> Optional[CopyLoader]:
+    """CopyLoader when sink is 'copy', else None (write through PostgREST)"""
+    if sink not in LISTINGS_SINKS:
+        raise ValueError(f"Invalid listings sink: {sink}. Must be one of: {LISTINGS_SINKS}")
+    return CopyLoader(log=log) if sink == 'copy' else None
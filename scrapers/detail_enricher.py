@@ -0,0 +1,405 @@
+"""
+Detail Enricher
+Optional BizBuySell detail-page stage for matched listings
+- Fills year_established, employees_count, inventory_value and zip_code
+- Parsed fields cached per listNumber with the page's Last-Modified/ETag
+- Unchanged listings are served from the cache; changed or aged entries are
+  revalidated with a conditional GET; only new listings cost a full page
+- Runs on its own event loop thread, so the search crawl never waits on it
+- Rows without details (no cache entry, fetch failed or skipped) are saved
+  without the detail columns, so stored values are not overwritten
+"""
+
+import asyncio
+import hashlib
+import html
+import json
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from fetch_engine import AsyncFetchEngine, backoff_delay, is_throttle_status
+from listing_record import ListingRecord
+from proxy_pool import ProxyPool, as_requests_proxies
+
+
+DEFAULT_DETAIL_CACHE = os.getenv(
+    'BBS_DETAIL_CACHE',
+    os.path.join(tempfile.gettempdir(), 'bizbuysell_details.json')
+)
+
+# Entries older than this are revalidated even if the search result is unchanged
+DETAIL_MAX_AGE = int(os.getenv('BBS_DETAIL_MAX_AGE_DAYS', '30')) * 86400
+
+# Detail pages in flight; kept low, these are full HTML pages
+DEFAULT_DETAIL_IN_FLIGHT = 8
+
+# Attempts per detail page after the first
+DETAIL_RETRIES = 2
+
+# Rows waiting for a detail fetch; past this they are saved without enrichment
+DETAIL_QUEUE_SIZE = 1000
+
+# Override to point at a stand-in server (see fake_bizbuysell_api.py)
+DETAIL_BASE_URL = os.getenv('BIZBUYSELL_DETAIL_URL')
+
+# Record fields (and columns) filled from the detail page
+DETAIL_FIELDS = ('year_established', 'employees_count', 'inventory_value', 'zip_code')
+
+# Record fields whose change means the detail page probably changed too
+FINGERPRINT_FIELDS = ('title', 'description', 'asking_price', 'revenue', 'cash_flow', 'ebitda')
+
+_DONE = object()
+
+
+# ============================================================================
+# DETAIL PAGE PARSING
+# ============================================================================
+
+_TAGS = re.compile(r'<[^>]+>')
+_SPACE = re.compile(r'\s+')
+_ESTABLISHED = re.compile(r'Established:\s*(\d{4})\b', re.IGNORECASE)
+_EMPLOYEES = re.compile(r'Employees:\s*(\d[\d,]*)', re.IGNORECASE)
+_INVENTORY = re.compile(r'Inventory:\s*\$\s*(\d[\d,]*(?:\.\d+)?)', re.IGNORECASE)
+_POSTAL_CODE = re.compile(r'"postalCode"\s*:\s*"(\d{5})')
+_LOCATION_ZIP = re.compile(r'Location:\s*[^:]*?\b[A-Z]{2}\s+(\d{5})(?:-\d{4})?\b')
+
+# Business listings end in /<listNumber>/; franchise ads and the like have no detail page
+_LISTING_PATH = re.compile(r'/\d+/?$')
+
+
+def parse_detail_page(page: str) -> Dict[str, Any]:
+    """
+    Pull the DETAIL_FIELDS out of a listing detail page
+
+    Returns:
+        Dict with every DETAIL_FIELDS key (None where the page has no value)
+    """
+    text = _SPACE.sub(' ', html.unescape(_TAGS.sub(' ', page)))
+
+    established = _ESTABLISHED.search(text)
+    employees = _EMPLOYEES.search(text)
+    inventory = _INVENTORY.search(text)
+    zip_code = _POSTAL_CODE.search(page) or _LOCATION_ZIP.search(text)
+
+    return {
+        'year_established': int(established.group(1)) if established else None,
+        'employees_count': int(employees.group(1).replace(',', '')) if employees else None,
+        'inventory_value': float(inventory.group(1).replace(',', '')) if inventory else None,
+        'zip_code': zip_code.group(1) if zip_code else None,
+    }
+
+
+def listing_fingerprint(row: ListingRecord) -> str:
+    """Hash of the search-side fields of a listing record"""
+    basis = [getattr(row, field) for field in FINGERPRINT_FIELDS] + [row.recently_updated]
+    return hashlib.sha256(json.dumps(basis, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def has_detail_page(listing_url: Optional[str]) -> bool:
+    return bool(listing_url) and bool(_LISTING_PATH.search(urlsplit(listing_url).path))
+
+
+def detail_url(listing_url: str) -> str:
+    """Listing URL, re-pointed at BIZBUYSELL_DETAIL_URL when set"""
+    if not DETAIL_BASE_URL:
+        return listing_url
+    parts = urlsplit(listing_url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    return DETAIL_BASE_URL.rstrip('/') + path
+
+
+# ============================================================================
+# DETAIL CACHE
+# ============================================================================
+
+class DetailCache:
+    """Parsed detail fields per listNumber, persisted as one JSON file"""
+
+    def __init__(self, path: str = DEFAULT_DETAIL_CACHE, max_age: int = DETAIL_MAX_AGE, log=None):
+        """
+        Initialize cache
+
+        Args:
+            path: JSON file holding the entries
+            max_age: Seconds before an unchanged entry is revalidated
+            log: Optional callable(level, message)
+        """
+        self.path = path
+        self.max_age = max_age
+        self.log = log or (lambda level, message: None)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, list_number: str, fingerprint: str):
+        """
+        Cached entry for a listing
+
+        Returns:
+            (entry or None, fresh). fresh means the entry can be used without
+            a request; a stale entry still supplies validators for a
+            conditional GET.
+        """
+        with self._lock:
+            entry = self.entries.get(list_number)
+        if not entry:
+            return None, False
+        fresh = entry.get('fingerprint') == fingerprint and \
+            time.time() - entry.get('checked_at', 0) < self.max_age
+        return entry, fresh
+
+    def store(self, list_number: str, fingerprint: str, fields: Dict[str, Any],
+              last_modified: Optional[str] = None, etag: Optional[str] = None):
+        with self._lock:
+            self.entries[list_number] = {
+                'fingerprint': fingerprint,
+                'fields': fields,
+                'last_modified': last_modified,
+                'etag': etag,
+                'checked_at': time.time(),
+            }
+
+    def revalidated(self, list_number: str, fingerprint: str):
+        """Server answered 304 - keep the fields, adopt the new fingerprint"""
+        with self._lock:
+            entry = self.entries.get(list_number)
+            if entry:
+                entry['fingerprint'] = fingerprint
+                entry['checked_at'] = time.time()
+
+    def save(self):
+        """Write the cache atomically"""
+        with self._lock:
+            data = json.dumps(self.entries, separators=(',', ':'))
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.log('warning', f'Could not write detail cache: {e}')
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+# ============================================================================
+# DETAIL ENRICHER
+# ============================================================================
+
+class DetailEnricher:
+    """
+    Enrich normalized rows from their detail pages without holding up the crawl
+
+    enrich() returns the rows that are ready now (cache hits, filled in
+    place); rows that need a request are fetched in the background and handed
+    to emit() once done, enriched or not. close() waits for those.
+    """
+
+    def __init__(self, emit: Callable[[ListingRecord], None], headers: Dict[str, str] = None,
+                 cache: DetailCache = None, max_in_flight: int = DEFAULT_DETAIL_IN_FLIGHT,
+                 timeout: float = 30.0, proxy_pool: Optional[ProxyPool] = None, offline: bool = False,
+                 log=None):
+        """
+        Initialize enricher and start its fetch thread
+
+        Args:
+            emit: Receives each row that went through a detail fetch (e.g. sink.put;
+                  called off the event loop, so it may block)
+            headers: Browser headers for detail page requests
+            cache: Shared cache (default: new one at BBS_DETAIL_CACHE)
+            max_in_flight: Ceiling on concurrent detail requests
+            timeout: Per-request timeout in seconds
+            proxy_pool: Optional pool to send requests through
+            offline: Only use the cache, stale entries included (replay runs)
+            log: Optional callable(level, message)
+        """
+        self.emit = emit
+        self.headers = dict(headers or {})
+        self.log = log or (lambda level, message: None)
+        self.cache = cache or DetailCache(log=self.log)
+        self.max_in_flight = max(1, max_in_flight)
+        self.timeout = timeout
+        self.proxy_pool = proxy_pool
+        self.offline = offline
+
+        self.stats = {'lookups': 0, 'hits': 0, 'revalidated': 0, 'fetched': 0,
+                      'failed': 0, 'skipped': 0, 'enriched': 0}
+        self._stats_lock = threading.Lock()
+        self._pending: queue.Queue = queue.Queue(maxsize=DETAIL_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name='detail-enricher', daemon=True)
+        self._thread.start()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def enrich(self, rows: List[ListingRecord]) -> List[ListingRecord]:
+        """
+        Apply cached details and queue the rest for fetching
+
+        Never blocks: when the fetch queue is full a row is returned
+        unenriched (counted as skipped) and picked up on a later run.
+
+        Returns:
+            Rows to save now
+        """
+        ready = []
+        for row in rows:
+            list_number = row.list_number or ''
+            if not list_number or not has_detail_page(row.listing_url):
+                ready.append(row)
+                continue
+
+            self._count('lookups')
+            fingerprint = listing_fingerprint(row)
+            entry, fresh = self.cache.lookup(list_number, fingerprint)
+            if fresh or (self.offline and entry):
+                self._count('hits')
+                self._apply(row, entry['fields'])
+                ready.append(row)
+                continue
+            if self.offline:
+                ready.append(row)
+                continue
+
+            try:
+                self._pending.put_nowait((row, list_number, fingerprint, entry))
+            except queue.Full:
+                self._count('skipped')
+                self._apply_stale(row, entry)
+                ready.append(row)
+        return ready
+
+    def close(self):
+        """Finish outstanding fetches, emit their rows and persist the cache"""
+        if self._thread.is_alive():
+            self._pending.put(_DONE)
+            self._thread.join()
+        self.cache.save()
+
+    def hit_rate(self) -> float:
+        """Share of lookups answered without downloading a page (304s included)"""
+        lookups = self.stats['lookups']
+        return (self.stats['hits'] + self.stats['revalidated']) / lookups * 100 if lookups else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.stats['hits']}/{self.stats['lookups']} cache hits, "
+                f"{self.stats['revalidated']} revalidated, {self.stats['fetched']} fetched, "
+                f"{self.stats['failed']} failed, {self.stats['skipped']} skipped "
+                f"({self.hit_rate():.0f}% without a download)")
+
+    def _apply(self, row: ListingRecord, fields: Dict[str, Any]):
+        row.details_fetched = True
+        applied = False
+        for field in DETAIL_FIELDS:
+            if fields.get(field) is not None:
+                setattr(row, field, fields[field])
+                applied = True
+        if applied:
+            self._count('enriched')
+
+    def _apply_stale(self, row: ListingRecord, entry: Optional[Dict[str, Any]]):
+        """Older cached details beat saving NULL over them"""
+        if entry:
+            self._apply(row, entry['fields'])
+
+    # ------------------------------------------------------------------
+    # Fetch thread
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            self.log('error', f'Detail enrichment stopped: {e}')
+        # Anything still queued goes out unenriched
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _DONE:
+                self._count('failed')
+                self._apply_stale(item[0], item[3])
+                self.emit(item[0])
+
+    async def _main(self):
+        async with AsyncFetchEngine(max_in_flight=self.max_in_flight, timeout=self.timeout,
+                                    initial_in_flight=max(1, self.max_in_flight // 2)) as engine:
+            while True:
+                item = await asyncio.to_thread(self._pending.get)
+                if item is _DONE:
+                    break
+                engine.submit(self._fetch(engine, *item))
+            if engine.tasks:
+                await asyncio.gather(*list(engine.tasks), return_exceptions=True)
+
+    async def _fetch(self, engine: AsyncFetchEngine, row: ListingRecord, list_number: str,
+                     fingerprint: str, entry: Optional[Dict[str, Any]]):
+        """Fetch (or revalidate) one detail page, then emit its row"""
+        headers = dict(self.headers)
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        url = detail_url(row.listing_url)
+        try:
+            for attempt in range(1, DETAIL_RETRIES + 2):
+                proxy = self.proxy_pool.acquire() if self.proxy_pool else None
+                started = time.monotonic()
+                ok = False
+                try:
+                    response = await engine.get(url, headers=headers,
+                                                proxies=as_requests_proxies(proxy.url if proxy else None))
+                    ok = not is_throttle_status(response.status_code)
+                except Exception as e:
+                    response = None
+                    reason = str(e) or type(e).__name__
+                finally:
+                    if proxy:
+                        self.proxy_pool.release(proxy, ok, time.monotonic() - started if ok else None)
+
+                if response is not None:
+                    if response.status_code == 304 and entry:
+                        self.cache.revalidated(list_number, fingerprint)
+                        self._count('revalidated')
+                        self._apply(row, entry['fields'])
+                        return
+                    if response.status_code == 200:
+                        fields = parse_detail_page(response.text)
+                        self.cache.store(list_number, fingerprint, fields,
+                                         last_modified=response.headers.get('Last-Modified'),
+                                         etag=response.headers.get('ETag'))
+                        self._count('fetched')
+                        self._apply(row, fields)
+                        return
+                    if not is_throttle_status(response.status_code):
+                        reason = f'status {response.status_code}'
+                        break
+                    reason = f'status {response.status_code}'
+
+                if attempt <= DETAIL_RETRIES:
+                    await asyncio.sleep(backoff_delay(attempt))
+
+            self._count('failed')
+            self._apply_stale(row, entry)
+            self.log('warning', f'Detail page for listing {list_number} failed ({reason})')
+        finally:
+            # emit may block on a full sink - keep it off the event loop
+            await asyncio.to_thread(self.emit, row)
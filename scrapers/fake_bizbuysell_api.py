@@ -0,0 +1,378 @@
+"""
+Fake BizBuySell API
+Local stand-in for the BizBuySell token page and BbsBfsSearchResults search API
+Serves scraper/bizbuysell_listings.json amplified to any number of pages
+- keyword, locations and excludeLocations filters (locations match the listing's region)
+- _track_tkn cookie on any GET page; bearer token checked on search (401 when unknown/expired)
+- Configurable latency, 429/5xx rates and a concurrency cap that answers 429 past it
+- Listing detail pages (any path ending in /<listNumber>/) with Last-Modified/ETag and 304s
+- GET /__stats for request counters
+
+Point the scrapers at it with:
+    BIZBUYSELL_API_URL=http://127.0.0.1:8765/bff/v2/BbsBfsSearchResults
+    BIZBUYSELL_TOKEN_URL=http://127.0.0.1:8765/businesses-for-sale/new-york-ny/
+    BIZBUYSELL_DETAIL_URL=http://127.0.0.1:8765
+"""
+
+import copy
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from colorama import Fore, init
+
+init(autoreset=True)
+
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scraper', 'bizbuysell_listings.json')
+SEARCH_PATH = '/bff/v2/BbsBfsSearchResults'
+STATS_PATH = '/__stats'
+DETAIL_PATH = re.compile(r'/(\d+)/?$')
+
+# Offset added to listNumber for each fixture copy so amplified listings stay unique
+LIST_NUMBER_STRIDE = 10_000_000
+
+
+# ============================================================================
+# LISTING SOURCE
+# ============================================================================
+
+class AmplifiedListings:
+    """The fixture repeated across as many pages as requested, with unique ids per copy"""
+
+    def __init__(self, fixture: List[Dict[str, Any]], pages: int, page_size: int):
+        self.fixture = fixture
+        self.pages = pages
+        self.page_size = page_size
+        self._filter_matches: Dict[tuple, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def total(self, search: 'SearchFilter' = None) -> int:
+        if not search:
+            return self.pages * self.page_size
+        # Keep the amplification ratio for filtered searches
+        matches = self._matches(search)
+        return len(matches) * self.pages * self.page_size // max(1, len(self.fixture))
+
+    def page(self, page_number: int, search: 'SearchFilter' = None) -> List[Dict[str, Any]]:
+        start = (page_number - 1) * self.page_size
+        end = min(start + self.page_size, self.total(search))
+        indices = self._matches(search) if search else None
+        listings = []
+        for position in range(max(0, start), end):
+            if indices is None:
+                copy_number, index = divmod(position, len(self.fixture))
+            else:
+                copy_number, offset = divmod(position, len(indices))
+                index = indices[offset]
+            listings.append(self._listing(index, copy_number))
+        return listings
+
+    def _listing(self, index: int, copy_number: int) -> Dict[str, Any]:
+        listing = copy.deepcopy(self.fixture[index])
+        if copy_number:
+            try:
+                listing['listNumber'] = int(listing.get('listNumber') or 0) + copy_number * LIST_NUMBER_STRIDE
+            except (TypeError, ValueError):
+                listing['listNumber'] = f"{listing.get('listNumber')}-{copy_number}"
+            if listing.get('urlStub'):
+                listing['urlStub'] = f"{listing['urlStub'].rstrip('/')}-{copy_number}/"
+        return listing
+
+    def _matches(self, search: 'SearchFilter') -> List[int]:
+        with self._lock:
+            if search not in self._filter_matches:
+                self._filter_matches[search] = [
+                    i for i, listing in enumerate(self.fixture) if search.matches(listing)
+                ]
+            return self._filter_matches[search]
+
+
+class SearchFilter(tuple):
+    """(keyword, locations, excluded locations) from search criteria; falsy when unfiltered"""
+
+    @classmethod
+    def from_criteria(cls, criteria: Dict[str, Any]) -> 'SearchFilter':
+        keyword = (criteria.get('keyword') or '').strip().lower()
+        return cls((keyword, location_codes(criteria.get('locations')),
+                    location_codes(criteria.get('excludeLocations'))))
+
+    def __bool__(self) -> bool:
+        return any(self)
+
+    def matches(self, listing: Dict[str, Any]) -> bool:
+        keyword, locations, excluded = self
+        region = listing.get('region')
+        if locations and region not in locations:
+            return False
+        if excluded and region in excluded:
+            return False
+        if keyword:
+            text = f"{listing.get('header') or ''} {listing.get('description') or ''}".lower()
+            return re.search(rf'\b{re.escape(keyword)}\b', text) is not None
+        return True
+
+
+def location_codes(entries: Optional[List[Any]]) -> frozenset:
+    """State codes from a locations criterion (dicts with stateCode, or plain codes)"""
+    codes = set()
+    for entry in entries or []:
+        code = entry.get('stateCode') if isinstance(entry, dict) else entry
+        if code:
+            codes.add(str(code).upper())
+    return frozenset(codes)
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+class FakeBizBuySellServer(ThreadingHTTPServer):
+    """HTTP server holding fixture, fault settings, issued tokens and counters"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, listings: AmplifiedListings, latency: float = 0.0, jitter: float = 0.0,
+                 rate_429: float = 0.0, rate_5xx: float = 0.0, max_concurrent: int = 0,
+                 token_ttl: int = 3600, require_auth: bool = True, report_total: bool = False,
+                 seed: Optional[int] = None):
+        super().__init__(address, FakeBizBuySellHandler)
+        self.listings = listings
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.max_concurrent = max_concurrent
+        self.token_ttl = token_ttl
+        self.require_auth = require_auth
+        self.report_total = report_total
+        self.random = random.Random(seed)
+
+        self.tokens: Dict[str, float] = {}
+        self.in_flight = 0
+        self.stats = {
+            'search_requests': 0, 'token_requests': 0, 'ok': 0, 'empty_pages': 0,
+            'throttled_429': 0, 'concurrency_429': 0, 'errors_5xx': 0, 'unauthorized': 0,
+            'peak_in_flight': 0, 'detail_requests': 0, 'detail_not_modified': 0
+        }
+        self.lock = threading.Lock()
+        # Every detail page "last changed" when the server started
+        self.started_at = formatdate(time.time(), usegmt=True)
+
+    def issue_token(self) -> str:
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens[token] = time.time()
+            self.stats['token_requests'] += 1
+        return token
+
+    def token_valid(self, token: str) -> bool:
+        issued_at = self.tokens.get(token)
+        return issued_at is not None and time.time() - issued_at < self.token_ttl
+
+    def count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+
+class FakeBizBuySellHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: FakeBizBuySellServer
+
+    def log_message(self, format, *args):
+        pass  # Thousands of requests per second - counters live at /__stats
+
+    def do_GET(self):
+        if self.path.startswith(STATS_PATH):
+            with self.server.lock:
+                stats = dict(self.server.stats, tokens_issued=len(self.server.tokens))
+            return self._send_json(200, stats)
+
+        detail = DETAIL_PATH.search(self.path.split('?', 1)[0])
+        if detail:
+            return self._send_detail(int(detail.group(1)))
+
+        # Any other page hands out a tracking token, like the real search pages
+        token = self.server.issue_token()
+        body = b'<html><body>BizBuySell stand-in</body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Set-Cookie', f'_track_tkn={token}; Path=/')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        if not self.path.startswith(SEARCH_PATH):
+            return self._send_json(404, {'error': 'not found'})
+
+        server = self.server
+        server.count('search_requests')
+        with server.lock:
+            server.in_flight += 1
+            server.stats['peak_in_flight'] = max(server.stats['peak_in_flight'], server.in_flight)
+            over_capacity = server.max_concurrent and server.in_flight > server.max_concurrent
+        try:
+            self._delay()
+            if over_capacity:
+                server.count('concurrency_429')
+                return self._send_json(429, {'error': 'Too many concurrent requests'})
+
+            token = (self.headers.get('Authorization') or '').replace('Bearer ', '', 1).strip()
+            if server.require_auth and not server.token_valid(token):
+                server.count('unauthorized')
+                return self._send_json(401, {'error': 'Unauthorized'})
+
+            roll = server.random.random()
+            if roll < server.rate_429:
+                server.count('throttled_429')
+                return self._send_json(429, {'error': 'Too Many Requests'})
+            if roll < server.rate_429 + server.rate_5xx:
+                server.count('errors_5xx')
+                return self._send_json(server.random.choice([500, 502, 503]), {'error': 'Server error'})
+
+            try:
+                criteria = json.loads(raw or b'{}').get('bfsSearchCriteria') or {}
+            except ValueError:
+                return self._send_json(400, {'error': 'Invalid JSON'})
+
+            page_number = int(criteria.get('pageNumber') or 1)
+            search = SearchFilter.from_criteria(criteria)
+            listings = server.listings.page(page_number, search)
+            if not listings:
+                server.count('empty_pages')
+            server.count('ok')
+
+            result: Dict[str, Any] = {'value': listings}
+            if server.report_total:
+                result['totalCount'] = server.listings.total(search)
+            return self._send_json(200, {'value': {'bfsSearchResult': result}})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _delay(self):
+        delay = self.server.latency + self.server.random.uniform(0, self.server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _send_detail(self, list_number: int):
+        """Detail page with deterministic Established/Employees/Inventory/zip per listing"""
+        server = self.server
+        server.count('detail_requests')
+        self._delay()
+        etag = f'"{list_number}-1"'
+        if self.headers.get('If-None-Match') == etag or \
+                self.headers.get('If-Modified-Since') == server.started_at:
+            server.count('detail_not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        values = random.Random(list_number)
+        body = (
+            '<html><head><script type="application/ld+json">'
+            f'{{"address": {{"postalCode": "{values.randint(10000, 99999)}"}}}}</script></head><body>'
+            '<dl class="listingProfile_details">'
+            f'<dt><strong>Established:</strong></dt><dd>{values.randint(1960, 2023)}</dd>'
+            f'<dt><strong>Employees:</strong></dt><dd>{values.randint(1, 80)}</dd>'
+            f'<dt><strong>Inventory:</strong></dt><dd>${values.randint(0, 200) * 1000:,}</dd>'
+            '</dl></body></html>'
+        ).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Last-Modified', server.started_at)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def load_fixture(path: str = DEFAULT_FIXTURE) -> List[Dict[str, Any]]:
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('listings') or data.get('value') or []
+    return [listing for listing in data if isinstance(listing, dict)]
+
+
+# ============================================================================
+# CLI INTERFACE
+# ============================================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fake BizBuySell API for load and regression testing")
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port (default: 8765)')
+    parser.add_argument('--fixture', default=DEFAULT_FIXTURE, help='Search results JSON to serve')
+    parser.add_argument('--pages', type=int, default=100, help='Pages of results to serve (default: 100)')
+    parser.add_argument('--page-size', type=int, default=50, help='Listings per page (default: 50)')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Fixed latency per search request')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Extra random latency, 0..N ms')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Fraction of searches answered 429')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='Fraction of searches answered 500/502/503')
+    parser.add_argument('--max-concurrent', type=int, default=0,
+                        help='Answer 429 above this many concurrent searches (default: unlimited)')
+    parser.add_argument('--token-ttl', type=int, default=3600, help='Seconds before a token is rejected with 401')
+    parser.add_argument('--no-auth', action='store_true', help='Accept searches without a valid token')
+    parser.add_argument('--report-total', action='store_true', help='Include totalCount in search results')
+    parser.add_argument('--seed', type=int, help='Random seed for repeatable fault injection')
+
+    args = parser.parse_args()
+
+    fixture = load_fixture(args.fixture)
+    server = FakeBizBuySellServer(
+        (args.host, args.port),
+        AmplifiedListings(fixture, pages=args.pages, page_size=args.page_size),
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        max_concurrent=args.max_concurrent,
+        token_ttl=args.token_ttl,
+        require_auth=not args.no_auth,
+        report_total=args.report_total,
+        seed=args.seed
+    )
+
+    base = f"http://{args.host}:{args.port}"
+    print(f"\n{Fore.CYAN}{'='*70}")
+    print(f"{Fore.CYAN}Fake BizBuySell API")
+    print(f"{Fore.CYAN}{'='*70}")
+    print(f"{Fore.CYAN}Fixture: {len(fixture)} listings -> {args.pages} pages x {args.page_size}")
+    print(f"{Fore.CYAN}Latency: {args.latency_ms}ms (+0-{args.jitter_ms}ms)")
+    print(f"{Fore.CYAN}Faults: 429 {args.rate_429:.0%}, 5xx {args.rate_5xx:.0%}, "
+          f"max concurrent {args.max_concurrent or 'unlimited'}")
+    print(f"{Fore.CYAN}BIZBUYSELL_API_URL={base}{SEARCH_PATH}")
+    print(f"{Fore.CYAN}BIZBUYSELL_TOKEN_URL={base}/businesses-for-sale/new-york-ny/")
+    print(f"{Fore.CYAN}BIZBUYSELL_DETAIL_URL={base}")
+    print(f"{Fore.CYAN}Stats: {base}{STATS_PATH}")
+    print(f"{Fore.CYAN}{'='*70}\n")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}Stopping. Final stats: {json.dumps(server.stats)}")
+        server.server_close()
@@ -0,0 +1,229 @@
+"""
+Async Fetch Engine
+asyncio-based HTTP engine for the API scrapers (BizBuySell V2)
+Keeps hundreds of requests in flight on one event loop instead of a thread per request
+- AIMD concurrency: +1 in-flight slot per healthy round trip, halved on 429/5xx/timeouts
+- Jittered exponential backoff for requests that need a retry
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from curl_cffi.requests import AsyncSession
+
+
+def is_throttle_status(status_code: int) -> bool:
+    """429 and 5xx mean the API wants us to slow down"""
+    return status_code == 429 or 500 <= status_code < 600
+
+
+def backoff_delay(attempt: int, base: float = 0.8, cap: float = 20.0) -> float:
+    """Exponential backoff with full jitter (attempt starts at 1)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# ============================================================================
+# AIMD CONCURRENCY CONTROLLER
+# ============================================================================
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease limit on requests in flight
+
+    Every healthy response adds 1/limit to the limit (about +1 per round trip
+    of the whole window); a throttled response halves it. Halvings are spaced
+    by `cooldown` so one burst of 429s from a full window counts once.
+    """
+
+    def __init__(self, initial: int = 10, minimum: int = 1, maximum: int = 100,
+                 decrease_factor: float = 0.5, cooldown: float = 1.0, adaptive: bool = True):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.adaptive = adaptive
+
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._waiters: List[asyncio.Future] = []
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    async def acquire(self):
+        while self.in_flight >= self.current_limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self):
+        """
+        Free a slot and wake the waiters
+
+        Synchronous so it runs to completion even when the releasing task is
+        being cancelled (an awaited release could lose the slot for good).
+        """
+        self.in_flight -= 1
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def on_success(self):
+        if self.adaptive and self.limit < self.maximum:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self.peak_limit = max(self.peak_limit, self.limit)
+
+    def on_throttle(self):
+        if not self.adaptive:
+            return
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown:
+            self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+            self._last_decrease = now
+            self.decreases += 1
+
+
+# ============================================================================
+# ASYNC FETCH ENGINE
+# ============================================================================
+
+class AsyncFetchEngine:
+    """Adaptive-concurrency async HTTP engine with per-request timeouts and cancellation"""
+
+    def __init__(self, max_in_flight: int = 50, timeout: float = 30.0, impersonate: str = 'chrome',
+                 initial_in_flight: Optional[int] = None, adaptive: bool = True):
+        """
+        Initialize engine
+
+        Args:
+            max_in_flight: Ceiling on concurrent requests (default: 50)
+            timeout: Per-request timeout in seconds (default: 30)
+            impersonate: curl_cffi browser fingerprint (default: chrome)
+            initial_in_flight: Starting limit for AIMD (default: max_in_flight)
+            adaptive: Adjust the limit on 429/5xx (default: True). When False
+                      the limit stays at initial_in_flight.
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.timeout = timeout
+        self.impersonate = impersonate
+
+        self.controller = AimdController(
+            initial=initial_in_flight or self.max_in_flight,
+            maximum=self.max_in_flight,
+            adaptive=adaptive
+        )
+
+        self.session: Optional[AsyncSession] = None
+        self.tasks: set = set()
+        self.cancelled = False
+
+        # Run stats
+        self.requests_sent = 0
+        self.requests_ok = 0
+        self.requests_throttled = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    async def __aenter__(self):
+        # curl_cffi caps concurrent transfers at max_clients (default 10)
+        self.session = AsyncSession(impersonate=self.impersonate, max_clients=self.max_in_flight)
+        self.cancelled = False
+        self.started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.cancel()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.session:
+            await self.session.close()
+            self.session = None
+        self.finished_at = time.monotonic()
+
+    @property
+    def current_limit(self) -> int:
+        return self.controller.current_limit
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def effective_rate(self) -> float:
+        """Successful requests per second over the engine's lifetime"""
+        return self.requests_ok / self.elapsed if self.elapsed else 0.0
+
+    async def request(self, method: str, url: str, **kwargs):
+        """
+        Send one request once a slot is free
+
+        Feeds the AIMD controller: 2xx grows the limit, 429/5xx and timeouts
+        shrink it. Raises asyncio.TimeoutError on timeout.
+        """
+        await self.controller.acquire()
+        self.requests_sent += 1
+        try:
+            # Hard deadline on top of curl's own timeout so a stalled
+            # connection can never hold a slot indefinitely
+            response = await asyncio.wait_for(
+                self.session.request(method, url, timeout=self.timeout, **kwargs),
+                timeout=self.timeout + 5
+            )
+        except asyncio.TimeoutError:
+            self.requests_throttled += 1
+            self.controller.on_throttle()
+            raise
+        finally:
+            self.controller.release()
+
+        if is_throttle_status(response.status_code):
+            self.requests_throttled += 1
+            self.controller.on_throttle()
+        elif response.status_code < 400:
+            self.requests_ok += 1
+            self.controller.on_success()
+        return response
+
+    async def post(self, url: str, headers: Dict[str, str] = None, json: Any = None, **kwargs):
+        return await self.request('POST', url, headers=headers, json=json, **kwargs)
+
+    async def get(self, url: str, headers: Dict[str, str] = None, **kwargs):
+        return await self.request('GET', url, headers=headers, **kwargs)
+
+    def submit(self, coro: Awaitable) -> asyncio.Task:
+        """Schedule a coroutine on the engine so cancel() can reach it"""
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def map(self, func: Callable[[Any], Awaitable[Any]], items: Iterable[Any]) -> List[Any]:
+        """
+        Run func(item) for every item, concurrency bounded by the controller
+
+        Results are returned in input order. Items whose task was cancelled or
+        raised come back as None.
+        """
+        tasks = [self.submit(func(item)) for item in items]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return [None if isinstance(r, BaseException) else r for r in results]
+
+    def cancel(self):
+        """Cancel every outstanding task scheduled through this engine"""
+        self.cancelled = True
+        for task in list(self.tasks):
+            task.cancel()
@@ -0,0 +1,143 @@
+"""
+Keyword Matcher
+One compiled pass classifies a listing against every vertical's keywords
+- All include/exclude keywords of all verticals go into one automaton:
+  Aho-Corasick (pyahocorasick) when installed, else a trie-shaped regex
+- Each keyword carries per-vertical include/exclude bitmasks, so the cost
+  of a listing is one scan of its text however many verticals and
+  keywords there are
+- Same rule as the per-scraper loops it replaces: case-insensitive
+  substring match, any exclude keyword rejects, then any include accepts
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # Optional - the regex fallback gives the same answers
+    ahocorasick = None
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex for a set of literals with shared prefixes factored out
+
+    The trie shape keeps the regex engine from retrying every keyword at
+    every position, and greedy optional tails make the longest keyword at
+    a position win.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        ends_here = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if ends_here:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Compiled include/exclude keywords of a set of verticals"""
+
+    def __init__(self, vertical_configs: Dict[str, Dict[str, Any]]):
+        """
+        Compile matcher
+
+        Args:
+            vertical_configs: Vertical slug -> config with include_keywords
+                              and exclude_keywords (VERTICAL_CONFIGS)
+        """
+        self.verticals: List[str] = list(vertical_configs)
+        self.bits = {slug: 1 << i for i, slug in enumerate(self.verticals)}
+
+        include: Dict[str, int] = {}
+        exclude: Dict[str, int] = {}
+        for slug, config in vertical_configs.items():
+            for keyword in config.get('include_keywords') or []:
+                include[keyword.lower()] = include.get(keyword.lower(), 0) | self.bits[slug]
+            for keyword in config.get('exclude_keywords') or []:
+                exclude[keyword.lower()] = exclude.get(keyword.lower(), 0) | self.bits[slug]
+        keywords = sorted({kw for kw in list(include) + list(exclude) if kw})
+
+        # A scan reports the longest keyword at each position, so give each
+        # keyword the masks of every keyword inside it ("carpet cleaning"
+        # also counts as "cleaning")
+        self.masks: Dict[str, Tuple[int, int]] = {}
+        for keyword in keywords:
+            inc = exc = 0
+            for inner in keywords:
+                if inner in keyword:
+                    inc |= include.get(inner, 0)
+                    exc |= exclude.get(inner, 0)
+            self.masks[keyword] = (inc, exc)
+
+        self._automaton = None
+        self._regex = None
+        if ahocorasick is not None and keywords:
+            self._automaton = ahocorasick.Automaton()
+            for keyword, masks in self.masks.items():
+                self._automaton.add_word(keyword, masks)
+            self._automaton.make_automaton()
+        elif keywords:
+            self._regex = re.compile(f"(?=({trie_pattern(keywords)}))")
+        self._slugs: Dict[int, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    def scan(self, text: str) -> Tuple[int, int]:
+        """(include mask, exclude mask) of every keyword found in text"""
+        text = text.lower()
+        inc = exc = 0
+        if self._automaton is not None:
+            for _, (keyword_inc, keyword_exc) in self._automaton.iter(text):
+                inc |= keyword_inc
+                exc |= keyword_exc
+        elif self._regex is not None:
+            masks = self.masks
+            for keyword in set(self._regex.findall(text)):
+                keyword_inc, keyword_exc = masks[keyword]
+                inc |= keyword_inc
+                exc |= keyword_exc
+        return inc, exc
+
+    def match_mask(self, text: str) -> int:
+        """Bitmask of the verticals text belongs to (see self.bits)"""
+        inc, exc = self.scan(text)
+        return inc & ~exc
+
+    def classify(self, text: str) -> List[str]:
+        """Slugs of the verticals text belongs to, in config order"""
+        mask = self.match_mask(text)
+        slugs = self._slugs.get(mask)
+        if slugs is None:
+            slugs = self._slugs[mask] = [slug for slug in self.verticals if mask & self.bits[slug]]
+        return slugs
+
+    def matches(self, text: str, vertical: str) -> bool:
+        """Whether text belongs to one vertical"""
+        return bool(self.match_mask(text) & self.bits[vertical])
+
+    def mask_many(self, texts: Iterable[str]) -> List[int]:
+        """match_mask() for a batch of texts; test a vertical with mask & self.bits[slug]"""
+        return [self.match_mask(text) for text in texts]
+
+    def classify_many(self, texts: Iterable[str]) -> List[List[str]]:
+        """classify() for a batch of texts"""
+        return [self.classify(text) for text in texts]
+
+    def match_many(self, texts: Iterable[str], vertical: str) -> List[bool]:
+        """matches() for a batch of texts"""
+        bit = self.bits[vertical]
+        return [bool(self.match_mask(text) & bit) for text in texts]
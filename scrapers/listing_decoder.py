@@ -0,0 +1,115 @@
+"""
+Listing Decoder
+Fast decoding of BbsBfsSearchResults pages into compact listing records
+- orjson when installed (falls back to the standard json module)
+- Each listing is projected to the fields the pipeline reads, stored in __slots__
+- The full raw listing is kept only when archiving is requested
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from page_planner import extract_total_count
+
+try:
+    import orjson
+except ImportError:  # Optional - standard json works, just slower
+    orjson = None
+
+
+# Fields read by dedupe, matches_vertical and normalize_listing
+LISTING_FIELDS = (
+    'listNumber', 'urlStub', 'header', 'description', 'category', 'location', 'img',
+    'price', 'grossSales', 'cashFlow', 'ebitda',
+    'brokerCompany', 'brokerContactFullName', 'brokercontactfullname',
+    'region', 'hotProperty', 'recentlyAdded', 'recentlyUpdated',
+)
+
+_FIELD_SET = frozenset(LISTING_FIELDS)
+_MISSING = object()
+
+
+def loads(body: Union[bytes, str]) -> Any:
+    """Parse JSON with orjson if available"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize JSON to bytes with orjson if available"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+# ============================================================================
+# COMPACT LISTING RECORD
+# ============================================================================
+
+class SearchListing:
+    """
+    One search result reduced to LISTING_FIELDS
+
+    Supports the dict reads the scrapers use (get, [], in), so it can be
+    passed anywhere a raw listing dict was.
+    """
+
+    __slots__ = LISTING_FIELDS + ('raw',)
+
+    def __init__(self, source: Dict[str, Any], archive: bool = False):
+        for field in LISTING_FIELDS:
+            setattr(self, field, source.get(field, _MISSING))
+        self.raw: Optional[Dict[str, Any]] = source if archive else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        if self.raw is not None:
+            return self.raw.get(key, default)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Projected fields as a dict (the full raw listing when archived)"""
+        if self.raw is not None:
+            return dict(self.raw)
+        return {field: getattr(self, field) for field in LISTING_FIELDS if getattr(self, field) is not _MISSING}
+
+    def __repr__(self) -> str:
+        return f"SearchListing(listNumber={self.get('listNumber')!r}, header={self.get('header')!r})"
+
+
+# ============================================================================
+# PAGE DECODING
+# ============================================================================
+
+def iter_page_listings(data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Listing dicts inside a BbsBfsSearchResults response"""
+    rows = (data or {}).get('value', {}).get('bfsSearchResult', {}).get('value', []) or []
+    return (row for row in rows if isinstance(row, dict))
+
+
+def decode_search_page(body: Union[bytes, str], archive: bool = False) -> Tuple[List[SearchListing], Optional[int]]:
+    """
+    Decode a raw BbsBfsSearchResults body
+
+    Args:
+        body: Response bytes (or text)
+        archive: Keep each listing's full raw dict on the record
+
+    Returns:
+        (projected listings, total result count if the API reported one)
+    """
+    data = loads(body)
+    listings = [SearchListing(row, archive) for row in iter_page_listings(data)]
+    return listings, extract_total_count(data)
@@ -0,0 +1,313 @@
+"""
+Listing Record
+Compact in-memory listing shared by the scrapers
+- One __slots__ object per listing instead of a ~30-key dict (plus nested
+  custom_fields dicts and per-row timestamp strings)
+- Holds only what differs per listing; constant columns, slug, meta fields
+  and timestamps are produced when the row is serialized
+- Each scraper serializes to its own upsert schema at save time:
+  to_bizbuysell_row() (BizBuySell scraper) or to_broker_row() (unified scraper)
+- The run timestamp is one string shared by every record of the run
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional
+
+_SLUG = re.compile(r'[^a-z0-9]+')
+
+BIZBUYSELL_URL = 'https://www.bizbuysell.com'
+
+
+def parse_financial(value: Any) -> Optional[float]:
+    """'$1,250,000' / 1250000 -> 1250000.0 (None when empty or unparseable)"""
+    if not value:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return float(value)
+        cleaned = str(value).replace('$', '').replace(',', '').strip()
+        return float(cleaned) if cleaned else None
+    except (TypeError, ValueError):
+        return None
+
+
+def split_city_state(location: Optional[str]):
+    """'Austin, TX' -> ('Austin', 'TX'); (None, None) without a comma"""
+    if location and ',' in location:
+        parts = location.split(',')
+        return parts[0].strip(), parts[1].strip()
+    return None, None
+
+
+class ListingRecord:
+    """
+    One scraped listing
+
+    Financial fields are parsed floats (cash_flow doubles as BizBuySell's
+    sde). The DetailEnricher sets the detail fields (year_established,
+    employees_count, inventory_value, zip_code) in place and marks the
+    record details_fetched; records without details are saved without
+    those columns, so values stored by an enriched run are kept.
+    """
+
+    __slots__ = (
+        'id', 'vertical_slug', 'source', 'title', 'description', 'location', 'city', 'state',
+        'asking_price', 'price_text', 'revenue', 'cash_flow', 'ebitda', 'category', 'business_type',
+        'list_number', 'url_stub', 'listing_url', 'image_url',
+        'broker_account', 'broker_company', 'broker_contact', 'region',
+        'hot_property', 'recently_added', 'recently_updated',
+        'year_established', 'employees_count', 'inventory_value', 'zip_code', 'details_fetched',
+        'raw', 'scraper_run_id', 'scraped_at',
+    )
+
+    def __init__(self, id: str, vertical_slug: str, source: str, title: Optional[str] = None,
+                 description: Optional[str] = None, location: Optional[str] = None,
+                 city: Optional[str] = None, state: Optional[str] = None,
+                 asking_price: Optional[float] = None, price_text: Optional[str] = None,
+                 revenue: Optional[float] = None, cash_flow: Optional[float] = None,
+                 ebitda: Optional[float] = None, category: Optional[str] = None,
+                 business_type: Optional[str] = None, list_number: Optional[str] = None,
+                 url_stub: Optional[str] = None, listing_url: Optional[str] = None,
+                 image_url: Optional[str] = None, broker_account: Optional[str] = None,
+                 broker_company: Optional[str] = None, broker_contact: Optional[str] = None,
+                 region: Optional[str] = None, hot_property: bool = False,
+                 recently_added: bool = False, recently_updated: bool = False,
+                 raw: Optional[Dict[str, Any]] = None, scraper_run_id: Optional[str] = None,
+                 scraped_at: Optional[str] = None):
+        self.id = id
+        self.vertical_slug = vertical_slug
+        self.source = source
+        self.title = title
+        self.description = description
+        self.location = location
+        self.city = city
+        self.state = state
+        self.asking_price = asking_price
+        self.price_text = price_text
+        self.revenue = revenue
+        self.cash_flow = cash_flow
+        self.ebitda = ebitda
+        self.category = category
+        self.business_type = business_type
+        self.list_number = list_number
+        self.url_stub = url_stub
+        self.listing_url = listing_url
+        self.image_url = image_url
+        self.broker_account = broker_account
+        self.broker_company = broker_company
+        self.broker_contact = broker_contact
+        self.region = region
+        self.hot_property = hot_property
+        self.recently_added = recently_added
+        self.recently_updated = recently_updated
+        self.year_established = None
+        self.employees_count = None
+        self.inventory_value = None
+        self.zip_code = None
+        self.details_fetched = False
+        self.raw = raw
+        self.scraper_run_id = scraper_run_id
+        self.scraped_at = scraped_at
+
+    # ------------------------------------------------------------------
+    # Builders
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_bizbuysell(cls, raw_listing: Dict[str, Any], vertical_slug: str, scraped_at: str,
+                        archive: bool = False) -> 'ListingRecord':
+        """
+        Record for one BizBuySell search result
+
+        Args:
+            raw_listing: Search listing (dict or SearchListing)
+            vertical_slug: Vertical the listing is saved under
+            scraped_at: Run timestamp (created_at/updated_at)
+            archive: Keep the full search payload for custom_fields
+
+        Raises:
+            TypeError: Listing has no header to build a slug from
+        """
+        list_number = str(raw_listing.get('listNumber', ''))
+        url_stub = raw_listing.get('urlStub', '')
+        title = raw_listing.get('header', '')
+        if not isinstance(title, str):
+            raise TypeError(f"listing {list_number} has no header")
+
+        img = raw_listing.get('img')
+        image_url = None
+        if isinstance(img, list) and img:
+            image_url = img[0]
+        elif isinstance(img, str):
+            image_url = img
+
+        city, state = split_city_state(raw_listing.get('location', ''))
+
+        raw = None
+        if archive:
+            raw = raw_listing.to_dict() if hasattr(raw_listing, 'to_dict') else dict(raw_listing)
+
+        return cls(
+            id=hashlib.sha256(f"{list_number}--{url_stub}--{title}".encode()).hexdigest(),
+            vertical_slug=vertical_slug,
+            source='BizBuySell',
+            title=title,
+            description=raw_listing.get('description'),
+            city=city,
+            state=state,
+            asking_price=parse_financial(raw_listing.get('price')),
+            revenue=parse_financial(raw_listing.get('grossSales')),
+            cash_flow=parse_financial(raw_listing.get('cashFlow')),
+            ebitda=parse_financial(raw_listing.get('ebitda')),
+            category=raw_listing.get('category'),
+            list_number=list_number,
+            url_stub=url_stub,
+            listing_url=url_stub if url_stub.startswith('http') else f"{BIZBUYSELL_URL}{url_stub}",
+            image_url=image_url,
+            broker_company=raw_listing.get('brokerCompany'),
+            broker_contact=(raw_listing.get('brokercontactfullname') or
+                            raw_listing.get('brokerContactFullName')),
+            region=raw_listing.get('region'),
+            hot_property=raw_listing.get('hotProperty') == 'true',
+            recently_added=raw_listing.get('recentlyAdded') == 'true',
+            recently_updated=raw_listing.get('recentlyUpdated') == 'true',
+            raw=raw,
+            scraped_at=scraped_at,
+        )
+
+    @classmethod
+    def from_broker(cls, listing: Dict[str, Any], vertical_slug: str, broker_account: str,
+                    scraper_run_id: Optional[str], scraped_at: str) -> 'ListingRecord':
+        """Record for one listing scraped from a broker site (or downloaded broker file)"""
+        listing_url = listing.get('listing_url') or listing.get('url')
+        return cls(
+            id=hashlib.md5((listing_url or '').encode()).hexdigest(),
+            vertical_slug=vertical_slug,
+            source='Broker Network',
+            title=listing.get('title'),
+            description=listing.get('text') or listing.get('description') or '',
+            location=listing.get('location'),
+            city=listing.get('city'),
+            state=listing.get('state'),
+            asking_price=listing.get('price'),
+            price_text=listing.get('price_text'),
+            revenue=listing.get('revenue'),
+            cash_flow=listing.get('cash_flow'),
+            business_type=listing.get('business_type'),
+            listing_url=listing_url,
+            image_url=listing.get('image_url'),
+            broker_account=broker_account,
+            recently_added=True,
+            scraper_run_id=scraper_run_id,
+            scraped_at=scraped_at,
+        )
+
+    # ------------------------------------------------------------------
+    # Serializers
+    # ------------------------------------------------------------------
+
+    def to_bizbuysell_row(self) -> Dict[str, Any]:
+        """Upsert payload for the production listings schema (BizBuySell scraper)"""
+        bizbuysell = {
+            'list_number': self.list_number,
+            'url_stub': self.url_stub,
+            'broker_company': self.broker_company,
+            'broker_contact': self.broker_contact,
+            'region': self.region,
+            'hot_property': self.hot_property,
+            'recently_added': self.recently_added,
+            'recently_updated': self.recently_updated,
+        }
+        if self.raw is not None:
+            bizbuysell['raw'] = self.raw
+
+        row = {
+            'id': self.id,
+            'vertical_id': None,  # Set by database default or trigger
+            'vertical_slug': self.vertical_slug,
+            'title': self.title,
+            'description': self.description,
+            'slug': _SLUG.sub('-', self.title.lower()).strip('-')[:100],
+            'city': self.city,
+            'state': self.state,
+            'country': 'US',
+            'asking_price': self.asking_price,
+            'revenue': self.revenue,
+            'sde': self.cash_flow,
+            'ebitda': self.ebitda,
+            'cash_flow': self.cash_flow,
+            'category': self.category,
+            'status': 'pending',
+            'broker_id': None,
+            'source': self.source,
+            'external_id': self.list_number,
+            'external_url': self.listing_url,
+            'images': [self.image_url] if self.image_url else [],
+            'documents': [],
+            'meta_title': self.title,
+            'meta_description': self.description[:160] if self.description else None,
+            'custom_fields': {'bizbuysell': bizbuysell},
+            # created_by / updated_by / published_at / archived_at are left
+            # out - sending them causes schema cache errors
+            'created_at': self.scraped_at,
+            'updated_at': self.scraped_at,
+        }
+        if self.details_fetched:
+            row['zip_code'] = self.zip_code
+            row['inventory_value'] = self.inventory_value
+            row['year_established'] = self.year_established
+            row['employees_count'] = self.employees_count
+        return row
+
+    def to_broker_row(self) -> Dict[str, Any]:
+        """Upsert payload for the broker listings schema (unified scraper)"""
+        return {
+            'id': self.id,
+            'vertical_slug': self.vertical_slug,
+            'title': self.title,
+            'location': self.location,
+            'city': self.city,
+            'state': self.state,
+            'asking_price': self.asking_price,
+            'price_text': self.price_text,
+            'cash_flow': self.cash_flow,
+            'ebitda': self.ebitda,
+            'annual_revenue': self.revenue,
+            'description': self.description,
+            'image_url': self.image_url,
+            'listing_url': self.listing_url,
+            'category_id': None,
+            'business_type': self.business_type,
+            'broker_account': self.broker_account,
+            'broker_source': self.source,
+            'broker_contact': self.broker_contact,
+            'broker_company': self.broker_company,
+            'list_number': self.list_number,
+            'url_stub': self.url_stub,
+            'region': self.region,
+            'status': 'pending',
+            'hot_property': self.hot_property,
+            'recently_added': self.recently_added,
+            'recently_updated': self.recently_updated,
+            'scraper_run_id': self.scraper_run_id,
+            'scraped_at': self.scraped_at,
+        }
+
+    def has_financials(self) -> bool:
+        return bool(self.asking_price or self.revenue or self.cash_flow)
+
+    def __repr__(self) -> str:
+        return f"ListingRecord(id={self.id[:12]!r}, source={self.source!r}, title={self.title!r})"
+
+
+def to_rows(records: List[Any], schema: str) -> List[Dict[str, Any]]:
+    """
+    Serialize a batch for upsert
+
+    Args:
+        records: ListingRecords (rows that are already dicts pass through)
+        schema: 'bizbuysell' or 'broker'
+    """
+    method = ListingRecord.to_bizbuysell_row if schema == 'bizbuysell' else ListingRecord.to_broker_row
+    return [method(record) if isinstance(record, ListingRecord) else record for record in records]
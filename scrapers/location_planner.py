@@ -0,0 +1,72 @@
+"""
+Location Planner
+Splits a BizBuySell search into location shards through the `locations` criterion
+- Starts from the nine US census divisions plus one residual shard for
+  everything outside them (multi-location franchises, Canada, unknown)
+- A shard deeper than the page cap is split again: division -> states
+- Shards are crawled concurrently and merged by listNumber, so depth per
+  shard stays small and runtime scales with requests in flight
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+# US census divisions (plus DC) - small enough that most fit in one shard
+REGIONS: Dict[str, List[str]] = {
+    'new-england': ['CT', 'ME', 'MA', 'NH', 'RI', 'VT'],
+    'mid-atlantic': ['NJ', 'NY', 'PA'],
+    'east-north-central': ['IL', 'IN', 'MI', 'OH', 'WI'],
+    'west-north-central': ['IA', 'KS', 'MN', 'MO', 'NE', 'ND', 'SD'],
+    'south-atlantic': ['DE', 'DC', 'FL', 'GA', 'MD', 'NC', 'SC', 'VA', 'WV'],
+    'east-south-central': ['AL', 'KY', 'MS', 'TN'],
+    'west-south-central': ['AR', 'LA', 'OK', 'TX'],
+    'mountain': ['AZ', 'CO', 'ID', 'MT', 'NV', 'NM', 'UT', 'WY'],
+    'pacific': ['AK', 'CA', 'HI', 'OR', 'WA'],
+}
+
+US_STATES: List[str] = [state for states in REGIONS.values() for state in states]
+
+
+def state_location(state: str) -> Dict[str, Any]:
+    """One entry of bfsSearchCriteria.locations / excludeLocations"""
+    return {'countryCode': 'US', 'stateCode': state}
+
+
+def shard_states(criteria: Dict[str, Any]) -> List[str]:
+    """State codes a shard's criteria searches (empty for non-location criteria)"""
+    return [entry['stateCode'] for entry in criteria.get('locations') or []
+            if isinstance(entry, dict) and entry.get('stateCode')]
+
+
+def location_shard(states: List[str], base: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {**(base or {}), 'locations': [state_location(state) for state in states]}
+
+
+def plan_location_shards(base: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Cover one search with location shards
+
+    Args:
+        base: Criteria every shard keeps (e.g. a narrowed keyword query)
+
+    Returns:
+        One shard per region plus the residual shard; together they return
+        every listing the unsharded search would
+    """
+    shards = [location_shard(states, base) for states in REGIONS.values()]
+    shards.append({**(base or {}), 'excludeLocations': [state_location(state) for state in US_STATES]})
+    return shards
+
+
+def split_shard(criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Child shards for a shard that hit the page cap
+
+    A multi-state shard becomes one shard per state. Single states and the
+    residual shard cannot be split further (returns []).
+    """
+    states = shard_states(criteria)
+    if len(states) < 2:
+        return []
+    base = {key: value for key, value in criteria.items() if key != 'locations'}
+    return [location_shard([state], base) for state in states]
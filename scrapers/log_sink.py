@@ -0,0 +1,204 @@
+"""
+Log Sink
+Buffered background writer for scraper_logs
+- emit() only builds the row (with its own timestamp) and queues it; one
+  background thread inserts queued rows in batches of up to LOG_BATCH_SIZE,
+  at most LOG_FLUSH_SECONDS after the oldest one was queued
+- emit() never blocks: once the queue is 3/4 full only one in
+  LOG_SAMPLE_EVERY debug/info rows is kept, the last tenth of the queue is
+  left to warnings and errors, and a full queue drops the row. The number
+  lost goes out as one warning row with the next batch
+- Inserts are best-effort like before: a failed batch (no scraper_logs
+  table, network error) is counted and dropped
+- One sink per process (shared_log_sink); flush() waits for what is queued,
+  and the sink is flushed and closed at interpreter exit
+"""
+
+import atexit
+import itertools
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# Rows per insert
+LOG_BATCH_SIZE = int(os.getenv('SCRAPER_LOG_BATCH_SIZE', '200'))
+
+# Longest a queued row waits for its batch
+LOG_FLUSH_SECONDS = float(os.getenv('SCRAPER_LOG_FLUSH_SECONDS', '2'))
+
+# Rows waiting for the writer before sampling/dropping starts
+LOG_QUEUE_SIZE = int(os.getenv('SCRAPER_LOG_QUEUE_SIZE', '10000'))
+
+# Debug/info rows kept under backpressure: one in this many
+LOG_SAMPLE_EVERY = 10
+
+# Levels that are never sampled out
+_KEEP_LEVELS = frozenset({'warning', 'error'})
+
+_DONE = object()
+
+
+class LogSink:
+    """Queues scraper_logs rows and inserts them in batches on a background thread"""
+
+    def __init__(self, supabase, table: str = 'scraper_logs', batch_size: int = LOG_BATCH_SIZE,
+                 flush_seconds: float = LOG_FLUSH_SECONDS, queue_size: int = LOG_QUEUE_SIZE):
+        """
+        Initialize sink and start its writer thread
+
+        Args:
+            supabase: Client the writer thread inserts with
+            table: Log table
+            batch_size: Largest insert
+            flush_seconds: Longest a row waits before its batch is written
+            queue_size: Rows that may wait; emit() samples debug/info past
+                        3/4 of this and drops them past 9/10
+        """
+        self.supabase = supabase
+        self.table = table
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.records: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._sample_above = queue_size * 3 // 4
+        self._reserve_above = queue_size * 9 // 10
+        self._sample_counter = itertools.count()
+
+        self.stats = {'queued': 0, 'written': 0, 'batches': 0, 'sampled_out': 0, 'dropped': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+        self._reported_lost = 0
+        self._lost_run_id: Optional[str] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='log-sink', daemon=True)
+        self._thread.start()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def emit(self, scraper_run_id: str, level: str, message: str, context: Dict = None):
+        """Queue one scraper_logs row for scraper_run_id (never blocks)"""
+        if self._closed:
+            self._count('dropped')
+            return
+        if level not in _KEEP_LEVELS:
+            waiting = self.records.qsize()
+            if waiting >= self._sample_above and (waiting >= self._reserve_above
+                                                  or next(self._sample_counter) % LOG_SAMPLE_EVERY):
+                self._lost_run_id = scraper_run_id
+                self._count('sampled_out')
+                return
+        try:
+            self.records.put_nowait(_record(scraper_run_id, level, message, context))
+        except queue.Full:
+            self._lost_run_id = scraper_run_id
+            self._count('dropped')
+            return
+        self._count('queued')
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Wait until every row queued so far has been written (or failed)
+
+        Returns:
+            False if that took longer than timeout
+        """
+        if not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        deadline = time.monotonic() + timeout
+        try:
+            self.records.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(max(0.0, deadline - time.monotonic()))
+
+    def close(self, timeout: float = 10.0):
+        """Write what is queued and stop the writer; later rows are dropped"""
+        self._closed = True
+        if self._thread.is_alive():
+            try:
+                self.records.put(_DONE, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+    def summary(self) -> str:
+        return (f"{self.stats['written']} written in {self.stats['batches']} batches, "
+                f"{self.stats['sampled_out']} sampled out, {self.stats['dropped']} dropped, "
+                f"{self.stats['failed']} failed")
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        deadline = None
+        while True:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                item = self.records.get(timeout=timeout)
+            except queue.Empty:
+                item = None  # The oldest row has waited flush_seconds
+
+            if item is None or item is _DONE or isinstance(item, threading.Event):
+                self._write(batch)
+                batch, deadline = [], None
+                if isinstance(item, threading.Event):
+                    item.set()
+                if item is _DONE:
+                    return
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_seconds
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch, deadline = [], None
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        lost = self.stats['sampled_out'] + self.stats['dropped']
+        if lost > self._reported_lost and self._lost_run_id:
+            batch.append(_record(self._lost_run_id, 'warning',
+                                 f"{lost - self._reported_lost} log messages not stored (log queue full)",
+                                 {'sampled_out': self.stats['sampled_out'], 'dropped': self.stats['dropped']}))
+            self._reported_lost = lost
+        if not batch:
+            return
+        try:
+            self.supabase.table(self.table).insert(batch).execute()
+        except Exception:
+            self._count('failed', len(batch))  # Table missing or unreachable - logs are best-effort
+            return
+        self._count('written', len(batch))
+        self._count('batches')
+
+
+def _record(scraper_run_id: str, level: str, message: str, context: Optional[Dict]) -> Dict[str, Any]:
+    return {
+        'id': str(uuid.uuid4()),
+        'scraper_run_id': scraper_run_id,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'level': level,
+        'message': message,
+        'context': context or {}
+    }
+
+
+_shared: Optional[LogSink] = None
+_shared_lock = threading.Lock()
+
+
+def shared_log_sink(supabase) -> LogSink:
+    """The process-wide sink (writes with the first caller's client; closed at exit)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = LogSink(supabase)
+            atexit.register(_shared.close)
+        return _shared
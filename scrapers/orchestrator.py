@@ -1,11 +1,11 @@
 """
 Multi-Tenant Scraper Orchestrator
-Runs all 3 scrapers across all 3 verticals:
+Runs all 3 scrapers across every vertical in the registry:
 - BizBuySell (API-based)
 - Specialized Brokers (Murphy, Transworld, Sunbelt, VR, FCBB, Hedgestone)
 - Unified Broker Network (ML-based pattern detection)
 
-Verticals: cleaning, landscape, hvac
+Verticals: see vertical_registry.py (config/verticals/verticals.json)
 """
 
 import os
@@ -13,7 +13,7 @@ import sys
 import time
 import argparse
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 from colorama import Fore, Style, init
 
 # Initialize colorama
@@ -22,18 +22,17 @@ init(autoreset=True)
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from vertical_registry import REGISTRY
+from work_queue import QUEUE_TOKEN, is_loopback_host
+
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
-VERTICALS = ['cleaning', 'landscape', 'hvac']
+VERTICALS = REGISTRY.slugs
 
-VERTICAL_NAMES = {
-    'cleaning': 'Cleaning Services',
-    'landscape': 'Landscape Services',
-    'hvac': 'HVAC Services'
-}
+VERTICAL_NAMES = REGISTRY.names()
 
 SCRAPERS = {
     'bizbuysell': {
@@ -43,7 +42,17 @@ SCRAPERS = {
         'class': 'BizBuySellScraperV2',
         'default_config': {
             'max_pages': 100,
-            'workers': 10
+            'workers': 10,
+            'engine': 'async',
+            'narrow': False,
+            'full_sweep': False,
+            'max_in_flight': 100,
+            'cache': True,
+            'replay': False,
+            'archive_raw': False,
+            'enrich_details': False,
+            'detail_in_flight': 8,
+            'shard_locations': False
         }
     },
     'specialized': {
@@ -77,7 +86,10 @@ class ScraperOrchestrator:
     """Orchestrates multi-tenant scraping across all verticals and scrapers"""
 
     def __init__(self, verticals: List[str] = None, scrapers: List[str] = None,
-                 skip_errors: bool = True, delay_between_runs: int = 5):
+                 skip_errors: bool = True, delay_between_runs: int = 5,
+                 shared_bizbuysell: bool = True, queue_workers: int = 0,
+                 queue_host: str = '127.0.0.1', queue_port: Optional[int] = None,
+                 queue_reset: bool = False):
         """
         Initialize orchestrator
 
@@ -86,11 +98,24 @@ class ScraperOrchestrator:
             scrapers: List of scrapers to run (default: all)
             skip_errors: Continue on errors (default: True)
             delay_between_runs: Seconds to wait between scraper runs (default: 5)
+            shared_bizbuysell: Crawl BizBuySell once for all verticals (default: True)
+            queue_workers: Local queue worker processes; with these (or a
+                           queue_port) the shared BizBuySell crawl and the
+                           specialized brokers run as queue tasks
+            queue_host: Interface the queue server binds (0.0.0.0 for remote workers)
+            queue_port: Queue server port remote workers connect to
+            queue_reset: Cancel unfinished tasks left in the queue file by
+                         earlier runs (only when no other run is using it)
         """
         self.verticals = verticals or VERTICALS
         self.scrapers = scrapers or list(SCRAPERS.keys())
         self.skip_errors = skip_errors
         self.delay_between_runs = delay_between_runs
+        self.shared_bizbuysell = shared_bizbuysell
+        self.queue_workers = queue_workers
+        self.queue_host = queue_host
+        self.queue_port = queue_port
+        self.queue_reset = queue_reset
 
         # Validate inputs
         for vertical in self.verticals:
@@ -105,9 +130,66 @@ class ScraperOrchestrator:
         self.results = []
         self.start_time = None
         self.end_time = None
+        self.bizbuysell_results = {}  # Per-vertical results from the shared crawl
+        self.specialized_results = {}  # Per-vertical results from queued specialized tasks
+        self.coordinator = None  # QueueCoordinator while a queued run is active
+
+    def run_bizbuysell_shared(self, config: Dict = None):
+        """Crawl BizBuySell once and classify into all selected verticals"""
+        cfg = SCRAPERS['bizbuysell']['default_config'].copy()
+        if config:
+            cfg.update(config)
+
+        print(f"{Fore.CYAN}▶ Running shared BizBuySell crawl for {', '.join(VERTICAL_NAMES[v] for v in self.verticals)}...")
+        print(f"{Fore.CYAN}  Config: {cfg}\n")
+
+        try:
+            from bizbuysell_scraper_v2 import run_shared_crawl
+
+            scrapers = run_shared_crawl(
+                self.verticals,
+                max_pages=cfg['max_pages'],
+                workers=cfg['workers'],
+                engine=cfg['engine'],
+                narrow=cfg['narrow'],
+                full_sweep=cfg['full_sweep'],
+                max_in_flight=cfg['max_in_flight'],
+                cache=cfg['cache'],
+                replay=cfg['replay'],
+                archive_raw=cfg['archive_raw'],
+                enrich_details=cfg['enrich_details'],
+                detail_in_flight=cfg['detail_in_flight'],
+                shard_locations=cfg['shard_locations'],
+                page_source=self.coordinator.iter_pages if self.coordinator else None
+            )
+
+            for vertical, scraper in scrapers.items():
+                self.bizbuysell_results[vertical] = {
+                    'vertical': vertical,
+                    'scraper': 'bizbuysell',
+                    'status': 'success',
+                    'listings': scraper.stats['matched'],
+                    'error': None
+                }
+
+        except Exception as e:
+            error_msg = str(e)
+            print(f"{Fore.RED}✗ Shared BizBuySell crawl failed: {error_msg}\n")
+
+            for vertical in self.verticals:
+                self.bizbuysell_results.setdefault(vertical, {
+                    'vertical': vertical,
+                    'scraper': 'bizbuysell',
+                    'status': 'failed',
+                    'listings': 0,
+                    'error': error_msg
+                })
 
     def run_bizbuysell(self, vertical: str, config: Dict = None):
         """Run BizBuySell scraper for a vertical"""
+        if vertical in self.bizbuysell_results:
+            return self.bizbuysell_results[vertical]
+
         try:
             from bizbuysell_scraper_v2 import BizBuySellScraperV2
 
@@ -119,13 +201,17 @@ class ScraperOrchestrator:
             print(f"{Fore.CYAN}  Config: {cfg}\n")
 
             scraper = BizBuySellScraperV2(vertical_slug=vertical)
-            scraper.run(max_pages=cfg['max_pages'], workers=cfg['workers'])
+            scraper.run(max_pages=cfg['max_pages'], workers=cfg['workers'], engine=cfg['engine'],
+                        narrow=cfg['narrow'], full_sweep=cfg['full_sweep'],
+                        max_in_flight=cfg['max_in_flight'], cache=cfg['cache'], replay=cfg['replay'],
+                        archive_raw=cfg['archive_raw'], enrich_details=cfg['enrich_details'],
+                        detail_in_flight=cfg['detail_in_flight'], shard_locations=cfg['shard_locations'])
 
             return {
                 'vertical': vertical,
                 'scraper': 'bizbuysell',
                 'status': 'success',
-                'listings': scraper.stats['new_listings'],
+                'listings': scraper.stats['matched'],
                 'error': None
             }
 
@@ -141,8 +227,43 @@ class ScraperOrchestrator:
                 'error': error_msg
             }
 
+    def run_specialized_queued(self, config: Dict = None):
+        """Scrape every (vertical, broker) pair as a queue task"""
+        cfg = SCRAPERS['specialized']['default_config'].copy()
+        if config:
+            cfg.update(config)
+
+        print(f"{Fore.CYAN}▶ Queueing Specialized Brokers for {', '.join(VERTICAL_NAMES[v] for v in self.verticals)}...\n")
+
+        try:
+            results = self.coordinator.run_specialized(self.verticals, save_to_db=cfg['save_to_db'])
+            for vertical, result in results.items():
+                self.specialized_results[vertical] = {
+                    'vertical': vertical,
+                    'scraper': 'specialized',
+                    'status': 'success',
+                    'listings': result['listings'],
+                    'error': '; '.join(result['errors']) or None
+                }
+
+        except Exception as e:
+            error_msg = str(e)
+            print(f"{Fore.RED}✗ Queued specialized scrapers failed: {error_msg}\n")
+
+            for vertical in self.verticals:
+                self.specialized_results.setdefault(vertical, {
+                    'vertical': vertical,
+                    'scraper': 'specialized',
+                    'status': 'failed',
+                    'listings': 0,
+                    'error': error_msg
+                })
+
     def run_specialized(self, vertical: str, config: Dict = None):
         """Run specialized scrapers for a vertical"""
+        if vertical in self.specialized_results:
+            return self.specialized_results[vertical]
+
         try:
             from specialized_scrapers_v2 import scrape_all_specialized_brokers
 
@@ -226,6 +347,7 @@ class ScraperOrchestrator:
 
     def run_scraper(self, scraper_type: str, vertical: str, config: Dict = None):
         """Run a specific scraper for a vertical"""
+        REGISTRY.refresh()  # Pick up keyword changes between runs
         if scraper_type == 'bizbuysell':
             return self.run_bizbuysell(vertical, config)
         elif scraper_type == 'specialized':
@@ -253,59 +375,84 @@ class ScraperOrchestrator:
         print(f"{Fore.GREEN}Started: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{Fore.GREEN}{'='*70}\n")
 
-        # Run each scraper for each vertical
-        total_runs = len(self.verticals) * len(self.scrapers)
-        current_run = 0
-
-        for vertical in self.verticals:
-            print(f"\n{Fore.YELLOW}{'='*70}")
-            print(f"{Fore.YELLOW}VERTICAL: {VERTICAL_NAMES[vertical].upper()}")
-            print(f"{Fore.YELLOW}{'='*70}\n")
+        if self.queue_workers or self.queue_port is not None:
+            from queue_coordinator import QueueCoordinator
+            self.coordinator = QueueCoordinator(local_workers=self.queue_workers, host=self.queue_host,
+                                                port=self.queue_port or 0, reset=self.queue_reset).start()
 
-            for scraper_type in self.scrapers:
-                current_run += 1
-
-                print(f"\n{Fore.CYAN}[{current_run}/{total_runs}] {SCRAPERS[scraper_type]['name']} → {VERTICAL_NAMES[vertical]}")
-                print(f"{Fore.CYAN}{'-'*70}\n")
-
-                # Get scraper-specific config
-                config = None
-                if scraper_configs and scraper_type in scraper_configs:
-                    config = scraper_configs[scraper_type]
-
-                # Run scraper
-                try:
-                    result = self.run_scraper(scraper_type, vertical, config)
-                    self.results.append(result)
-
-                    # Print result
-                    if result['status'] == 'success':
-                        print(f"{Fore.GREEN}✓ {SCRAPERS[scraper_type]['name']} completed: {result['listings']} listings")
-                    else:
-                        print(f"{Fore.RED}✗ {SCRAPERS[scraper_type]['name']} failed: {result['error']}")
+        try:
+            # One BizBuySell crawl serves every vertical
+            if self.shared_bizbuysell and 'bizbuysell' in self.scrapers:
+                config = scraper_configs.get('bizbuysell') if scraper_configs else None
+                self.run_bizbuysell_shared(config)
+
+            # Queue workers take all verticals' specialized brokers at once
+            if self.coordinator and 'specialized' in self.scrapers:
+                config = scraper_configs.get('specialized') if scraper_configs else None
+                self.run_specialized_queued(config)
+
+            # Run each scraper for each vertical
+            total_runs = len(self.verticals) * len(self.scrapers)
+            current_run = 0
+
+            for vertical in self.verticals:
+                print(f"\n{Fore.YELLOW}{'='*70}")
+                print(f"{Fore.YELLOW}VERTICAL: {VERTICAL_NAMES[vertical].upper()}")
+                print(f"{Fore.YELLOW}{'='*70}\n")
+
+                for scraper_type in self.scrapers:
+                    current_run += 1
+
+                    print(f"\n{Fore.CYAN}[{current_run}/{total_runs}] {SCRAPERS[scraper_type]['name']} → {VERTICAL_NAMES[vertical]}")
+                    print(f"{Fore.CYAN}{'-'*70}\n")
+
+                    # Get scraper-specific config
+                    config = None
+                    if scraper_configs and scraper_type in scraper_configs:
+                        config = scraper_configs[scraper_type]
+
+                    # Shared-crawl / queued results are already in; no run (or delay) needed
+                    prefetched = (scraper_type == 'bizbuysell' and vertical in self.bizbuysell_results) or \
+                        (scraper_type == 'specialized' and vertical in self.specialized_results)
+
+                    # Run scraper
+                    try:
+                        result = self.run_scraper(scraper_type, vertical, config)
+                        self.results.append(result)
+
+                        # Print result
+                        if result['status'] == 'success':
+                            print(f"{Fore.GREEN}✓ {SCRAPERS[scraper_type]['name']} completed: {result['listings']} listings")
+                        else:
+                            print(f"{Fore.RED}✗ {SCRAPERS[scraper_type]['name']} failed: {result['error']}")
+
+                            if not self.skip_errors:
+                                raise Exception(f"Scraper failed: {result['error']}")
+
+                    except Exception as e:
+                        error_msg = str(e)
+                        print(f"{Fore.RED}✗ Exception running {scraper_type}: {error_msg}")
+
+                        self.results.append({
+                            'vertical': vertical,
+                            'scraper': scraper_type,
+                            'status': 'failed',
+                            'listings': 0,
+                            'error': error_msg
+                        })
 
                         if not self.skip_errors:
-                            raise Exception(f"Scraper failed: {result['error']}")
-
-                except Exception as e:
-                    error_msg = str(e)
-                    print(f"{Fore.RED}✗ Exception running {scraper_type}: {error_msg}")
+                            raise
 
-                    self.results.append({
-                        'vertical': vertical,
-                        'scraper': scraper_type,
-                        'status': 'failed',
-                        'listings': 0,
-                        'error': error_msg
-                    })
+                    # Delay between runs
+                    if current_run < total_runs and not prefetched:
+                        print(f"\n{Fore.CYAN}⏳ Waiting {self.delay_between_runs} seconds before next run...\n")
+                        time.sleep(self.delay_between_runs)
 
-                    if not self.skip_errors:
-                        raise
-
-                # Delay between runs
-                if current_run < total_runs:
-                    print(f"\n{Fore.CYAN}⏳ Waiting {self.delay_between_runs} seconds before next run...\n")
-                    time.sleep(self.delay_between_runs)
+        finally:
+            if self.coordinator:
+                self.coordinator.stop()
+                self.coordinator = None
 
         self.end_time = datetime.now()
         self.print_summary()
@@ -370,6 +517,12 @@ Examples:
   # Run cleaning and landscape only
   python orchestrator.py --verticals cleaning landscape
 
+  # BizBuySell and specialized brokers on 8 local queue workers
+  python orchestrator.py --scrapers bizbuysell specialized --queue-workers 8
+
+  # Same, with workers on other hosts joining via queue_worker.py (same token on every host)
+  SCRAPER_QUEUE_TOKEN=<secret> python orchestrator.py --queue-workers 4 --queue-host 0.0.0.0 --queue-port 8770
+
   # Custom config: limit BizBuySell to 50 pages, unified to 5 brokers
   python orchestrator.py --bizbuysell-pages 50 --unified-top-n 5
         """
@@ -406,6 +559,34 @@ Examples:
         help='Seconds to wait between scraper runs (default: 5)'
     )
 
+    parser.add_argument(
+        '--queue-workers',
+        type=int,
+        default=0,
+        help='Run BizBuySell shards and specialized brokers as queue tasks on N local worker processes'
+    )
+
+    parser.add_argument(
+        '--queue-port',
+        type=int,
+        default=None,
+        help='Serve the work queue on this port so workers on other hosts can join (implies queue mode)'
+    )
+
+    parser.add_argument(
+        '--queue-host',
+        type=str,
+        default='127.0.0.1',
+        help='Interface the work queue binds; use 0.0.0.0 with --queue-port for remote workers '
+             '(needs SCRAPER_QUEUE_TOKEN)'
+    )
+
+    parser.add_argument(
+        '--queue-reset',
+        action='store_true',
+        help='Cancel unfinished tasks a crashed run left in the work queue (not while another run uses it)'
+    )
+
     # BizBuySell config
     parser.add_argument(
         '--bizbuysell-pages',
@@ -418,7 +599,76 @@ Examples:
         '--bizbuysell-workers',
         type=int,
         default=10,
-        help='Worker threads for BizBuySell (default: 10)'
+        help='Starting requests in flight (async) or worker threads (threads) for BizBuySell (default: 10)'
+    )
+
+    parser.add_argument(
+        '--bizbuysell-max-in-flight',
+        type=int,
+        default=100,
+        help='Ceiling the async BizBuySell engine may grow to while the API stays healthy (default: 100)'
+    )
+
+    parser.add_argument(
+        '--bizbuysell-no-cache',
+        action='store_true',
+        help='Always hit the BizBuySell API instead of reusing cached search responses'
+    )
+
+    parser.add_argument(
+        '--bizbuysell-replay',
+        action='store_true',
+        help='Serve BizBuySell search pages from the response cache with no API calls'
+    )
+
+    parser.add_argument(
+        '--bizbuysell-archive-raw',
+        action='store_true',
+        help='Keep the full BizBuySell search payload of each listing in custom_fields'
+    )
+
+    parser.add_argument(
+        '--bizbuysell-enrich-details',
+        action='store_true',
+        help='Fetch detail pages of matched BizBuySell listings (cached per listing)'
+    )
+
+    parser.add_argument(
+        '--bizbuysell-detail-in-flight',
+        type=int,
+        default=8,
+        help='Concurrent BizBuySell detail page requests (default: 8)'
+    )
+
+    parser.add_argument(
+        '--no-shared-bizbuysell',
+        action='store_true',
+        help='Crawl BizBuySell separately for each vertical instead of once for all'
+    )
+
+    parser.add_argument(
+        '--bizbuysell-engine',
+        choices=['async', 'threads'],
+        default='async',
+        help='BizBuySell fetch engine (default: async)'
+    )
+
+    parser.add_argument(
+        '--bizbuysell-narrow',
+        action='store_true',
+        help='Use category/keyword search queries instead of the full BizBuySell feed'
+    )
+
+    parser.add_argument(
+        '--bizbuysell-shard-locations',
+        action='store_true',
+        help='Crawl BizBuySell by region/state shards in parallel (max pages applies per shard)'
+    )
+
+    parser.add_argument(
+        '--bizbuysell-full-sweep',
+        action='store_true',
+        help='Search the full 60-day BizBuySell window instead of only since the last completed run'
     )
 
     # Unified scraper config
@@ -436,12 +686,25 @@ Examples:
     )
 
     args = parser.parse_args()
+    if not QUEUE_TOKEN and not is_loopback_host(args.queue_host):
+        parser.error(f"--queue-host {args.queue_host} needs SCRAPER_QUEUE_TOKEN "
+                     f"(a shared secret set on the coordinator and every worker)")
 
     # Build scraper configs
     scraper_configs = {
         'bizbuysell': {
             'max_pages': args.bizbuysell_pages,
-            'workers': args.bizbuysell_workers
+            'workers': args.bizbuysell_workers,
+            'engine': args.bizbuysell_engine,
+            'narrow': args.bizbuysell_narrow,
+            'full_sweep': args.bizbuysell_full_sweep,
+            'max_in_flight': args.bizbuysell_max_in_flight,
+            'cache': not args.bizbuysell_no_cache,
+            'replay': args.bizbuysell_replay,
+            'archive_raw': args.bizbuysell_archive_raw,
+            'enrich_details': args.bizbuysell_enrich_details,
+            'detail_in_flight': args.bizbuysell_detail_in_flight,
+            'shard_locations': args.bizbuysell_shard_locations
         },
         'unified': {
             'top_n': args.unified_top_n,
@@ -454,7 +717,12 @@ Examples:
         verticals=args.verticals,
         scrapers=args.scrapers,
         skip_errors=not args.no_skip_errors,
-        delay_between_runs=args.delay
+        delay_between_runs=args.delay,
+        shared_bizbuysell=not args.no_shared_bizbuysell,
+        queue_workers=args.queue_workers,
+        queue_host=args.queue_host,
+        queue_port=args.queue_port,
+        queue_reset=args.queue_reset
     )
 
     orchestrator.run(scraper_configs=scraper_configs)
@@ -0,0 +1,118 @@
+"""
+Page Planner
+Probes paginated search results in windows and learns where the result set ends
+Pages past the learned end are never requested
+"""
+
+import math
+from typing import Any, Dict, List, Optional
+
+
+# Keys the search API has used for the overall result count
+TOTAL_COUNT_KEYS = ('totalCount', 'totalRecords', 'totalResults', 'total', 'count')
+
+
+def extract_total_count(data: Dict[str, Any]) -> Optional[int]:
+    """Find the total result count in a BbsBfsSearchResults response, if present"""
+    value = (data or {}).get('value') or {}
+    candidates = [value.get('bfsSearchResult') or {}, value, data or {}]
+    for container in candidates:
+        if not isinstance(container, dict):
+            continue
+        for key in TOTAL_COUNT_KEYS:
+            total = container.get(key)
+            if isinstance(total, (int, float)) and not isinstance(total, bool) and total >= 0:
+                return int(total)
+    return None
+
+
+# ============================================================================
+# PAGE PLANNER
+# ============================================================================
+
+class PagePlanner:
+    """Hands out page windows until the end of the result set is known"""
+
+    def __init__(self, max_pages: int, window: int = 10, page_size: Optional[int] = None):
+        """
+        Initialize planner
+
+        Args:
+            max_pages: Hard cap on pages (the old range(1, max_pages + 1))
+            window: Pages requested per probe window (default: 10)
+            page_size: Nominal results per page, when the request fixes it.
+                       Without it a total count cannot be turned into a last
+                       page and only an empty page ends the crawl
+        """
+        self.max_pages = max_pages
+        self.window = max(1, window)
+
+        self.next_page = 1
+        self.last_page: Optional[int] = None
+        self.page_size = page_size
+        self.total_count: Optional[int] = None
+        self.pages_requested = 0
+
+    @property
+    def end_page(self) -> int:
+        """Last page worth requesting given what is known so far"""
+        if self.last_page is None:
+            return self.max_pages
+        return min(self.last_page, self.max_pages)
+
+    @property
+    def done(self) -> bool:
+        return self.next_page > self.end_page
+
+    @property
+    def requests_saved(self) -> int:
+        return max(0, self.max_pages - self.pages_requested)
+
+    def next_window(self) -> List[int]:
+        """Next batch of page numbers to request (empty when done)"""
+        if self.done:
+            return []
+        first = self.next_page
+        last = min(first + self.window - 1, self.end_page)
+        self.next_page = last + 1
+        self.pages_requested += last - first + 1
+        return list(range(first, last + 1))
+
+    @property
+    def truncated(self) -> bool:
+        """
+        More results exist past max_pages
+
+        Known before the crawl finishes when a total count was reported and
+        the page size is known; otherwise a crawl that used every page without seeing an empty one
+        counts as truncated.
+        """
+        if self.last_page is not None:
+            return self.last_page > self.max_pages
+        return self.done
+
+    def is_past_end(self, page_number: int) -> bool:
+        return self.last_page is not None and page_number > self.last_page
+
+    def record(self, page_number: int, listing_count: int, total_count: Optional[int] = None):
+        """
+        Record a successful page response
+
+        An empty page, or a total count with a known nominal page size, pins
+        down the last page. Observed page sizes are not used: pages carry a
+        varying number of inline placements, so sizes seen on early pages
+        can overstate the page size and put the end too early. Short pages
+        are not trusted for the same reason. Failed requests must not be
+        recorded - they say nothing about where the results end.
+        """
+        if total_count is not None:
+            self.total_count = total_count
+            if self.page_size:
+                self._set_last_page(max(0, math.ceil(total_count / self.page_size)))
+
+        if listing_count == 0:
+            self._set_last_page(page_number - 1)
+
+    def _set_last_page(self, page_number: int):
+        if self.last_page is None or page_number < self.last_page:
+            self.last_page = page_number
@@ -0,0 +1,159 @@
+"""
+Streaming Pipeline
+Bounded queues between the fetch, filter/normalize and save stages
+- iter_in_background: run a producer in a thread and iterate what it emits
+- BatchSink: background writer that flushes rows as they arrive, coalescing into batches
+Memory stays flat: at most queue_size items wait between two stages
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Iterator, List, Optional
+
+
+# Pages waiting between the crawl and filter/normalize
+PAGE_QUEUE_SIZE = 32
+
+# Normalized rows waiting for the database writer
+ROW_QUEUE_SIZE = 2000
+
+_DONE = object()
+
+
+class PipelineClosed(Exception):
+    """Raised inside a producer when its consumer stopped iterating"""
+
+
+def iter_in_background(produce: Callable[[Callable[[Any], None]], None],
+                       queue_size: int = PAGE_QUEUE_SIZE) -> Iterator[Any]:
+    """
+    Run produce(emit) in a worker thread and yield each emitted item
+
+    emit() blocks while queue_size items are waiting (backpressure). If the
+    consumer stops early, the next emit() raises PipelineClosed so the
+    producer unwinds. Producer exceptions are re-raised in the consumer.
+    """
+    items: queue.Queue = queue.Queue(maxsize=queue_size)
+    closed = threading.Event()
+    failure: List[BaseException] = []
+
+    def emit(item: Any):
+        while True:
+            if closed.is_set():
+                raise PipelineClosed()
+            try:
+                items.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def worker():
+        try:
+            produce(emit)
+        except PipelineClosed:
+            pass
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            while not closed.is_set():
+                try:
+                    items.put(_DONE, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+
+    thread = threading.Thread(target=worker, name='pipeline-producer', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        closed.set()
+        thread.join()
+
+    if failure:
+        raise failure[0]
+
+
+# ============================================================================
+# BATCH SINK
+# ============================================================================
+
+class BatchSink:
+    """
+    Writes rows on a background thread as soon as they are queued
+
+    Whatever is waiting (up to batch_size) goes out in one write, so a slow
+    database gets bigger batches and a fast one sees rows almost immediately.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Any]], None], batch_size: int = 500,
+                 queue_size: int = ROW_QUEUE_SIZE):
+        """
+        Initialize sink
+
+        Args:
+            write_batch: Called with each batch; must handle its own errors
+            batch_size: Largest batch handed to write_batch
+            queue_size: Rows that may wait before put() blocks
+        """
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.rows: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.rows_written = 0
+        self.batches_written = 0
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._drain, name='pipeline-sink', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def put(self, row: Any):
+        if self._error:
+            raise self._error
+        self.rows.put(row)
+
+    def put_many(self, rows: List[Any]):
+        for row in rows:
+            self.put(row)
+
+    def close(self):
+        """Flush everything queued and stop the writer"""
+        if self._thread.is_alive():
+            self.rows.put(_DONE)
+            self._thread.join()
+        if self._error:
+            raise self._error
+
+    def _drain(self):
+        done = False
+        while not done:
+            batch = []
+            item = self.rows.get()
+            while True:
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.rows.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.write_batch(batch)
+                except BaseException as e:
+                    self._error = e
+                    # Keep draining so producers blocked on put() are released
+                    continue
+                self.rows_written += len(batch)
+                self.batches_written += 1
@@ -0,0 +1,198 @@
+"""
+Proxy Pool
+Health-scored outbound proxies for the BizBuySell clients
+- Configured from BBS_PROXIES (comma/newline separated), BBS_PROXY_FILE or the legacy PROXY_URL
+- Rolling (EWMA) latency and error rate per proxy; requests are spread across proxies
+  weighted by score, so fast healthy exits carry most of the load
+- Proxies past the failure thresholds are ejected and re-admitted after a cooldown
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+DEFAULT_COOLDOWN = float(os.getenv('BBS_PROXY_COOLDOWN', '120'))
+
+# EWMA weight of the newest sample
+SCORE_ALPHA = 0.3
+
+
+def normalize_proxy(proxy: str) -> Optional[str]:
+    """Strip whitespace/comments and default the scheme to http://"""
+    proxy = proxy.split('#', 1)[0].strip()
+    if not proxy:
+        return None
+    if '://' not in proxy:
+        proxy = 'http://' + proxy
+    return proxy
+
+
+def load_proxies(path: Optional[str] = None) -> List[str]:
+    """
+    Proxy URLs from a file (one per line) or the environment
+
+    Precedence: path argument, BBS_PROXY_FILE, BBS_PROXIES, PROXY_URL.
+    """
+    path = path or os.getenv('BBS_PROXY_FILE')
+    if path:
+        with open(path, encoding='utf-8') as f:
+            raw = f.read().splitlines()
+    else:
+        raw = os.getenv('BBS_PROXIES', '').replace(',', '\n').splitlines() or [os.getenv('PROXY_URL', '')]
+
+    proxies = []
+    for entry in raw:
+        proxy = normalize_proxy(entry)
+        if proxy and proxy not in proxies:
+            proxies.append(proxy)
+    return proxies
+
+
+def as_requests_proxies(proxy: Optional[str]) -> Optional[Dict[str, str]]:
+    """curl_cffi/requests `proxies=` mapping for a proxy URL"""
+    return {'http': proxy, 'https': proxy} if proxy else None
+
+
+# ============================================================================
+# PROXY STATE
+# ============================================================================
+
+class ProxyState:
+    """Rolling health of one proxy"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None   # EWMA seconds, successful requests only
+        self.error_rate = 0.0                  # EWMA of failures (0..1)
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    @property
+    def label(self) -> str:
+        """URL without credentials, for logs"""
+        scheme, _, rest = self.url.partition('://')
+        return f"{scheme}://{rest.rsplit('@', 1)[-1]}"
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def score(self, default_latency: float) -> float:
+        """Lower is better: latency inflated by error rate and current load"""
+        latency = self.latency if self.latency is not None else default_latency
+        return latency * (1 + 4 * self.error_rate) * (1 + self.in_flight)
+
+
+# ============================================================================
+# PROXY POOL
+# ============================================================================
+
+class ProxyPool:
+    """Per-request proxy assignment with health scoring, ejection and cooldown"""
+
+    def __init__(self, proxies: List[str], max_consecutive_failures: int = 3,
+                 max_error_rate: float = 0.5, min_samples: int = 5,
+                 cooldown: float = DEFAULT_COOLDOWN, log=None):
+        """
+        Initialize pool
+
+        Args:
+            proxies: Proxy URLs (scheme://[user:pass@]host:port)
+            max_consecutive_failures: Eject after this many failures in a row
+            max_error_rate: Eject when the rolling error rate passes this...
+            min_samples: ...once the proxy has served this many requests
+            cooldown: Seconds an ejected proxy sits out (doubles on repeat ejections, max 8x)
+            log: Optional callable(level, message)
+        """
+        self.proxies = [ProxyState(url) for url in proxies]
+        self.max_consecutive_failures = max_consecutive_failures
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.log = log or (lambda level, message: None)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, path: Optional[str] = None, log=None) -> Optional['ProxyPool']:
+        """Pool from BBS_PROXY_FILE / BBS_PROXIES / PROXY_URL, or None when none are configured"""
+        proxies = load_proxies(path)
+        return cls(proxies, log=log) if proxies else None
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    def acquire(self) -> ProxyState:
+        """
+        Proxy for the next request, picked with probability ~ 1/score
+
+        If every proxy is ejected, the one due back first is used rather than
+        stalling the run.
+        """
+        with self._lock:
+            now = time.monotonic()
+            available = [p for p in self.proxies if p.is_available(now)]
+            if available:
+                known = [p.latency for p in available if p.latency is not None]
+                # Untried proxies look better than the best known one so they are explored early
+                default_latency = min(known) / 2 if known else 1.0
+                weights = [1.0 / max(p.score(default_latency), 1e-6) for p in available]
+                proxy = random.choices(available, weights=weights)[0]
+            else:
+                proxy = min(self.proxies, key=lambda p: p.ejected_until)
+            proxy.in_flight += 1
+            proxy.requests += 1
+            return proxy
+
+    def release(self, proxy: ProxyState, ok: bool, latency: Optional[float] = None):
+        """
+        Report how a request through proxy went
+
+        Args:
+            proxy: State returned by acquire()
+            ok: False for network errors, timeouts, 429/5xx and blocks
+            latency: Seconds the request took (successful requests)
+        """
+        with self._lock:
+            proxy.in_flight = max(0, proxy.in_flight - 1)
+            proxy.error_rate = (1 - SCORE_ALPHA) * proxy.error_rate + SCORE_ALPHA * (0.0 if ok else 1.0)
+            if ok:
+                proxy.consecutive_failures = 0
+                if latency is not None:
+                    proxy.latency = latency if proxy.latency is None else \
+                        (1 - SCORE_ALPHA) * proxy.latency + SCORE_ALPHA * latency
+                return
+
+            proxy.failures += 1
+            proxy.consecutive_failures += 1
+            if (proxy.consecutive_failures >= self.max_consecutive_failures or
+                    (proxy.requests >= self.min_samples and proxy.error_rate > self.max_error_rate)):
+                self._eject(proxy)
+
+    def _eject(self, proxy: ProxyState):
+        now = time.monotonic()
+        if not proxy.is_available(now):
+            return
+        cooldown = self.cooldown * min(8, 2 ** proxy.ejections)
+        proxy.ejected_until = now + cooldown
+        proxy.ejections += 1
+        # Re-admitted with a clean slate; a still-broken proxy is ejected again quickly
+        proxy.consecutive_failures = 0
+        proxy.error_rate = 0.0
+        proxy.latency = None
+        self.log('warning', f"Proxy {proxy.label} ejected for {cooldown:.0f}s "
+                            f"({proxy.failures}/{proxy.requests} failed)")
+
+    def summary(self) -> str:
+        parts = []
+        now = time.monotonic()
+        for p in self.proxies:
+            latency = f"{p.latency * 1000:.0f}ms" if p.latency is not None else '-'
+            state = '' if p.is_available(now) else ' ejected'
+            parts.append(f"{p.label} {p.requests - p.failures}/{p.requests} ok {latency}{state}")
+        return '; '.join(parts)
@@ -0,0 +1,80 @@
+"""
+Query Planner
+Turns vertical configs into narrowed BizBuySell search criteria
+Uses bizbuysell_categories and include_keywords so the API does the first cut
+"""
+
+import re
+from typing import Any, Dict, List
+
+
+# Empty criteria = the unfiltered national feed
+FULL_CRAWL: Dict[str, Any] = {}
+
+
+def reduce_keywords(keywords: List[str]) -> List[str]:
+    """
+    Drop keywords already covered by a shorter keyword
+
+    A keyword search for 'cleaning' also returns 'carpet cleaning' listings,
+    so 'carpet cleaning' would only re-download the same pages.
+    """
+    unique = []
+    for keyword in keywords:
+        keyword = keyword.strip().lower()
+        if keyword and keyword not in unique:
+            unique.append(keyword)
+
+    reduced = []
+    for keyword in sorted(unique, key=len):
+        covered = any(re.search(rf'\b{re.escape(shorter)}\b', keyword) for shorter in reduced)
+        if not covered:
+            reduced.append(keyword)
+
+    # Keep config order for readable logs
+    return [k for k in unique if k in reduced]
+
+
+def plan_queries(vertical_configs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Build narrowed search criteria for one or more verticals
+
+    One query carries every BizBuySell category of the verticals; each
+    remaining include keyword becomes its own keyword query.
+
+    Args:
+        vertical_configs: VERTICAL_CONFIGS entries
+
+    Returns:
+        List of bfsSearchCriteria overrides
+    """
+    categories = []
+    keywords = []
+    for config in vertical_configs:
+        for category in config.get('bizbuysell_categories') or []:
+            if category not in categories:
+                categories.append(category)
+        keywords.extend(config.get('include_keywords') or [])
+
+    queries = []
+    if categories:
+        queries.append({'categories': categories})
+    for keyword in reduce_keywords(keywords):
+        queries.append({'keyword': keyword})
+
+    return queries
+
+
+def describe_query(criteria: Dict[str, Any]) -> str:
+    """Short label for logs"""
+    if not criteria:
+        return 'full crawl'
+    parts = []
+    for key, value in criteria.items():
+        if key == 'excludeLocations':
+            parts.append(f"outside {len(value or [])} locations")
+            continue
+        if isinstance(value, list):
+            value = ','.join(str(v.get('stateCode', v)) if isinstance(v, dict) else str(v) for v in value)
+        parts.append(f"{key}={value}")
+    return ' '.join(parts)
@@ -0,0 +1,266 @@
+"""
+Queue Coordinator
+Fans scraper work out to queue workers and collects their results
+- Owns the SQLite queue and serves it over HTTP for workers on other hosts
+- Optionally starts N local worker processes (queue_worker.py)
+- Each coordinator has its own run id and token: stop() only shuts down
+  its own workers, and without SCRAPER_QUEUE_TOKEN a random token is made
+  for the local workers (remote workers need SCRAPER_QUEUE_TOKEN)
+- BizBuySell: every query is split into location shards, one task each;
+  listings stream back and are classified into all verticals here, so only
+  the coordinator writes BizBuySell rows. Shards past the page cap come back
+  as child shards and are queued again
+- Specialized brokers: one task per (vertical, broker), saved by the worker
+"""
+
+import os
+import secrets
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from colorama import Fore
+
+from location_planner import plan_location_shards
+from query_planner import FULL_CRAWL, describe_query
+from queue_worker import BIZBUYSELL_SHARD, SPECIALIZED_BROKER, default_worker_id
+from work_queue import (DEFAULT_QUEUE_PATH, LEASE_SECONDS, QUEUE_TOKEN, QueueServer, SqliteWorkQueue,
+                        is_loopback_host)
+
+# Default port remote workers connect to (0 = any free port, local workers only)
+DEFAULT_QUEUE_PORT = int(os.getenv('SCRAPER_QUEUE_PORT', '8770'))
+
+# Seconds between polls for finished tasks
+RESULT_POLL_INTERVAL = 0.25
+
+# Seconds between progress lines while waiting on workers
+PROGRESS_INTERVAL = 15.0
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'queue_worker.py')
+
+
+class QueueCoordinator:
+    """Runs the queue server and local workers for the length of an orchestrator run"""
+
+    def __init__(self, local_workers: int = 0, host: str = '127.0.0.1', port: int = 0,
+                 queue_path: str = DEFAULT_QUEUE_PATH, lease_seconds: int = LEASE_SECONDS,
+                 reset: bool = False):
+        """
+        Initialize coordinator
+
+        Args:
+            local_workers: Worker processes to start on this host
+            host: Interface the queue server binds (0.0.0.0 for remote workers)
+            port: Queue server port (0 = any free port)
+            queue_path: SQLite queue file
+            lease_seconds: Lease length passed to local workers
+            reset: Cancel every unfinished task in the queue file on start
+                   (leftovers of a crashed run). Only safe when no other run
+                   uses the same file - without it only this run's own jobs
+                   are ever cancelled
+        """
+        self.local_workers = local_workers
+        self.address = (host, port)
+        self.queue_path = queue_path
+        self.lease_seconds = lease_seconds
+        self.reset = reset
+        self.run_id = uuid.uuid4().hex[:12]
+        # A generated token can only reach local workers; off loopback QueueServer insists on SCRAPER_QUEUE_TOKEN
+        self.token = QUEUE_TOKEN or (secrets.token_urlsafe(24) if is_loopback_host(host) else None)
+        self.queue: Optional[SqliteWorkQueue] = None
+        self.server: Optional[QueueServer] = None
+        self.processes: List[subprocess.Popen] = []
+
+    def __enter__(self) -> 'QueueCoordinator':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self) -> 'QueueCoordinator':
+        self.queue = SqliteWorkQueue(self.queue_path)
+        counts = self.queue.counts()
+        leftover = counts.get('pending', 0) + counts.get('leased', 0)
+        if self.reset:
+            self.queue.cancel()
+            if leftover:
+                print(f"{Fore.YELLOW}Cancelled {leftover} unfinished tasks left in {self.queue_path}")
+        elif leftover:
+            # Could be another live run on the same file - leave them alone
+            print(f"{Fore.YELLOW}{leftover} unfinished tasks of other runs in {self.queue_path} "
+                  f"(cancel crashed runs' tasks with --queue-reset)")
+        self.server = QueueServer(self.address, self.queue, token=self.token, run=self.run_id).start()
+        print(f"{Fore.CYAN}Work queue at {self.server.url} ({self.queue_path}, run {self.run_id})")
+
+        worker_env = {**os.environ, 'SCRAPER_QUEUE_TOKEN': self.token}  # Env, not argv: ps shows argv
+        for i in range(self.local_workers):
+            self.processes.append(subprocess.Popen([
+                sys.executable, WORKER_SCRIPT, '--queue', self.server.url, '--run', self.run_id,
+                '--worker-id', f"{default_worker_id()}-w{i + 1}", '--lease', str(self.lease_seconds)
+            ], env=worker_env))
+        if self.local_workers:
+            print(f"{Fore.CYAN}Started {self.local_workers} local queue workers")
+        else:
+            print(f"{Fore.CYAN}No local workers - start them with: "
+                  f"python queue_worker.py --queue http://<this-host>:{self.server.server_address[1]}")
+        return self
+
+    def stop(self, timeout: float = 30.0):
+        """Signal this run's workers to exit, wait for local ones, stop the server"""
+        if self.queue is None:
+            return
+        self.queue.shutdown(self.run_id)
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            try:
+                process.wait(max(0.1, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.terminate()
+        self.processes = []
+        self.server.stop()
+        self.queue = None
+
+    # ------------------------------------------------------------------
+    # Job plumbing
+    # ------------------------------------------------------------------
+
+    def iter_finished(self, job: str, log: Callable[[str, str], None]) -> Iterator[Dict[str, Any]]:
+        """
+        Finished tasks of a job as they come in, until none are pending or leased
+
+        Tasks the consumer enqueues for the same job while iterating are
+        waited for as well.
+        """
+        after = 0
+        last_progress = time.monotonic()
+        while True:
+            idle = self.queue.outstanding(job) == 0
+            tasks = self.queue.finished(job, after)
+            for task in tasks:
+                after = task['finish_seq']
+                yield task
+            if idle and self.queue.outstanding(job) == 0:
+                return
+            if not tasks:
+                if time.monotonic() - last_progress > PROGRESS_INTERVAL:
+                    counts = self.queue.counts(job)
+                    log('info', f"Queue: {counts.get('done', 0)} done, {counts.get('leased', 0)} running, "
+                                f"{counts.get('pending', 0)} pending")
+                    last_progress = time.monotonic()
+                time.sleep(RESULT_POLL_INTERVAL)
+
+    # ------------------------------------------------------------------
+    # BizBuySell
+    # ------------------------------------------------------------------
+
+    def iter_pages(self, crawler, max_pages: int = 100, workers: int = 10, engine: str = 'async',
+                   queries: Optional[List[Dict[str, Any]]] = None, max_in_flight: int = 100,
+                   shard_locations: bool = True, **_) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Drop-in for crawler.iter_pages that crawls through queue workers
+
+        Every query is split into location shards regardless of
+        shard_locations - shards are the unit of work. Each finished shard
+        is yielded as one deduped page; crawl counters are summed into
+        crawler.stats.
+
+        Args:
+            crawler: BizBuySellScraperV2 holding the search window and stats
+            workers / engine / max_in_flight: Per worker process
+        """
+        from bizbuysell_scraper_v2 import CRAWL_STATS
+
+        job = f"bizbuysell-{uuid.uuid4().hex[:12]}"
+        base = {
+            'vertical': crawler.vertical_slug,
+            'max_pages': max_pages,
+            'workers': workers,
+            'engine': engine,
+            'max_in_flight': max_in_flight,
+            'days_listed_ago': crawler.days_listed_ago,
+            'archive_raw': crawler.archive_raw,
+            'cache': crawler.response_cache is not None,
+            'replay': crawler.replay,
+        }
+
+        def enqueue(shards):
+            self.queue.enqueue(job, BIZBUYSELL_SHARD, [{**base, 'criteria': shard} for shard in shards])
+
+        queries = queries or [FULL_CRAWL]
+        for key in CRAWL_STATS:
+            crawler.stats[key] = 0
+        enqueue([shard for query in queries for shard in plan_location_shards(query)])
+        crawler.log('info', f"Queued {self.queue.outstanding(job)} BizBuySell shards (job {job})")
+
+        started = time.perf_counter()
+        listing_ids: set = set()
+        fell_back = queries == [FULL_CRAWL]
+        try:
+            while True:
+                for task in self.iter_finished(job, crawler.log):
+                    criteria = task['payload']['criteria']
+                    if task['status'] != 'done':
+                        crawler.stats['pages_failed'] += 1
+                        crawler.log('error', f"Shard [{describe_query(criteria)}] failed after "
+                                             f"{task['attempts']} attempts: {task['error']}")
+                        continue
+                    result = task['result']
+                    if result['children']:
+                        enqueue(result['children'])
+                    for key, value in result['stats'].items():
+                        if key in ('final_in_flight', 'peak_in_flight'):
+                            crawler.stats[key] = max(crawler.stats[key], value)
+                        elif key != 'effective_rate':
+                            crawler.stats[key] += value
+                    page = crawler.dedupe_listings(result['listings'], listing_ids)
+                    if page:
+                        yield page
+
+                if listing_ids or fell_back:
+                    break
+                crawler.log('warning', 'Narrowed queries returned nothing - falling back to full crawl')
+                fell_back = True
+                enqueue(plan_location_shards())
+        finally:
+            self.queue.cancel(job)
+
+        elapsed = time.perf_counter() - started
+        crawler.stats['effective_rate'] = round(crawler.stats['pages_requested'] / elapsed, 1) if elapsed else 0.0
+        crawler.log('info', f"Queued crawl complete! {len(listing_ids)} unique listings from "
+                            f"{crawler.stats['shards']} shards in {elapsed:.1f}s")
+        self.queue.purge(job)
+
+    # ------------------------------------------------------------------
+    # Specialized brokers
+    # ------------------------------------------------------------------
+
+    def run_specialized(self, verticals: List[str], save_to_db: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Scrape every specialized broker for every vertical through the workers
+
+        Returns:
+            Per vertical: listings matched, and errors (brokers that failed)
+        """
+        from specialized_scrapers_v2 import SPECIALIZED_BROKERS
+
+        job = f"specialized-{uuid.uuid4().hex[:12]}"
+        self.queue.enqueue(job, SPECIALIZED_BROKER, [
+            {'vertical': vertical, 'broker': broker, 'save_to_db': save_to_db}
+            for vertical in verticals for broker in SPECIALIZED_BROKERS
+        ])
+        print(f"{Fore.CYAN}Queued {len(verticals) * len(SPECIALIZED_BROKERS)} specialized broker tasks (job {job})")
+
+        results = {vertical: {'listings': 0, 'errors': []} for vertical in verticals}
+
+        def log(level, message):
+            print(f"{Fore.CYAN}{message}")
+
+        for task in self.iter_finished(job, log):
+            payload = task['payload']
+            if task['status'] == 'done':
+                results[payload['vertical']]['listings'] += task['result']['listings']
+            else:
+                results[payload['vertical']]['errors'].append(f"{payload['broker']}: {task['error']}")
+        self.queue.purge(job)
+        return results
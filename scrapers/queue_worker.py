@@ -0,0 +1,225 @@
+"""
+Queue Worker
+Claims scraper tasks from a work queue and pushes results back
+- bizbuysell_shard: crawl one BizBuySell location shard, return its listings
+  (shards past the page cap come back as child shards for any worker)
+- specialized_broker: scrape and save one specialized broker for one vertical
+- Leases are kept alive by a heartbeat thread; a worker that dies simply
+  stops heartbeating and its task goes to another worker
+
+Run one per core on any host that can reach the coordinator, with the
+coordinator's SCRAPER_QUEUE_TOKEN set:
+    python queue_worker.py --queue http://coordinator:8770
+"""
+
+import argparse
+import os
+import socket
+import sys
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+from colorama import Fore, init
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from vertical_registry import REGISTRY
+from work_queue import LEASE_SECONDS, Heartbeat, open_queue
+
+# Initialize colorama
+init(autoreset=True)
+
+
+BIZBUYSELL_SHARD = 'bizbuysell_shard'
+SPECIALIZED_BROKER = 'specialized_broker'
+
+TASK_KINDS = [BIZBUYSELL_SHARD, SPECIALIZED_BROKER]
+
+# Seconds between claims while the queue is empty
+POLL_INTERVAL = float(os.getenv('SCRAPER_QUEUE_POLL', '1.0'))
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+# ============================================================================
+# TASK HANDLERS
+# ============================================================================
+
+class BizBuySellShardHandler:
+    """Crawls shards with one long-lived scraper per worker (token, proxies and cache are reused)"""
+
+    def __init__(self):
+        self.crawler = None
+
+    def __call__(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        from bizbuysell_scraper_v2 import CRAWL_STATS, BizBuySellScraperV2
+
+        if self.crawler is None:
+            self.crawler = BizBuySellScraperV2(vertical_slug=payload['vertical'])
+        crawler = self.crawler
+        if (payload.get('cache') or payload.get('replay')) and not crawler.response_cache:
+            crawler.enable_response_cache(replay=payload.get('replay', False))
+        crawler.days_listed_ago = payload['days_listed_ago']
+        crawler.archive_raw = payload.get('archive_raw', False)
+
+        listings, children = crawler.crawl_shard(
+            payload['criteria'],
+            max_pages=payload['max_pages'],
+            workers=payload['workers'],
+            engine=payload['engine'],
+            max_in_flight=payload['max_in_flight']
+        )
+        return {
+            'listings': listings,
+            'children': children,
+            'stats': {key: crawler.stats[key] for key in CRAWL_STATS}
+        }
+
+
+def run_specialized_broker(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Scrape one specialized broker into one vertical (saved by the worker)"""
+    from specialized_scrapers_v2 import SPECIALIZED_BROKERS, SpecializedScraperV2
+
+    scraper = SpecializedScraperV2(vertical_slug=payload['vertical'])
+    listings = scraper.scrape_broker(SPECIALIZED_BROKERS[payload['broker']], verbose=True)
+    if listings and payload.get('save_to_db', True):
+        scraper.save_to_supabase(listings, verbose=True)
+    return {'listings': len(listings or []), 'saved': scraper.stats['saved']}
+
+
+def default_handlers() -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    return {
+        BIZBUYSELL_SHARD: BizBuySellShardHandler(),
+        SPECIALIZED_BROKER: run_specialized_broker,
+    }
+
+
+# ============================================================================
+# WORKER LOOP
+# ============================================================================
+
+def run_worker(queue, worker_id: str = None, kinds: Optional[List[str]] = None,
+               lease_seconds: int = LEASE_SECONDS, idle_exit: Optional[float] = None,
+               handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = None,
+               run: Optional[str] = None) -> Dict[str, int]:
+    """
+    Claim and run tasks until the coordinator shuts the queue down
+
+    Args:
+        queue: SqliteWorkQueue or RemoteWorkQueue
+        worker_id: Lease owner name (default: host-pid)
+        kinds: Task kinds to accept (default: all with a handler)
+        lease_seconds: Lease length; heartbeats renew it every third of that
+        idle_exit: Also exit after this many seconds without a task
+        handlers: Task kind -> callable(payload) returning a JSON-able result
+        run: Coordinator run whose shutdown stops this worker (default: the
+             run serving the queue URL; none for a SQLite path)
+
+    Returns:
+        Counts of tasks done, failed and lost (lease taken over)
+    """
+    worker_id = worker_id or default_worker_id()
+    handlers = handlers or default_handlers()
+    kinds = kinds or list(handlers)
+    stats = {'done': 0, 'failed': 0, 'lost': 0}
+    idle_since = time.monotonic()
+
+    print(f"{Fore.CYAN}[{worker_id}] Worker started ({', '.join(kinds)})")
+    while True:
+        try:
+            if queue.is_shutdown(run):
+                break
+            task = queue.claim(worker_id, lease_seconds, kinds)
+        except (OSError, ConnectionError) as e:
+            print(f"{Fore.YELLOW}[{worker_id}] Queue unreachable: {e}")
+            task = None
+
+        if task is None:
+            if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                break
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        task_id = task['id']
+        REGISTRY.refresh()  # Keyword changes apply from the next task on
+        print(f"{Fore.CYAN}[{worker_id}] {task['kind']} {task_id[:8]} (attempt {task['attempts']})")
+        with Heartbeat(queue, task_id, worker_id, lease_seconds) as heartbeat:
+            try:
+                result = handlers[task['kind']](task['payload'])
+                error = None
+            except Exception as e:
+                traceback.print_exc()
+                result, error = None, f"{type(e).__name__}: {e}"
+
+        try:
+            if heartbeat.lost:
+                stats['lost'] += 1
+                print(f"{Fore.YELLOW}[{worker_id}] Lease on {task_id[:8]} was taken over - result dropped")
+            elif error:
+                stats['failed'] += 1
+                queue.fail(task_id, worker_id, error)
+                print(f"{Fore.RED}[{worker_id}] {task_id[:8]} failed: {error}")
+            elif queue.complete(task_id, worker_id, result):
+                stats['done'] += 1
+            else:
+                stats['lost'] += 1
+        except (OSError, ConnectionError) as e:
+            # The lease runs out and the task goes to another worker
+            stats['lost'] += 1
+            print(f"{Fore.YELLOW}[{worker_id}] Queue unreachable, {task_id[:8]} not reported: {e}")
+        idle_since = time.monotonic()
+
+    print(f"{Fore.CYAN}[{worker_id}] Worker stopped: {stats['done']} done, {stats['failed']} failed, "
+          f"{stats['lost']} lost")
+    return stats
+
+
+# ============================================================================
+# CLI INTERFACE
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper queue worker")
+    parser.add_argument(
+        '--queue',
+        type=str,
+        required=True,
+        help='Coordinator URL (http://host:port) or a SQLite queue file on this host'
+    )
+    parser.add_argument(
+        '--run',
+        type=str,
+        default=None,
+        help='Exit when this coordinator run stops (default: the run serving --queue)'
+    )
+    parser.add_argument(
+        '--worker-id',
+        type=str,
+        default=None,
+        help='Lease owner name (default: hostname-pid)'
+    )
+    parser.add_argument(
+        '--kinds',
+        nargs='+',
+        choices=TASK_KINDS,
+        default=None,
+        help='Task kinds to accept (default: all)'
+    )
+    parser.add_argument(
+        '--lease',
+        type=int,
+        default=LEASE_SECONDS,
+        help=f'Lease length in seconds, renewed by heartbeats (default: {LEASE_SECONDS})'
+    )
+    parser.add_argument(
+        '--idle-exit',
+        type=float,
+        default=None,
+        help='Exit after this many seconds without work (default: run until the coordinator stops)'
+    )
+
+    args = parser.parse_args()
+    run_worker(open_queue(args.queue), worker_id=args.worker_id, kinds=args.kinds,
+               lease_seconds=args.lease, idle_exit=args.idle_exit, run=args.run)
@@ -0,0 +1,362 @@
+"""
+Listing Re-classification
+Re-applies changed vertical keywords to stored listings without re-scraping
+- listing_terms is a token-level inverted index over listing title,
+  description and business_type, kept current by triggers
+  (database/migration_add_listing_terms.sql)
+- vertical_keyword_snapshots holds the keywords each vertical was last
+  applied with; a run diffs them against the vertical registry
+- Only listings containing an added or removed keyword are read back and
+  re-evaluated - the listings table itself is never scanned
+- Changed rows are updated in bulk, one request per (vertical, status) group
+  and chunk of ids
+
+Usage:
+    python reclassify.py              # apply keyword changes since the last run
+    python reclassify.py --dry-run    # report what would change
+    python reclassify.py --keywords "pressure washing" pool
+"""
+
+import argparse
+import os
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from colorama import Fore, init
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+from keyword_matcher import KeywordMatcher
+from vertical_registry import REGISTRY
+
+# Initialize
+init(autoreset=True)
+load_dotenv()
+
+# Same split as listing_search_terms() in database/migration_add_listing_terms.sql - change both together
+TERM_RE = re.compile(r'[a-z0-9]+')
+
+# Listing columns the index covers (and the text listings are re-evaluated on)
+TEXT_FIELDS = ('title', 'description', 'business_type')
+
+# Rows per select page (PostgREST returns at most 1000 by default)
+PAGE_SIZE = 1000
+
+# Values per .in_() filter - keeps request URLs well under proxy limits
+IN_CHUNK_SIZE = 100
+
+
+# ============================================================================
+# KEYWORDS AND TERMS
+# ============================================================================
+
+def keyword_anchor(keyword: str) -> Optional[str]:
+    """
+    Longest [a-z0-9] run of a keyword, or None if it has none
+
+    Keywords match as case-insensitive substrings, so any listing containing
+    the keyword has an indexed term containing its anchor ("ac repair" ->
+    "repair", "clean" -> "drycleaning").
+    """
+    runs = TERM_RE.findall(keyword.lower())
+    return max(runs, key=len) if runs else None
+
+
+def keyword_sets(config: Dict[str, Any]) -> Tuple[Set[str], Set[str]]:
+    """Lowercased (include, exclude) keywords of one vertical config"""
+    return ({kw.lower() for kw in config.get('include_keywords') or [] if kw},
+            {kw.lower() for kw in config.get('exclude_keywords') or [] if kw})
+
+
+def changed_keywords(previous: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]]) -> Set[str]:
+    """
+    Keywords added to or removed from any vertical's include or exclude list
+
+    A vertical missing on one side counts as all of its keywords changing.
+    """
+    changed: Set[str] = set()
+    for slug in set(previous) | set(current):
+        old_include, old_exclude = keyword_sets(previous.get(slug, {}))
+        new_include, new_exclude = keyword_sets(current.get(slug, {}))
+        changed |= (old_include ^ new_include) | (old_exclude ^ new_exclude)
+    return changed
+
+
+def stored_text(row: Dict[str, Any]) -> str:
+    """Text of a stored listing the keywords are matched against"""
+    return ' '.join(str(row.get(field) or '') for field in TEXT_FIELDS)
+
+
+def chunked(values: List[Any], size: int = IN_CHUNK_SIZE) -> Iterable[List[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+# ============================================================================
+# RE-CLASSIFICATION
+# ============================================================================
+
+def reclassify_row(row: Dict[str, Any], matcher: KeywordMatcher,
+                   previous: Optional[KeywordMatcher] = None) -> Optional[Tuple[str, str]]:
+    """
+    New (vertical_slug, status) for a stored listing, or None if unchanged
+
+    - Still matches its vertical: unchanged, except that an archived row
+      the previous keywords rejected is reopened as pending
+    - Matches other verticals only: moved to the first one, as pending
+    - Matches none: archived in place (vertical_slug is NOT NULL)
+
+    Args:
+        row: Listing with id, vertical_slug, status and TEXT_FIELDS
+        matcher: Matcher for the current keywords
+        previous: Matcher for the keywords the row was classified with
+                  (None: unknown, archived rows stay archived)
+    """
+    text = stored_text(row)
+    vertical = row.get('vertical_slug')
+    status = row.get('status') or 'pending'
+    mask = matcher.match_mask(text)
+
+    if mask & matcher.bits.get(vertical, 0):
+        if status == 'archived' and previous is not None and vertical in previous.bits \
+                and not previous.matches(text, vertical):
+            return vertical, 'pending'
+        return None
+    if mask:
+        return matcher.classify(text)[0], 'pending'
+    if status != 'archived':
+        return vertical, 'archived'
+    return None
+
+
+class ListingReclassifier:
+    """Targeted re-classification of stored listings after keyword changes"""
+
+    def __init__(self, vertical_configs: Dict[str, Dict[str, Any]] = None,
+                 matcher: KeywordMatcher = None, supabase: Client = None):
+        """
+        Initialize re-classifier
+
+        Args:
+            vertical_configs: Current keywords (default: the vertical registry)
+            matcher: Compiled vertical_configs (default: the registry's)
+            supabase: Client (default: from SUPABASE_URL / SUPABASE_KEY)
+        """
+        self.vertical_configs = vertical_configs or dict(REGISTRY.configs)
+        self.matcher = matcher or (REGISTRY.matcher if vertical_configs is None
+                                   else KeywordMatcher(self.vertical_configs))
+
+        if supabase is None:
+            supabase_url = os.getenv("SUPABASE_URL")
+            supabase_key = os.getenv("SUPABASE_KEY")
+            if not supabase_url or not supabase_key:
+                raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
+            supabase = create_client(supabase_url, supabase_key)
+        self.supabase = supabase
+
+        self.stats = {
+            'keywords': 0,
+            'terms': 0,
+            'candidates': 0,
+            'moved': 0,
+            'archived': 0,
+            'reopened': 0,
+            'updated': 0,
+            'errors': 0
+        }
+
+    def log(self, level: str, message: str):
+        colors = {
+            'debug': Fore.CYAN,
+            'info': Fore.GREEN,
+            'warning': Fore.YELLOW,
+            'error': Fore.RED
+        }
+        print(f"{colors.get(level, Fore.WHITE)}[{level.upper()}] {message}")
+
+    def select_all(self, table: str, columns: str, order: str, apply_filter) -> List[Dict[str, Any]]:
+        """Every row of a filtered select, one PAGE_SIZE page at a time (stable order)"""
+        rows: List[Dict[str, Any]] = []
+        start = 0
+        while True:
+            page = apply_filter(self.supabase.table(table).select(columns)).order(order) \
+                .range(start, start + PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            start += PAGE_SIZE
+
+    # ------------------------------------------------------------------
+    # Keyword snapshots
+    # ------------------------------------------------------------------
+
+    def load_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Keywords each vertical was last applied with (empty before the first run)"""
+        rows = self.select_all('vertical_keyword_snapshots', 'vertical_slug,include_keywords,exclude_keywords',
+                               'vertical_slug', lambda query: query)
+        return {row['vertical_slug']: {'include_keywords': row.get('include_keywords') or [],
+                                       'exclude_keywords': row.get('exclude_keywords') or []}
+                for row in rows}
+
+    def save_snapshot(self, previous: Dict[str, Dict[str, Any]]):
+        """Record the current keywords as applied (and drop removed verticals)"""
+        now = datetime.now(timezone.utc).isoformat()
+        self.supabase.table('vertical_keyword_snapshots').upsert([
+            {
+                'vertical_slug': slug,
+                'include_keywords': sorted(keyword_sets(config)[0]),
+                'exclude_keywords': sorted(keyword_sets(config)[1]),
+                'applied_at': now
+            }
+            for slug, config in self.vertical_configs.items()
+        ], on_conflict='vertical_slug').execute()
+
+        removed = [slug for slug in previous if slug not in self.vertical_configs]
+        if removed:
+            self.supabase.table('vertical_keyword_snapshots').delete().in_('vertical_slug', removed).execute()
+
+    # ------------------------------------------------------------------
+    # Index lookups
+    # ------------------------------------------------------------------
+
+    def terms_containing(self, anchor: str) -> List[str]:
+        """Indexed terms containing anchor (vocabulary only, trigram-indexed)"""
+        rows = self.select_all('listing_term_vocab', 'term', 'term', lambda query: query.like('term', f"%{anchor}%"))
+        return [row['term'] for row in rows]
+
+    def candidate_ids(self, keywords: Iterable[str]) -> Set[str]:
+        """Ids of listings whose text may contain any of keywords"""
+        anchors = set()
+        for keyword in sorted(keywords):
+            anchor = keyword_anchor(keyword)
+            if anchor is None:
+                self.log('warning', f"Keyword {keyword!r} has no letters or digits - cannot be looked up, skipped")
+                continue
+            anchors.add(anchor)
+
+        # Terms containing "cleaning" also contain "clean"; look up the shorter one only
+        anchors = {a for a in anchors if not any(other != a and other in a for other in anchors)}
+
+        terms: Set[str] = set()
+        for anchor in sorted(anchors):
+            terms.update(self.terms_containing(anchor))
+        self.stats['terms'] = len(terms)
+
+        ids: Set[str] = set()
+        for chunk in chunked(sorted(terms)):
+            rows = self.select_all('listing_terms', 'listing_id', 'listing_id', lambda query: query.in_('term', chunk))
+            ids.update(row['listing_id'] for row in rows)
+        return ids
+
+    def fetch_listings(self, ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Stored classification and text of the given listings"""
+        columns = ','.join(('id', 'vertical_slug', 'status') + TEXT_FIELDS)
+        rows: List[Dict[str, Any]] = []
+        for chunk in chunked(sorted(ids)):
+            rows.extend(self.supabase.table('listings').select(columns).in_('id', chunk).execute().data or [])
+        return rows
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+
+    def apply(self, updates: Dict[str, Tuple[str, str]]):
+        """Write new (vertical_slug, status) pairs, grouped into bulk updates"""
+        groups: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+        for listing_id, target in updates.items():
+            groups[target].append(listing_id)
+
+        for (vertical, status), ids in sorted(groups.items()):
+            for chunk in chunked(sorted(ids)):
+                try:
+                    self.supabase.table('listings').update({'vertical_slug': vertical, 'status': status}) \
+                        .in_('id', chunk).execute()
+                    self.stats['updated'] += len(chunk)
+                except Exception as e:
+                    self.log('error', f"✗ Failed to update {len(chunk)} listings to {vertical}/{status}: {e}")
+                    self.stats['errors'] += len(chunk)
+
+    def run(self, keywords: Iterable[str] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Re-classify the listings affected by keyword changes
+
+        Args:
+            keywords: Keywords to re-check (default: diff against the snapshot;
+                      the first run only records a baseline)
+            dry_run: Report changes without writing rows or the snapshot
+
+        Returns:
+            Run stats
+        """
+        previous = self.load_snapshot()
+        from_snapshot = keywords is None
+        if from_snapshot:
+            if not previous:
+                self.log('info', 'No keyword snapshot yet - recording current keywords as the baseline')
+                if not dry_run:
+                    self.save_snapshot(previous)
+                return self.stats
+            keywords = changed_keywords(previous, self.vertical_configs)
+        keywords = {kw.lower() for kw in keywords if kw}
+        self.stats['keywords'] = len(keywords)
+
+        if not keywords:
+            self.log('info', 'Keywords unchanged since the last run - nothing to re-classify')
+            return self.stats
+        self.log('info', f"Re-checking {len(keywords)} keywords: {', '.join(sorted(keywords))}")
+
+        ids = self.candidate_ids(keywords)
+        self.stats['candidates'] = len(ids)
+        self.log('info', f"{len(ids)} listings contain them ({self.stats['terms']} indexed terms)")
+
+        old_matcher = KeywordMatcher(previous) if previous else None
+        updates: Dict[str, Tuple[str, str]] = {}
+        for row in self.fetch_listings(ids):
+            target = reclassify_row(row, self.matcher, old_matcher)
+            if target is None:
+                continue
+            updates[row['id']] = target
+            if target[0] != row.get('vertical_slug'):
+                self.stats['moved'] += 1
+            elif target[1] == 'archived':
+                self.stats['archived'] += 1
+            else:
+                self.stats['reopened'] += 1
+
+        self.log('info', f"{len(updates)} listings change: {self.stats['moved']} moved, "
+                         f"{self.stats['archived']} archived, {self.stats['reopened']} reopened")
+        if dry_run:
+            return self.stats
+
+        self.apply(updates)
+        # Explicit keywords leave the snapshot (and its pending diff) alone
+        if from_snapshot and self.stats['errors']:
+            self.log('warning', f"{self.stats['errors']} listings failed to update - keeping the old snapshot "
+                                f"so the next run retries them")
+        elif from_snapshot:
+            self.save_snapshot(previous)
+        self.log('info', f"Re-classification complete! Updated: {self.stats['updated']}")
+        return self.stats
+
+
+# ============================================================================
+# CLI INTERFACE
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-classify stored listings after vertical keyword changes")
+    parser.add_argument(
+        '--keywords',
+        nargs='+',
+        default=None,
+        help='Re-check listings containing these keywords (default: keywords changed since the last run)'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Report what would change without updating listings or the keyword snapshot'
+    )
+
+    args = parser.parse_args()
+    ListingReclassifier().run(keywords=args.keywords, dry_run=args.dry_run)
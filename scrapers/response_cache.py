@@ -0,0 +1,205 @@
+"""
+Response Cache
+On-disk cache of raw BizBuySell search responses
+- Content-addressed: key = hash of the search criteria (minus pageNumber) + page number
+- TTL for live runs; replay mode serves entries regardless of age
+- Size-capped, least-recently-used files evicted first
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+DEFAULT_CACHE_DIR = os.getenv(
+    'BBS_RESPONSE_CACHE',
+    os.path.join(tempfile.gettempdir(), 'bizbuysell_responses')
+)
+DEFAULT_TTL = int(os.getenv('BBS_RESPONSE_CACHE_TTL', '3600'))
+DEFAULT_MAX_BYTES = int(os.getenv('BBS_RESPONSE_CACHE_MAX_MB', '500')) * 1024 * 1024
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def criteria_hash(criteria: Dict[str, Any]) -> str:
+    """Stable hash of search criteria with pageNumber removed"""
+    stripped = {k: v for k, v in criteria.items() if k != 'pageNumber'}
+    canonical = json.dumps(stripped, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+
+
+def cache_key(payload: Dict[str, Any]) -> Tuple[str, int]:
+    """(criteria hash, page number) for a BbsBfsSearchResults payload"""
+    criteria = payload.get('bfsSearchCriteria', payload)
+    return criteria_hash(criteria), int(criteria.get('pageNumber') or 1)
+
+
+# ============================================================================
+# RESPONSE CACHE
+# ============================================================================
+
+class ResponseCache:
+    """Raw search responses on disk, one JSON file per (criteria, page)"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: int = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES, log=None):
+        """
+        Initialize cache
+
+        Args:
+            cache_dir: Directory holding cached responses
+            ttl: Seconds an entry is served to live runs (replay ignores it)
+            max_bytes: Size cap; oldest-used entries are evicted past it
+            log: Optional callable(level, message)
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.log = log or (lambda level, message: None)
+
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'writes': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, payload: Dict[str, Any]) -> str:
+        digest, page_number = cache_key(payload)
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}-p{page_number}.json")
+
+    def get(self, payload: Dict[str, Any], allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Cached response for a search payload
+
+        Args:
+            payload: Search request body
+            allow_stale: Serve entries older than the TTL (replay mode)
+
+        Returns:
+            Response JSON, or None on a miss
+        """
+        body = self.get_raw(payload, allow_stale)
+        if body is None:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    def get_raw(self, payload: Dict[str, Any], allow_stale: bool = False) -> Optional[bytes]:
+        """Cached response body as stored (see get)"""
+        path = self.path_for(payload)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if not allow_stale and age > self.ttl:
+                self.stats['stale'] += 1
+                self.stats['misses'] += 1
+                return None
+            with open(path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            self.stats['misses'] += 1
+            return None
+
+        # Bump atime only, so mtime keeps meaning "fetched at" for the TTL
+        try:
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+        except OSError:
+            pass
+        self.stats['hits'] += 1
+        return body
+
+    def put(self, payload: Dict[str, Any], data: Dict[str, Any]):
+        """Store a decoded response"""
+        self.put_raw(payload, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    def put_raw(self, payload: Dict[str, Any], body: bytes):
+        """Store a raw response body (atomic write), then evict past the size cap"""
+        path = self.path_for(payload)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            new_size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.log('warning', f'Could not write response cache entry: {e}')
+            return
+
+        self.stats['writes'] += 1
+        with self._lock:
+            if self._size is not None:
+                self._size += new_size - old_size
+        if self.size_bytes() > self.max_bytes:
+            self.evict()
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, _, size in self._entries())
+            return self._size
+
+    def evict(self, target_bytes: Optional[int] = None):
+        """Delete least-recently-used entries until under target (default 90% of the cap)"""
+        target = int(self.max_bytes * 0.9) if target_bytes is None else target_bytes
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            total = sum(size for _, _, size in entries)
+            for path, _, size in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self.stats['evictions'] += 1
+            self._size = total
+
+    def clear(self):
+        self.evict(target_bytes=0)
+
+    def _entries(self):
+        """(path, last used, size) for every cached response"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json') or name == MANIFEST_FILE:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, max(st.st_atime, st.st_mtime), st.st_size
+
+    # ------------------------------------------------------------------
+    # Run manifest - lets replay rebuild the exact payloads of the last live run
+    # ------------------------------------------------------------------
+
+    def write_manifest(self, manifest: Dict[str, Any]):
+        path = os.path.join(self.cache_dir, MANIFEST_FILE)
+        try:
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump({**manifest, 'saved_at': time.time()}, f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            self.log('warning', f'Could not write response cache manifest: {e}')
+
+    def read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.cache_dir, MANIFEST_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def summary(self) -> str:
+        lookups = self.stats['hits'] + self.stats['misses']
+        rate = self.stats['hits'] / lookups * 100 if lookups else 0.0
+        return (f"{self.stats['hits']}/{lookups} hits ({rate:.0f}%), {self.stats['writes']} writes, "
+                f"{self.stats['evictions']} evictions")
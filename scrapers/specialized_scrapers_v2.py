@@ -1,16 +1,23 @@
 """
 Specialized Scrapers V2 - WITH MULTI-TENANT SUPPORT
 Wraps specialized scrapers (Murphy, Transworld, Sunbelt, VR, FCBB, Hedgestone)
-Adds: vertical filtering, keyword matching, scraper_runs tracking
+Adds: vertical filtering, keyword matching, scraper_runs tracking,
+content-hash change detection (only new/changed listings are written)
 """
 
 import os
+import threading
 import uuid
 from typing import List, Dict, Optional
 from datetime import datetime, timezone
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from batch_writer import WRITE_CONCURRENCY, BatchWriter
+from change_detector import ChangeDetector, upsert_changes
+from copy_loader import COPY_BATCH_SIZE, open_copy_loader
+from vertical_registry import REGISTRY, VERTICAL_CONFIGS
+
 # Import original specialized scrapers
 from specialized_scrapers_integration import (
     scrape_specialized_broker as _scrape_specialized_broker,
@@ -21,48 +28,17 @@ load_dotenv()
 
 
 # ============================================================================
-# VERTICAL CONFIGURATIONS
+# SPECIALIZED BROKERS
 # ============================================================================
 
-VERTICAL_CONFIGS = {
-    'cleaning': {
-        'name': 'Cleaning Services',
-        'include_keywords': [
-            'cleaning', 'janitorial', 'custodial', 'sanitation', 'maintenance',
-            'maid service', 'housekeeping', 'carpet cleaning', 'window cleaning',
-            'pressure washing', 'commercial cleaning', 'residential cleaning',
-            'floor care', 'disinfection', 'restoration'
-        ],
-        'exclude_keywords': [
-            'restaurant', 'food service', 'hvac', 'plumbing', 'electrical',
-            'landscaping', 'lawn care', 'pool', 'spa', 'salon'
-        ]
-    },
-    'landscape': {
-        'name': 'Landscape Services',
-        'include_keywords': [
-            'landscape', 'landscaping', 'lawn care', 'lawn maintenance',
-            'irrigation', 'hardscape', 'tree service', 'snow removal',
-            'lawn mowing', 'garden', 'turf care', 'lawn treatment',
-            'landscape design', 'outdoor living'
-        ],
-        'exclude_keywords': [
-            'restaurant', 'food service', 'hvac', 'plumbing', 'electrical',
-            'cleaning', 'janitorial', 'pool', 'spa'
-        ]
-    },
-    'hvac': {
-        'name': 'HVAC Services',
-        'include_keywords': [
-            'hvac', 'heating', 'cooling', 'air conditioning', 'furnace',
-            'ventilation', 'refrigeration', 'climate control', 'ductwork',
-            'heat pump', 'ac repair', 'hvac contractor', 'hvac service'
-        ],
-        'exclude_keywords': [
-            'restaurant', 'food service', 'cleaning', 'janitorial',
-            'landscaping', 'lawn care', 'pool', 'spa', 'plumbing', 'electrical'
-        ]
-    }
+# Specialized brokers by CLI name (also the unit of work for queue workers)
+SPECIALIZED_BROKERS = {
+    'murphy': {'account': '999', 'name': 'Murphy Business', 'url': 'https://murphybusiness.com'},
+    'hedgestone': {'account': '994', 'name': 'Hedgestone', 'url': 'https://www.hedgestone.com'},
+    'transworld': {'account': '998', 'name': 'Transworld', 'url': 'https://www.tworld.com'},
+    'sunbelt': {'account': '997', 'name': 'Sunbelt', 'url': 'https://www.sunbeltnetwork.com'},
+    'vr': {'account': '996', 'name': 'VR Business Brokers', 'url': 'https://www.vrbusinessbrokers.com'},
+    'fcbb': {'account': '995', 'name': 'FCBB', 'url': 'https://fcbb.com'},
 }
 
 
@@ -92,7 +68,11 @@ class SpecializedScraperV2:
             'total_scraped': 0,
             'matched_vertical': 0,
             'filtered_out': 0,
-            'saved': 0
+            'saved': 0,
+            'new_listings': 0,
+            'updated_listings': 0,
+            'unchanged_listings': 0,
+            'save_errors': 0  # Rows dead-lettered by the batch writer
         }
 
     def create_scraper_run(self, broker_source: str):
@@ -125,34 +105,45 @@ class SpecializedScraperV2:
                 'completed_at': datetime.now(timezone.utc).isoformat(),
                 'status': status,
                 'total_listings_found': self.stats['total_scraped'],
-                'new_listings': self.stats['matched_vertical'],
-                'updated_listings': 0,
                 'failed_listings': self.stats['total_scraped'] - self.stats['matched_vertical'],
                 'error_message': error_message
             }).eq('id', self.scraper_run_id).execute()
         except Exception as e:
             print(f"  Warning: Could not update scraper run: {e}")
 
-    def matches_vertical(self, listing: Dict) -> bool:
-        """Check if listing matches vertical keywords"""
-        # Get searchable text
-        title = (listing.get('title') or '').lower()
-        description = (listing.get('description') or listing.get('text') or '').lower()
-        business_type = (listing.get('business_type') or '').lower()
-        location = (listing.get('location') or '').lower()
-        search_text = f"{title} {description} {business_type} {location}"
+    def record_writes(self, run_counts: Dict[str, Dict[str, int]]):
+        """
+        Set new_listings/updated_listings on the runs whose listings were saved
 
-        # Check exclude keywords first
-        for keyword in self.vertical_config['exclude_keywords']:
-            if keyword.lower() in search_text:
-                return False
+        Saving happens after the runs are closed (and may cover several
+        brokers' runs), so the counts are written separately.
 
-        # Check include keywords
-        for keyword in self.vertical_config['include_keywords']:
-            if keyword.lower() in search_text:
-                return True
+        Args:
+            run_counts: scraper_run_id -> {'new': n, 'updated': n}
+        """
+        for run_id, counts in run_counts.items():
+            if not run_id:
+                continue
+            try:
+                self.supabase.table('scraper_runs').update({
+                    'new_listings': counts['new'],
+                    'updated_listings': counts['updated']
+                }).eq('id', run_id).execute()
+            except Exception as e:
+                print(f"  Warning: Could not update scraper run: {e}")
 
-        return False
+    @staticmethod
+    def search_text(listing: Dict) -> str:
+        """Text the vertical keywords are matched against"""
+        title = listing.get('title') or ''
+        description = listing.get('description') or listing.get('text') or ''
+        business_type = listing.get('business_type') or ''
+        location = listing.get('location') or ''
+        return f"{title} {description} {business_type} {location}"
+
+    def matches_vertical(self, listing: Dict) -> bool:
+        """Check if listing matches vertical keywords"""
+        return REGISTRY.matcher.matches(self.search_text(listing), self.vertical_slug)
 
     def scrape_broker(self, broker: Dict, verbose: bool = True) -> Optional[List[Dict]]:
         """Scrape a specialized broker with vertical filtering"""
@@ -241,7 +232,7 @@ class SpecializedScraperV2:
             return []
 
     def save_to_supabase(self, listings: List[Dict], verbose: bool = True):
-        """Save listings to Supabase"""
+        """Save new and changed listings to Supabase (unchanged ones are skipped)"""
         if not listings:
             if verbose:
                 print("  No listings to save")
@@ -250,25 +241,66 @@ class SpecializedScraperV2:
         if verbose:
             print(f"\n  Saving {len(listings)} listings to Supabase...")
 
-        batch_size = 100
-        for i in range(0, len(listings), batch_size):
-            batch = listings[i:i+batch_size]
-            try:
-                self.supabase.table('listings').upsert(
-                    batch,
-                    on_conflict='id'
-                ).execute()
+        warn = lambda level, message: print(f"  Warning: {message}")
+        loader = open_copy_loader(log=warn)  # LISTINGS_SINK=copy
+        detector = None if loader else ChangeDetector(self.supabase, log=warn)
+        run_counts: Dict[str, Dict[str, int]] = {}
+        stats_lock = threading.Lock()
+
+        def write(batch: List[Dict]):
+            if loader:
+                new, updated, unchanged = loader.load(batch)
+            else:
+                new_rows, updated_rows, unchanged = detector.split(batch)
+                upsert_changes(self.supabase, new_rows, updated_rows)
+                detector.commit(new_rows, updated_rows, unchanged)
+                new, updated = len(new_rows), len(updated_rows)
+
+            with stats_lock:
+                self.stats['saved'] += new + updated
+                self.stats['new_listings'] += new
+                self.stats['updated_listings'] += updated
+                self.stats['unchanged_listings'] += unchanged
+                if loader:
+                    counts = run_counts.setdefault(batch[0].get('scraper_run_id'), {'new': 0, 'updated': 0})
+                    counts['new'] += new
+                    counts['updated'] += updated
+                else:
+                    for key, rows in (('new', new_rows), ('updated', updated_rows)):
+                        for row in rows:
+                            counts = run_counts.setdefault(row.get('scraper_run_id'), {'new': 0, 'updated': 0})
+                            counts[key] += 1
 
-                self.stats['saved'] += len(batch)
+            if verbose:
+                print(f"    ✓ Saved {len(batch)} rows ({new} new, {updated} updated, {unchanged} unchanged)")
 
-                if verbose:
-                    print(f"    ✓ Saved batch {i//batch_size + 1} ({len(batch)} listings)")
-            except Exception as e:
-                if verbose:
-                    print(f"    ✗ Failed to save batch {i//batch_size + 1}: {e}")
+        if loader:
+            # One scraper run per COPY batch, so its counts can be credited to that run
+            by_run: Dict[Optional[str], List[Dict]] = {}
+            for listing in listings:
+                by_run.setdefault(listing.get('scraper_run_id'), []).append(listing)
+            batches = [rows[i:i+COPY_BATCH_SIZE] for rows in by_run.values()
+                       for i in range(0, len(rows), COPY_BATCH_SIZE)]
+        else:
+            batches = [listings[i:i+100] for i in range(0, len(listings), 100)]
+
+        # Failing batches are bisected; rows that still fail go to the dead-letter file
+        log = (lambda level, message: print(f"    {message}")) if verbose else None
+        with BatchWriter(write, concurrency=1 if loader else WRITE_CONCURRENCY, log=log) as writer:
+            for batch in batches:
+                writer.submit(batch)
+        self.stats['save_errors'] += writer.stats['rejected']
+
+        if loader:
+            loader.close()
+        else:
+            detector.save()
+        self.record_writes(run_counts)
 
         if verbose:
-            print(f"  ✓ Saved {self.stats['saved']}/{len(listings)} listings")
+            summary = loader.summary() if loader else detector.summary()
+            print(f"  ✓ Saved {self.stats['saved']}/{len(listings)} listings ({summary})")
+            print(f"  Batch writer: {writer.summary()}")
 
 
 # ============================================================================
@@ -305,15 +337,7 @@ def scrape_all_specialized_brokers(vertical_slug: str = 'cleaning', save_to_db:
     """
     scraper = SpecializedScraperV2(vertical_slug=vertical_slug)
 
-    # Define specialized brokers
-    specialized_brokers = [
-        {'account': '999', 'name': 'Murphy Business', 'url': 'https://murphybusiness.com'},
-        {'account': '994', 'name': 'Hedgestone', 'url': 'https://www.hedgestone.com'},
-        {'account': '998', 'name': 'Transworld', 'url': 'https://www.tworld.com'},
-        {'account': '997', 'name': 'Sunbelt', 'url': 'https://www.sunbeltnetwork.com'},
-        {'account': '996', 'name': 'VR Business Brokers', 'url': 'https://www.vrbusinessbrokers.com'},
-        {'account': '995', 'name': 'FCBB', 'url': 'https://fcbb.com'},
-    ]
+    specialized_brokers = list(SPECIALIZED_BROKERS.values())
 
     all_listings = []
 
@@ -355,7 +379,7 @@ if __name__ == "__main__":
     parser.add_argument(
         '--vertical',
         type=str,
-        choices=['cleaning', 'landscape', 'hvac'],
+        choices=list(VERTICAL_CONFIGS),
         default='cleaning',
         help='Vertical to scrape (default: cleaning)'
     )
@@ -374,16 +398,6 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    # Map broker names to configs
-    broker_configs = {
-        'murphy': {'account': '999', 'name': 'Murphy Business', 'url': 'https://murphybusiness.com'},
-        'hedgestone': {'account': '994', 'name': 'Hedgestone', 'url': 'https://www.hedgestone.com'},
-        'transworld': {'account': '998', 'name': 'Transworld', 'url': 'https://www.tworld.com'},
-        'sunbelt': {'account': '997', 'name': 'Sunbelt', 'url': 'https://www.sunbeltnetwork.com'},
-        'vr': {'account': '996', 'name': 'VR Business Brokers', 'url': 'https://www.vrbusinessbrokers.com'},
-        'fcbb': {'account': '995', 'name': 'FCBB', 'url': 'https://fcbb.com'},
-    }
-
     if args.broker == 'all':
         # Scrape all specialized brokers
         listings = scrape_all_specialized_brokers(
@@ -396,7 +410,7 @@ if __name__ == "__main__":
 
     else:
         # Scrape single broker
-        broker = broker_configs[args.broker]
+        broker = SPECIALIZED_BROKERS[args.broker]
         scraper = SpecializedScraperV2(vertical_slug=args.vertical)
         listings = scraper.scrape_broker(broker, verbose=True)
 
@@ -0,0 +1,242 @@
+"""
+BizBuySell Token Manager
+One _track_tkn source for every BizBuySell client (v2 scraper, daily_scraper, cleaning_scraper)
+- On-disk cache shared across processes, guarded by a file lock
+- TTL tracking with proactive refresh before expiry
+- refresh(stale_token) for 401/403 replay; concurrent callers share one refresh
+- for_proxy(url): a token fetched through, and only used with, one proxy
+"""
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from curl_cffi import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows - cache still works, just without cross-process locking
+    fcntl = None
+
+
+TOKEN_PAGE_URL = os.getenv('BIZBUYSELL_TOKEN_URL', 'https://www.bizbuysell.com/businesses-for-sale/new-york-ny/')
+TOKEN_COOKIES = ('_track_tkn', 'track_tkn')
+
+# Status codes that mean the bearer token was rejected
+AUTH_ERROR_STATUSES = (401, 403)
+
+DEFAULT_CACHE_PATH = os.getenv(
+    'BBS_TOKEN_CACHE',
+    os.path.join(tempfile.gettempdir(), 'bizbuysell_token.json')
+)
+DEFAULT_TTL = int(os.getenv('BBS_TOKEN_TTL', '3600'))
+DEFAULT_REFRESH_MARGIN = int(os.getenv('BBS_TOKEN_REFRESH_MARGIN', '300'))
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+def proxy_cache_path(cache_path: str, proxy: Optional[str]) -> str:
+    """Per-proxy token cache file: tokens are bound to the exit IP that obtained them"""
+    if not proxy:
+        return cache_path
+    root, ext = os.path.splitext(cache_path)
+    return f"{root}.{hashlib.sha1(proxy.encode('utf-8')).hexdigest()[:12]}{ext}"
+
+
+class _FileLock:
+    """Exclusive advisory lock on <path>.lock"""
+
+    def __init__(self, path: str):
+        self.path = f"{path}.lock"
+        self.handle = None
+
+    def __enter__(self):
+        self.handle = open(self.path, 'a+')
+        if fcntl:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if fcntl:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+        self.handle.close()
+
+
+# ============================================================================
+# TOKEN MANAGER
+# ============================================================================
+
+class TokenManager:
+    """Shared, persistent BizBuySell auth token"""
+
+    def __init__(self, session: requests.Session = None, headers: Dict[str, str] = None,
+                 cache_path: str = DEFAULT_CACHE_PATH, ttl: int = DEFAULT_TTL,
+                 refresh_margin: int = DEFAULT_REFRESH_MARGIN, max_retries: int = 3,
+                 log=None, proxy: Optional[str] = None):
+        """
+        Initialize token manager
+
+        Args:
+            session: curl_cffi session used to load the token page (default: new chrome session)
+            headers: Headers for the token page request
+            cache_path: Token cache file shared between processes
+            ttl: Seconds a token is trusted after it was issued
+            refresh_margin: Refresh this many seconds before expiry
+            max_retries: Attempts per token page load
+            log: Optional callable(level, message) for progress messages
+            proxy: Load the token page through this proxy; the cache file is
+                   then per proxy
+        """
+        self.session = session or requests.Session(impersonate="chrome")
+        self.headers = headers or DEFAULT_HEADERS
+        self.proxy = proxy
+        self.cache_path = proxy_cache_path(cache_path, proxy)
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.max_retries = max_retries
+        self.log = log or (lambda level, message: None)
+
+        self.token: Optional[str] = None
+        self.issued_at: float = 0.0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._proxy_managers: Dict[str, 'TokenManager'] = {}
+        self._base_cache_path = cache_path
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @property
+    def expires_at(self) -> float:
+        return self.issued_at + self.ttl
+
+    def is_fresh(self, token: Optional[str] = None, issued_at: float = None) -> bool:
+        """True if the token has more than refresh_margin seconds left"""
+        token = self.token if token is None else token
+        issued_at = self.issued_at if issued_at is None else issued_at
+        return bool(token) and time.time() < issued_at + self.ttl - self.refresh_margin
+
+    def get_token(self) -> Optional[str]:
+        """Current token, refreshed proactively when close to expiry"""
+        if self.is_fresh():
+            return self.token
+
+        with self._lock:
+            if self.is_fresh():
+                return self.token
+            with _FileLock(self.cache_path):
+                cached = self._read_cache()
+                if cached and self.is_fresh(cached['token'], cached['issued_at']):
+                    self._adopt(cached['token'], cached['issued_at'])
+                    self.log('info', 'Reusing cached authentication token')
+                    return self.token
+                return self._fetch_and_store()
+
+    def for_proxy(self, proxy: Optional[str]) -> 'TokenManager':
+        """
+        Manager whose token is obtained through proxy (same settings as this one)
+
+        BizBuySell ties the tracking token to the client that loaded the page,
+        so a token is only ever sent through the proxy that fetched it.
+        Returns self when proxy is None.
+        """
+        if not proxy or proxy == self.proxy:
+            return self
+        with self._lock:
+            manager = self._proxy_managers.get(proxy)
+            if manager is None:
+                manager = TokenManager(
+                    session=self.session, headers=self.headers, cache_path=self._base_cache_path,
+                    ttl=self.ttl, refresh_margin=self.refresh_margin, max_retries=self.max_retries,
+                    log=self.log, proxy=proxy
+                )
+                self._proxy_managers[proxy] = manager
+            return manager
+
+    def refresh(self, stale_token: Optional[str] = None) -> Optional[str]:
+        """
+        Replace a token the API rejected
+
+        If another thread or process already replaced stale_token, the newer
+        token is returned without loading the token page again.
+        """
+        with self._lock:
+            if self.token and self.token != stale_token and self.is_fresh():
+                return self.token
+            with _FileLock(self.cache_path):
+                cached = self._read_cache()
+                if cached and cached['token'] != stale_token and self.is_fresh(cached['token'], cached['issued_at']):
+                    self._adopt(cached['token'], cached['issued_at'])
+                    return self.token
+                return self._fetch_and_store()
+
+    # ------------------------------------------------------------------
+    # Internals (call with both locks held)
+    # ------------------------------------------------------------------
+
+    def _adopt(self, token: str, issued_at: float):
+        self.token = token
+        self.issued_at = issued_at
+
+    def _fetch_and_store(self) -> Optional[str]:
+        token = self._fetch_token()
+        if not token:
+            return None
+        self._adopt(token, time.time())
+        self.refreshes += 1
+        self._write_cache()
+        return token
+
+    def _fetch_token(self) -> Optional[str]:
+        """Load the token page and read the _track_tkn cookie"""
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self.log('info', 'Obtaining authentication token...')
+                proxies = {'http': self.proxy, 'https': self.proxy} if self.proxy else None
+                response = self.session.get(TOKEN_PAGE_URL, headers=self.headers, timeout=30,
+                                            allow_redirects=True, proxies=proxies)
+                for name in TOKEN_COOKIES:
+                    token = response.cookies.get(name)
+                    if token:
+                        self.log('info', 'Authentication token obtained successfully')
+                        return token
+                self.log('warning', f'No _track_tkn cookie in response (attempt {attempt}/{self.max_retries})')
+            except Exception as e:
+                self.log('warning', f'Error obtaining token (attempt {attempt}/{self.max_retries}): {e}')
+
+            if attempt < self.max_retries:
+                time.sleep(random.uniform(1, 3) * attempt)
+
+        self.log('error', 'Failed to get authentication token')
+        return None
+
+    def _read_cache(self) -> Optional[Dict]:
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+            if data.get('token') and isinstance(data.get('issued_at'), (int, float)):
+                return data
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _write_cache(self):
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'token': self.token, 'issued_at': self.issued_at}, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            self.log('warning', f'Could not write token cache: {e}')
+
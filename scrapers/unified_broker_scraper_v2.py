@@ -4,7 +4,7 @@ Combines specialized franchise scrapers (Murphy, Transworld, Sunbelt, VR, FCBB)
 UPDATED: Multi-tenant vertical support + keyword filtering + tracking tables
 """
 
-import os, re, json, hashlib, asyncio, random, uuid
+import os, re, json, asyncio, random, threading, uuid
 from typing import List, Dict, Optional
 from urllib.parse import urljoin, urlparse
 from collections import defaultdict
@@ -17,73 +17,22 @@ from playwright.async_api import async_playwright
 from dotenv import load_dotenv
 load_dotenv()
 
+from card_extractor import card_nodes, extract_card_fields, extract_city_state, parse_money_value, pick_title
+from batch_writer import WRITE_CONCURRENCY, BatchWriter
+from change_detector import ChangeDetector, upsert_changes
+from copy_loader import COPY_BATCH_SIZE, open_copy_loader
+from listing_record import ListingRecord, to_rows
+from log_sink import shared_log_sink
+from vertical_registry import REGISTRY, VERTICAL_CONFIGS
+
 # Import specialized scrapers
 from specialized_scrapers_integration import scrape_specialized_broker, get_specialized_broker_names
 
 
-# ============================================================================
-# VERTICAL CONFIGURATIONS
-# ============================================================================
-
-VERTICAL_CONFIGS = {
-    'cleaning': {
-        'name': 'Cleaning Services',
-        'include_keywords': [
-            'cleaning', 'janitorial', 'custodial', 'sanitation', 'maintenance',
-            'maid service', 'housekeeping', 'carpet cleaning', 'window cleaning',
-            'pressure washing', 'commercial cleaning', 'residential cleaning',
-            'floor care', 'disinfection', 'restoration'
-        ],
-        'exclude_keywords': [
-            'restaurant', 'food service', 'hvac', 'plumbing', 'electrical',
-            'landscaping', 'lawn care', 'pool', 'spa', 'salon'
-        ]
-    },
-    'landscape': {
-        'name': 'Landscape Services',
-        'include_keywords': [
-            'landscape', 'landscaping', 'lawn care', 'lawn maintenance',
-            'irrigation', 'hardscape', 'tree service', 'snow removal',
-            'lawn mowing', 'garden', 'turf care', 'lawn treatment',
-            'landscape design', 'outdoor living'
-        ],
-        'exclude_keywords': [
-            'restaurant', 'food service', 'hvac', 'plumbing', 'electrical',
-            'cleaning', 'janitorial', 'pool', 'spa'
-        ]
-    },
-    'hvac': {
-        'name': 'HVAC Services',
-        'include_keywords': [
-            'hvac', 'heating', 'cooling', 'air conditioning', 'furnace',
-            'ventilation', 'refrigeration', 'climate control', 'ductwork',
-            'heat pump', 'ac repair', 'hvac contractor', 'hvac service'
-        ],
-        'exclude_keywords': [
-            'restaurant', 'food service', 'cleaning', 'janitorial',
-            'landscaping', 'lawn care', 'pool', 'spa', 'plumbing', 'electrical'
-        ]
-    }
-}
-
-
 # -------------------------
-# Enhanced financial extraction patterns
+# Listing classification patterns (card fields: card_extractor.py)
 # -------------------------
 PRICE_RE = re.compile(r'\$[\d,]+(?:\.\d{2})?', re.I)
-REVENUE_PATTERNS = [
-    r'revenue[:\s]*\$?([\d,]+)',
-    r'gross sales[:\s]*\$?([\d,]+)',
-    r'annual sales[:\s]*\$?([\d,]+)',
-    r'sales[:\s]*\$?([\d,]+)',
-]
-CASHFLOW_PATTERNS = [
-    r'cash flow[:\s]*\$?([\d,]+)',
-    r'net income[:\s]*\$?([\d,]+)',
-    r'ebitda[:\s]*\$?([\d,]+)',
-    r'sde[:\s]*\$?([\d,]+)',
-    r'owner benefit[:\s]*\$?([\d,]+)',
-]
 
 RE_REAL_ESTATE = re.compile(r'\bmls\s*#|\bidx\b|\d+\s*bed.*\d+\s*bath', re.I)
 BUSINESS_HINTS = [
@@ -100,32 +49,6 @@ def looks_businessy(text: str) -> bool:
     t = (text or "").lower()
     return any(k in t for k in BUSINESS_HINTS)
 
-def parse_money_value(text: str) -> Optional[float]:
-    """Parse $123,456 or 123456 into float"""
-    if not text:
-        return None
-    try:
-        cleaned = re.sub(r'[$,]', '', str(text))
-        if 'k' in cleaned.lower():
-            return float(cleaned.lower().replace('k', '')) * 1000
-        if 'm' in cleaned.lower():
-            return float(cleaned.lower().replace('m', '')) * 1000000
-        return float(cleaned)
-    except:
-        return None
-
-def extract_city_state(location: str) -> tuple:
-    """Extract city and state from location string"""
-    if not location:
-        return None, None
-    m = re.search(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*([A-Z]{2})\b', location)
-    if m:
-        return m.group(1).strip(), m.group(2).strip()
-    state_match = re.search(r'\b([A-Z]{2})\b', location)
-    if state_match:
-        return None, state_match.group(1)
-    return None, None
-
 
 class PatternDatabase:
     """Stores and retrieves learned patterns in Supabase"""
@@ -369,119 +292,31 @@ class PatternDetector:
 
 
 class SmartExtractor:
-    """Extract structured data from HTML elements"""
+    """Extract structured data from HTML elements (see card_extractor.py)"""
     @staticmethod
     def extract(element, base_url: str) -> Optional[Dict]:
         try:
             text = element.get_text(' ', strip=True)
             if len(text) < 30:
                 return None
-            link = element.find('a', href=True) or element.find_parent('a', href=True)
+            link, first = card_nodes(element)
+            link = link or element.find_parent('a', href=True)
             if not link:
                 return None
             url = urljoin(base_url, link['href'])
             if any(skip in url.lower() for skip in ['#', 'javascript:', '/contact', '/about']):
                 return None
 
-            title = SmartExtractor._extract_title(element, text)
-            price_text = SmartExtractor._extract_price_text(text)
-            price = parse_money_value(price_text)
-            location = SmartExtractor._extract_location(text)
-            city, state = extract_city_state(location)
-            business_type = SmartExtractor._extract_business_type(text)
-            revenue = SmartExtractor._extract_revenue(text)
-            cash_flow = SmartExtractor._extract_cashflow(text)
-
             return {
-                'title': title,
+                'title': pick_title(first, text),
                 'url': url,
-                'price': price,
-                'price_text': price_text,
-                'location': location,
-                'city': city,
-                'state': state,
-                'business_type': business_type,
-                'revenue': revenue,
-                'cash_flow': cash_flow,
+                **extract_card_fields(text),
                 'text': text[:500],
                 'full_text': text
             }
         except:
             return None
 
-    @staticmethod
-    def _extract_title(element, text: str) -> str:
-        for tag in ['h1','h2','h3','h4','h5','h6','strong','b']:
-            el = element.find(tag)
-            if el:
-                t = el.get_text(strip=True)
-                if 10 < len(t) < 200:
-                    return t
-        link = element.find('a')
-        if link:
-            t = link.get_text(strip=True)
-            if 10 < len(t) < 200:
-                return t
-        for s in re.split(r'[.!?]\s+', text):
-            if 10 < len(s) < 200:
-                return s.strip()
-        return text[:100]
-
-    @staticmethod
-    def _extract_price_text(text: str) -> Optional[str]:
-        matches = re.findall(r'\$[\d,]+(?:\.\d{2})?', text)
-        if matches:
-            vals = []
-            for m in matches:
-                try:
-                    vals.append((float(m.replace('$','').replace(',','')), m))
-                except:
-                    pass
-            if vals:
-                return max(vals)[1]
-        return None
-
-    @staticmethod
-    def _extract_revenue(text: str) -> Optional[float]:
-        text_lower = text.lower()
-        for pattern in REVENUE_PATTERNS:
-            match = re.search(pattern, text_lower, re.I)
-            if match:
-                value = parse_money_value(match.group(1))
-                if value and value > 10000:
-                    return value
-        return None
-
-    @staticmethod
-    def _extract_cashflow(text: str) -> Optional[float]:
-        text_lower = text.lower()
-        for pattern in CASHFLOW_PATTERNS:
-            match = re.search(pattern, text_lower, re.I)
-            if match:
-                value = parse_money_value(match.group(1))
-                if value and value > 1000:
-                    return value
-        return None
-
-    @staticmethod
-    def _extract_location(text: str) -> Optional[str]:
-        m = re.search(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*([A-Z]{2})\b', text)
-        return f"{m.group(1)}, {m.group(2)}" if m else None
-
-    @staticmethod
-    def _extract_business_type(text: str) -> Optional[str]:
-        types = {
-            'restaurant': ['restaurant','cafe','diner','bistro'],
-            'bar': ['bar','tavern','pub','lounge'],
-            'retail': ['store','shop','boutique'],
-            'service': ['salon','spa','cleaning'],
-        }
-        t = text.lower()
-        for category, kws in types.items():
-            if any(kw in t for kw in kws):
-                return category
-        return None
-
 
 class SelfLearningScraper:
     """Production scraper with specialized franchise integration AND VERTICAL SUPPORT"""
@@ -498,13 +333,18 @@ class SelfLearningScraper:
         if not url or not key:
             raise ValueError("Set SUPABASE_URL and SUPABASE_KEY")
         self.supabase = create_client(url, key)
+        # scraper_logs rows are inserted in batches on a background thread
+        self.log_sink = shared_log_sink(self.supabase)
 
         self.pattern_db = PatternDatabase(self.supabase)
         self.failure_analyzer = FailureAnalyzer(self.supabase)
 
+        # ListingRecords (specialized brokers add ready-made dicts)
         self.all_listings = []
         self.seen_ids = set()
         self.scraper_run_id = None
+        # scraped_at for every listing of the run (reset by create_scraper_run)
+        self.run_at = datetime.now(timezone.utc).isoformat()
 
         self.stats = {
             'attempted': 0, 'success': 0, 'failed': 0, 'listings': 0,
@@ -514,7 +354,9 @@ class SelfLearningScraper:
             'specialized_brokers': 0, 'specialized_listings': 0,
             'regular_brokers': 0, 'regular_listings': 0,
             'failures_by_type': defaultdict(int),
-            'filtered_out': 0  # NEW: Track filtered listings
+            'filtered_out': 0,  # NEW: Track filtered listings
+            'new_listings': 0, 'updated_listings': 0, 'unchanged_listings': 0,
+            'save_errors': 0  # Rows dead-lettered by the batch writer
         }
 
         self.playwright = None
@@ -524,13 +366,14 @@ class SelfLearningScraper:
     def create_scraper_run(self, broker_source: str):
         """Create a scraper run record"""
         self.scraper_run_id = str(uuid.uuid4())
+        self.run_at = datetime.now(timezone.utc).isoformat()
         try:
             self.supabase.table('scraper_runs').insert({
                 'id': self.scraper_run_id,
                 'vertical_slug': self.vertical_slug,
                 'broker_source': broker_source,
                 'scraper_type': 'unified',
-                'started_at': datetime.now(timezone.utc).isoformat(),
+                'started_at': self.run_at,
                 'status': 'running',
                 'total_listings_found': 0,
                 'new_listings': 0,
@@ -551,87 +394,37 @@ class SelfLearningScraper:
                 'completed_at': datetime.now(timezone.utc).isoformat(),
                 'status': status,
                 'total_listings_found': self.stats['listings'],
-                'new_listings': self.stats['listings'],  # Simplified
-                'updated_listings': 0,
+                'new_listings': self.stats['new_listings'],
+                'updated_listings': self.stats['updated_listings'],
                 'failed_listings': self.stats['failed'],
                 'error_message': error_message
             }).eq('id', self.scraper_run_id).execute()
         except Exception as e:
             print(f"Warning: Could not update scraper run: {e}")
+        self.log_sink.flush()
 
     def log_scraper_event(self, level: str, message: str, context: Dict = None):
-        """Log scraper events"""
+        """Log scraper events (queued for the background scraper_logs writer; never blocks)"""
         if not self.scraper_run_id:
             return
+        self.log_sink.emit(self.scraper_run_id, level, message, context)
 
-        try:
-            self.supabase.table('scraper_logs').insert({
-                'id': str(uuid.uuid4()),
-                'scraper_run_id': self.scraper_run_id,
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'level': level,
-                'message': message,
-                'context': context or {}
-            }).execute()
-        except:
-            pass
+    @staticmethod
+    def search_text(listing: Dict) -> str:
+        """Text the vertical keywords are matched against"""
+        title = listing.get('title') or ''
+        description = listing.get('description') or listing.get('text') or listing.get('full_text') or ''
+        business_type = listing.get('business_type') or ''
+        return f"{title} {description} {business_type}"
 
     def matches_vertical(self, listing: Dict) -> bool:
         """Check if listing matches vertical keywords"""
-        # Get searchable text
-        title = (listing.get('title') or '').lower()
-        description = (listing.get('description') or listing.get('text') or listing.get('full_text') or '').lower()
-        business_type = (listing.get('business_type') or '').lower()
-        search_text = f"{title} {description} {business_type}"
-
-        # Check exclude keywords first
-        for keyword in self.vertical_config['exclude_keywords']:
-            if keyword.lower() in search_text:
-                return False
-
-        # Check include keywords
-        for keyword in self.vertical_config['include_keywords']:
-            if keyword.lower() in search_text:
-                return True
-
-        return False
-
-    def normalize_to_db_format(self, listing: Dict, broker_account: str) -> Dict:
-        """Convert scraped listing to database format"""
-        lid_source = listing.get('listing_url') or listing.get('url') or ''
-        listing_id = hashlib.md5(lid_source.encode()).hexdigest()
-
-        return {
-            'id': listing_id,
-            'vertical_slug': self.vertical_slug,
-            'title': listing.get('title'),
-            'location': listing.get('location'),
-            'city': listing.get('city'),
-            'state': listing.get('state'),
-            'asking_price': listing.get('price'),
-            'price_text': listing.get('price_text'),
-            'cash_flow': listing.get('cash_flow'),
-            'ebitda': None,
-            'annual_revenue': listing.get('revenue'),
-            'description': listing.get('text') or listing.get('description') or '',
-            'image_url': listing.get('image_url'),
-            'listing_url': listing.get('listing_url') or listing.get('url'),
-            'category_id': None,
-            'business_type': listing.get('business_type'),
-            'broker_account': broker_account,
-            'broker_source': 'Broker Network',
-            'broker_contact': None,
-            'broker_company': None,
-            'list_number': None,
-            'url_stub': None,
-            'region': None,
-            'status': 'pending',
-            'hot_property': False,
-            'recently_added': True,
-            'recently_updated': False,
-            'scraper_run_id': self.scraper_run_id,
-            'scraped_at': datetime.now(timezone.utc).isoformat()
-        }
+        return REGISTRY.matcher.matches(self.search_text(listing), self.vertical_slug)
+
+    def normalize_to_db_format(self, listing: Dict, broker_account: str) -> ListingRecord:
+        """Compact record for a scraped listing (serialized by save() via to_broker_row)"""
+        return ListingRecord.from_broker(listing, self.vertical_slug, broker_account,
+                                         self.scraper_run_id, self.run_at)
 
     def classify_business(self, text: str) -> bool:
         s = (text or "").lower()
@@ -823,7 +616,7 @@ class SelfLearningScraper:
                         self.stats['listings'] += len(matched)
                         for listing in matched:
                             normalized = self.normalize_to_db_format(listing, account)
-                            lid = normalized['id']
+                            lid = normalized.id
                             if lid not in self.seen_ids:
                                 self.seen_ids.add(lid)
                                 self.all_listings.append(normalized)
@@ -856,7 +649,7 @@ class SelfLearningScraper:
                     continue
 
                 normalized = self.normalize_to_db_format(listing, account)
-                lid = normalized['id']
+                lid = normalized.id
                 if lid in self.seen_ids:
                     continue
                 self.seen_ids.add(lid)
@@ -870,8 +663,7 @@ class SelfLearningScraper:
 
             if business_count > 0:
                 print(f"\n✓ SUCCESS: {business_count} {self.vertical_config['name']} business listings")
-                with_financials = sum(1 for l in self.all_listings[-business_count:]
-                                     if l.get('asking_price') or l.get('annual_revenue') or l.get('cash_flow'))
+                with_financials = sum(1 for l in self.all_listings[-business_count:] if l.has_financials())
                 print(f"  {with_financials}/{business_count} with financial data")
                 self.stats['success'] += 1
                 self.stats['listings'] += business_count
@@ -983,14 +775,39 @@ class SelfLearningScraper:
             print("\n⚠️  No listings")
             return
         print(f"\nSaving {len(self.all_listings)} listings to vertical '{self.vertical_slug}'...")
-        batch_size = 50
-        for i in range(0, len(self.all_listings), batch_size):
-            batch = self.all_listings[i:i+batch_size]
-            try:
-                self.supabase.table("listings").upsert(batch, on_conflict="id").execute()
-                print(f"  ✓ Batch {i//batch_size + 1}")
-            except Exception as e:
-                print(f"  ✗ Batch {i//batch_size + 1}: {e}")
+        warn = lambda level, message: print(f"  ⚠️  {message}")
+        loader = open_copy_loader(log=warn)  # LISTINGS_SINK=copy
+        detector = None if loader else ChangeDetector(self.supabase, log=warn)
+        stats_lock = threading.Lock()
+
+        def write(batch: List[Dict]):
+            if loader:
+                new, updated, unchanged = loader.load(batch)
+            else:
+                new_rows, updated_rows, unchanged = detector.split(batch)
+                upsert_changes(self.supabase, new_rows, updated_rows)
+                detector.commit(new_rows, updated_rows, unchanged)
+                new, updated = len(new_rows), len(updated_rows)
+            with stats_lock:
+                self.stats['new_listings'] += new
+                self.stats['updated_listings'] += updated
+                self.stats['unchanged_listings'] += unchanged
+            print(f"  ✓ {len(batch)} rows ({new} new, {updated} updated, {unchanged} unchanged)")
+
+        # Failing batches are bisected; rows that still fail go to the dead-letter file
+        log = lambda level, message: print(f"  {message}")
+        batch_size = COPY_BATCH_SIZE if loader else 50
+        with BatchWriter(write, concurrency=1 if loader else WRITE_CONCURRENCY, log=log) as writer:
+            for i in range(0, len(self.all_listings), batch_size):
+                writer.submit(to_rows(self.all_listings[i:i+batch_size], 'broker'))
+        self.stats['save_errors'] += writer.stats['rejected']
+        print(f"  Batch writer: {writer.summary()}")
+        if loader:
+            loader.close()
+            print(f"  COPY sink: {loader.summary()}")
+        else:
+            detector.save()
+            print(f"  Change detection: {detector.summary()}")
 
     def print_stats(self):
         kb = self.pattern_db.get_stats()
@@ -1008,6 +825,8 @@ class SelfLearningScraper:
         print(f"  With price:         {self.stats['with_price']} ({self.stats['with_price']/max(1,self.stats['listings'])*100:.1f}%)")
         print(f"  With revenue:       {self.stats['with_revenue']} ({self.stats['with_revenue']/max(1,self.stats['listings'])*100:.1f}%)")
         print(f"  With cash flow:     {self.stats['with_cashflow']} ({self.stats['with_cashflow']/max(1,self.stats['listings'])*100:.1f}%)")
+        print(f"  Written:            {self.stats['new_listings']} new, {self.stats['updated_listings']} updated "
+              f"({self.stats['unchanged_listings']} unchanged, {self.stats['save_errors']} rejected)")
         print(f"{'='*70}")
         print("LEARNING SYSTEM")
         print(f"{'='*70}")
@@ -1237,7 +1056,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Unified Production Scraper V2 - Multi-Tenant")
     parser.add_argument("--permissive", action="store_true", help="Include most items when repeating pattern detected")
     parser.add_argument("--category", type=str, help="Filter by category (e.g., 'franchise')")
-    parser.add_argument("--vertical", type=str, choices=['cleaning', 'landscape', 'hvac'], default='cleaning',
+    parser.add_argument("--vertical", type=str, choices=list(VERTICAL_CONFIGS), default='cleaning',
                        help="Vertical to scrape (default: cleaning)")
 
     group = parser.add_mutually_exclusive_group()
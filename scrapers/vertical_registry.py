@@ -0,0 +1,272 @@
+"""
+Vertical Registry
+The one place scrapers get vertical configs and the compiled keyword matcher from
+- Source: config/verticals/verticals.json, exported from
+  config/verticals/*.vertical.ts (npm run export-verticals), or the
+  vertical_configs table with VERTICAL_CONFIG_SOURCE=supabase
+- The KeywordMatcher is compiled once per config hash and shared by every
+  scraper in the process (compiling takes about a millisecond, so it is not
+  cached on disk - a pickle cache in a shared temp dir would let anyone who
+  can write there run code in the scrapers)
+- refresh() re-checks the source at most every VERTICAL_RELOAD_SECONDS and
+  swaps configs and matcher in place when the hash changes; long-running
+  processes call it between tasks
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from colorama import Fore, init
+from dotenv import load_dotenv
+
+from keyword_matcher import KeywordMatcher
+
+# Initialize
+init(autoreset=True)
+load_dotenv()
+
+DEFAULT_VERTICALS_FILE = os.getenv(
+    'VERTICALS_FILE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'verticals', 'verticals.json')
+)
+
+# 'file' (DEFAULT_VERTICALS_FILE) or 'supabase' (vertical_configs table)
+DEFAULT_SOURCE = os.getenv('VERTICAL_CONFIG_SOURCE', 'file')
+
+# Minimum seconds between source checks in refresh()
+RELOAD_SECONDS = float(os.getenv('VERTICAL_RELOAD_SECONDS', '30'))
+
+# Config keys the scrapers read
+CONFIG_FIELDS = ('name', 'domain', 'include_keywords', 'exclude_keywords', 'bizbuysell_categories')
+
+
+# ============================================================================
+# SOURCES
+# ============================================================================
+
+def normalize_config(slug: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    """One vertical in VERTICAL_CONFIGS shape (missing lists become [])"""
+    return {
+        'name': row.get('name') or slug,
+        'domain': row.get('domain'),
+        'include_keywords': list(row.get('include_keywords') or []),
+        'exclude_keywords': list(row.get('exclude_keywords') or []),
+        'bizbuysell_categories': list(row.get('bizbuysell_categories') or []),
+    }
+
+
+def load_file(path: str = DEFAULT_VERTICALS_FILE) -> Dict[str, Dict[str, Any]]:
+    """Verticals from an exported verticals.json, in registry order"""
+    with open(path, encoding='utf-8') as f:
+        body = json.load(f)
+    return {slug: normalize_config(slug, row) for slug, row in body['verticals'].items()}
+
+
+def load_table(supabase) -> Dict[str, Dict[str, Any]]:
+    """Active verticals from the vertical_configs table, ordered by slug"""
+    rows = supabase.table('vertical_configs').select('*').eq('active', True).order('slug').execute().data or []
+    return {row['slug']: normalize_config(row['slug'], row) for row in rows}
+
+
+def sync_table(supabase, configs: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Write configs to the vertical_configs table
+
+    Verticals in the table but not in configs are marked inactive.
+
+    Returns:
+        Number of verticals written
+    """
+    supabase.table('vertical_configs').upsert([
+        {
+            'slug': slug,
+            'name': config['name'],
+            'domain': config['domain'] or '',
+            'include_keywords': config['include_keywords'],
+            'exclude_keywords': config['exclude_keywords'],
+            'bizbuysell_categories': config['bizbuysell_categories'],
+            'active': True
+        }
+        for slug, config in configs.items()
+    ], on_conflict='slug').execute()
+
+    rows = supabase.table('vertical_configs').select('slug').execute().data or []
+    stale = [row['slug'] for row in rows if row['slug'] not in configs]
+    if stale:
+        supabase.table('vertical_configs').update({'active': False}).in_('slug', stale).execute()
+    return len(configs)
+
+
+def config_hash(configs: Dict[str, Dict[str, Any]]) -> str:
+    """Hash of everything a scraper reads from the configs (order included - it sets matcher bits)"""
+    canonical = [[slug, [config.get(field) for field in CONFIG_FIELDS]] for slug, config in configs.items()]
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+class VerticalRegistry:
+    """Vertical configs plus their compiled matcher, reloadable in place"""
+
+    def __init__(self, source: str = DEFAULT_SOURCE, path: str = DEFAULT_VERTICALS_FILE,
+                 supabase=None,
+                 reload_seconds: float = RELOAD_SECONDS, log: Callable[[str, str], None] = None):
+        """
+        Initialize registry and load the current configs
+
+        Args:
+            source: 'file' or 'supabase'
+            path: verticals.json for the file source
+            supabase: Client for the supabase source (default: from SUPABASE_URL / SUPABASE_KEY)
+            reload_seconds: Minimum seconds between source checks in refresh()
+            log: Optional log(level, message) callback
+        """
+        if source not in ('file', 'supabase'):
+            raise ValueError(f"Invalid vertical config source: {source}. Must be 'file' or 'supabase'")
+        self.source = source
+        self.path = path
+        self.supabase = supabase
+        self.reload_seconds = reload_seconds
+        self.log = log or (lambda level, message: None)
+        self.lock = threading.Lock()
+
+        # Live objects: reloads mutate configs in place and rebind matcher,
+        # so `from vertical_registry import VERTICAL_CONFIGS` stays current
+        self.configs: Dict[str, Dict[str, Any]] = {}
+        self.matcher: Optional[KeywordMatcher] = None
+        self.hash: Optional[str] = None
+        self.version = 0
+
+        self._file_stamp: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self.stats = {'loads': 0, 'reloads': 0, 'compiled': 0, 'compile_seconds': 0.0}
+        self.refresh(force=True)
+
+    @property
+    def slugs(self) -> List[str]:
+        return list(self.configs)
+
+    def names(self) -> Dict[str, str]:
+        return {slug: config['name'] for slug, config in self.configs.items()}
+
+    def _client(self):
+        if self.supabase is None:
+            from supabase import create_client
+
+            supabase_url = os.getenv("SUPABASE_URL")
+            supabase_key = os.getenv("SUPABASE_KEY")
+            if not supabase_url or not supabase_key:
+                raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
+            self.supabase = create_client(supabase_url, supabase_key)
+        return self.supabase
+
+    def _read_source(self, force: bool) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Configs from the source, or None if a file source is untouched since the last read"""
+        if self.source == 'supabase':
+            return load_table(self._client())
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if not force and stamp == self._file_stamp:
+            return None
+        configs = load_file(self.path)
+        self._file_stamp = stamp
+        return configs
+
+    def compile(self, configs: Dict[str, Dict[str, Any]]) -> KeywordMatcher:
+        """Matcher for configs (refresh() only calls this when the config hash changed)"""
+        started = time.perf_counter()
+        matcher = KeywordMatcher(configs)
+        self.stats['compiled'] += 1
+        self.stats['compile_seconds'] += time.perf_counter() - started
+        return matcher
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload configs if the source changed
+
+        Checks at most every reload_seconds unless force is set. A failed
+        reload keeps the current configs (the first load raises).
+
+        Returns:
+            True if configs or matcher changed
+        """
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.reload_seconds:
+                return False
+            self._checked_at = now
+
+            try:
+                configs = self._read_source(force)
+            except Exception as e:
+                if self.matcher is None:
+                    raise
+                self.log('warning', f"Vertical config reload failed, keeping version {self.version}: {e}")
+                return False
+            if configs is None:
+                return False
+            if not configs:
+                raise ValueError(f"No verticals found in {self.describe_source()}")
+
+            digest = config_hash(configs)
+            if digest == self.hash:
+                return False
+
+            matcher = self.compile(configs)
+            self.configs.clear()
+            self.configs.update(configs)
+            self.matcher = matcher
+            self.hash = digest
+            self.version += 1
+            self.stats['reloads' if self.version > 1 else 'loads'] += 1
+            if self.version > 1:
+                self.log('info', f"Reloaded vertical configs from {self.describe_source()} "
+                                 f"({', '.join(self.configs)}; {digest[:12]})")
+            return True
+
+    def describe_source(self) -> str:
+        return 'vertical_configs table' if self.source == 'supabase' else self.path
+
+
+def _print_log(level: str, message: str):
+    color = Fore.YELLOW if level in ('warning', 'error') else Fore.CYAN
+    print(f"{color}[{level.upper()}] {message}")
+
+
+# Shared by every scraper in the process
+REGISTRY = VerticalRegistry(log=_print_log)
+
+# Live view of REGISTRY.configs (updated in place on reload)
+VERTICAL_CONFIGS = REGISTRY.configs
+
+
+# ============================================================================
+# CLI INTERFACE
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or publish the vertical registry")
+    parser.add_argument(
+        '--sync-table',
+        action='store_true',
+        help=f'Write the verticals from {os.path.relpath(DEFAULT_VERTICALS_FILE)} to the vertical_configs table'
+    )
+
+    args = parser.parse_args()
+    if args.sync_table:
+        registry = REGISTRY if REGISTRY.source == 'file' else VerticalRegistry(source='file', log=_print_log)
+        count = sync_table(registry._client(), registry.configs)
+        print(f"{Fore.GREEN}✓ Wrote {count} verticals to vertical_configs")
+    else:
+        print(f"{Fore.CYAN}Source: {REGISTRY.describe_source()} ({REGISTRY.hash[:12]})")
+        for slug, config in REGISTRY.configs.items():
+            print(f"  {slug:<10} {config['name']:<22} {len(config['include_keywords'])} include, "
+                  f"{len(config['exclude_keywords'])} exclude, {len(config['bizbuysell_categories'])} categories")
+        print(f"{Fore.CYAN}Matcher: {len(REGISTRY.matcher)} keywords "
+              f"(compiled in {REGISTRY.stats['compile_seconds'] * 1000:.1f} ms)")
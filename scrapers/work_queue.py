@@ -0,0 +1,451 @@
+"""
+Work Queue
+Leased task queue for spreading scraper work over processes and hosts
+- SQLite backend (WAL): safe for any number of processes on one machine
+- QueueServer exposes it over HTTP so workers on other hosts can join; off
+  loopback it requires a shared token (SCRAPER_QUEUE_TOKEN)
+- Tasks are claimed with a lease, kept alive by heartbeats and handed to
+  another worker when a lease runs out (crashed or stalled worker)
+- Results are stored on the task and streamed back to the coordinator
+- Shutdown is per run: a coordinator stopping only tells its own workers
+  to exit, so runs sharing the queue file don't stop each other's workers
+"""
+
+import hmac
+import ipaddress
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib import error as urllib_error
+from urllib import request as urllib_request
+
+
+DEFAULT_QUEUE_PATH = os.getenv(
+    'SCRAPER_QUEUE_PATH',
+    os.path.join(tempfile.gettempdir(), 'scraper_queue.sqlite3')
+)
+
+# Seconds a claim stays valid without a heartbeat
+LEASE_SECONDS = int(os.getenv('SCRAPER_QUEUE_LEASE', '60'))
+
+# Claims per task before it is marked failed
+MAX_ATTEMPTS = int(os.getenv('SCRAPER_QUEUE_MAX_ATTEMPTS', '3'))
+
+# Shared secret for QueueServer (X-Queue-Token); required off loopback
+QUEUE_TOKEN = os.getenv('SCRAPER_QUEUE_TOKEN')
+
+# Methods workers may call through QueueServer
+REMOTE_METHODS = ('claim', 'heartbeat', 'complete', 'fail', 'counts', 'is_shutdown')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    job TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    finish_seq INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (status, lease_expires);
+CREATE INDEX IF NOT EXISTS tasks_job ON tasks (job, finish_seq);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+# ============================================================================
+# SQLITE BACKEND
+# ============================================================================
+
+class SqliteWorkQueue:
+    """Task queue in one SQLite file; every method is safe across threads and processes"""
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, max_attempts: int = MAX_ATTEMPTS):
+        """
+        Initialize queue
+
+        Args:
+            path: SQLite file (created if missing)
+            max_attempts: Claims per task before it is marked failed
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db().executescript(SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        """One connection per thread, autocommit; writes use BEGIN IMMEDIATE"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def _write(self, sql_statements):
+        """Run (sql, params) pairs in one write transaction; returns the last cursor"""
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = None
+            for sql, params in sql_statements:
+                cursor = db.execute(sql, params)
+            db.execute('COMMIT')
+            return cursor
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    # ------------------------------------------------------------------
+    # Coordinator side
+    # ------------------------------------------------------------------
+
+    def enqueue(self, job: str, kind: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        """Add one task per payload; returns the task ids"""
+        now = time.time()
+        ids = [uuid.uuid4().hex for _ in payloads]
+        self._write([
+            ('INSERT INTO tasks (id, job, kind, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+             (task_id, job, kind, json.dumps(payload), now, now))
+            for task_id, payload in zip(ids, payloads)
+        ])
+        return ids
+
+    def finished(self, job: str, after: int = 0) -> List[Dict[str, Any]]:
+        """Tasks of a job that finished (done or failed) after finish sequence `after`, oldest first"""
+        rows = self._db().execute(
+            'SELECT id, kind, payload, status, attempts, result, error, finish_seq FROM tasks '
+            'WHERE job = ? AND finish_seq > ? ORDER BY finish_seq', (job, after)
+        ).fetchall()
+        return [self._task(row) for row in rows]
+
+    def counts(self, job: Optional[str] = None) -> Dict[str, int]:
+        """Tasks per status (for one job or the whole queue)"""
+        self._expire_leases()
+        sql = 'SELECT status, COUNT(*) FROM tasks'
+        params: tuple = ()
+        if job:
+            sql += ' WHERE job = ?'
+            params = (job,)
+        rows = self._db().execute(sql + ' GROUP BY status', params).fetchall()
+        return {status: count for status, count in rows}
+
+    def outstanding(self, job: str) -> int:
+        counts = self.counts(job)
+        return counts.get('pending', 0) + counts.get('leased', 0)
+
+    def cancel(self, job: Optional[str] = None):
+        """
+        Drop unfinished tasks of a job (or of every job)
+
+        Workers still running one find out at their next heartbeat and
+        their result is dropped.
+        """
+        sql = "UPDATE tasks SET status = 'cancelled', updated_at = ? WHERE status IN ('pending', 'leased')"
+        params: tuple = (time.time(),)
+        if job:
+            sql += ' AND job = ?'
+            params += (job,)
+        self._write([(sql, params)])
+
+    def purge(self, job: str):
+        """Delete a job's tasks and results"""
+        self._write([('DELETE FROM tasks WHERE job = ?', (job,))])
+
+    def shutdown(self, run: str, value: bool = True):
+        """Tell a run's workers to exit after their current task (other runs' workers keep going)"""
+        self._write([('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                      (f'shutdown:{run}', '1' if value else '0'))])
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def is_shutdown(self, run: Optional[str] = None) -> bool:
+        """Whether run's coordinator has stopped (always False without a run)"""
+        if not run:
+            return False
+        row = self._db().execute('SELECT value FROM meta WHERE key = ?', (f'shutdown:{run}',)).fetchone()
+        return bool(row and row[0] == '1')
+
+    def claim(self, worker: str, lease_seconds: int = LEASE_SECONDS,
+              kinds: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Lease the oldest available task
+
+        Available means pending, or leased with the lease run out (its worker
+        died or stalled) - that is how failed leases get reassigned.
+
+        Returns:
+            Task dict (id, kind, payload, attempts) or None
+        """
+        now = time.time()
+        self._expire_leases(now)
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            sql = ("SELECT id FROM tasks WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))")
+            params: list = [now]
+            if kinds:
+                sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+                params.extend(kinds)
+            row = db.execute(sql + ' ORDER BY created_at LIMIT 1', params).fetchone()
+            if row is None:
+                db.execute('COMMIT')
+                return None
+            db.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker, now + lease_seconds, now, row['id'])
+            )
+            task = db.execute('SELECT id, kind, payload, status, attempts, result, error, finish_seq '
+                              'FROM tasks WHERE id = ?', (row['id'],)).fetchone()
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return self._task(task)
+
+    def heartbeat(self, task_id: str, worker: str, lease_seconds: int = LEASE_SECONDS) -> bool:
+        """Extend a lease; False means the task was reassigned and the result will be ignored"""
+        now = time.time()
+        cursor = self._write([(
+            "UPDATE tasks SET lease_expires = ?, updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (now + lease_seconds, now, task_id, worker)
+        )])
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: str, worker: str, result: Any = None) -> bool:
+        """Store a result; False if the lease was lost (another worker owns the task now)"""
+        return self._finish(task_id, worker, 'done', result=json.dumps(result))
+
+    def fail(self, task_id: str, worker: str, error: str) -> bool:
+        """Give a task back (or mark it failed after max_attempts)"""
+        now = time.time()
+        cursor = self._write([(
+            "UPDATE tasks SET status = 'pending', lease_owner = NULL, lease_expires = NULL, "
+            "error = ?, updated_at = ? WHERE id = ? AND lease_owner = ? AND status = 'leased' AND attempts < ?",
+            (error, now, task_id, worker, self.max_attempts)
+        )])
+        if cursor.rowcount == 1:
+            return True
+        return self._finish(task_id, worker, 'failed', error=error)
+
+    # ------------------------------------------------------------------
+
+    def _finish(self, task_id: str, worker: str, status: str, result: str = None, error: str = None) -> bool:
+        now = time.time()
+        cursor = self._write([(
+            "UPDATE tasks SET status = ?, result = ?, error = COALESCE(?, error), lease_expires = NULL, "
+            "finish_seq = (SELECT COALESCE(MAX(finish_seq), 0) + 1 FROM tasks), updated_at = ? "
+            "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+            (status, result, error, now, task_id, worker)
+        )])
+        return cursor.rowcount == 1
+
+    def _expire_leases(self, now: float = None):
+        """Mark tasks failed whose last allowed lease ran out"""
+        now = now or time.time()
+        self._write([(
+            "UPDATE tasks SET status = 'failed', error = COALESCE(error, 'lease expired'), lease_expires = NULL, "
+            "finish_seq = (SELECT COALESCE(MAX(finish_seq), 0) + 1 FROM tasks), updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, now, self.max_attempts)
+        )])
+
+    @staticmethod
+    def _task(row: sqlite3.Row) -> Dict[str, Any]:
+        task = dict(row)
+        task['payload'] = json.loads(task['payload'])
+        task['result'] = json.loads(task['result']) if task.get('result') else None
+        return task
+
+
+# ============================================================================
+# HTTP ACCESS FOR REMOTE WORKERS
+# ============================================================================
+
+def is_loopback_host(host: str) -> bool:
+    """Whether binding host only accepts connections from this machine"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # '' (all interfaces) or a hostname
+
+
+class QueueServer(ThreadingHTTPServer):
+    """Serves a SqliteWorkQueue's worker methods as POST /<method> with JSON kwargs"""
+
+    daemon_threads = True
+
+    def __init__(self, address, queue: SqliteWorkQueue, token: Optional[str] = QUEUE_TOKEN,
+                 run: Optional[str] = None):
+        """
+        Initialize server
+
+        Args:
+            address: (host, port) to bind
+            queue: Queue whose worker methods are served
+            token: Shared secret workers send as X-Queue-Token (required
+                   unless host is loopback)
+            run: Run id is_shutdown() answers for when a worker sends none
+        """
+        if not token and not is_loopback_host(address[0]):
+            raise ValueError(f"Queue server on {address[0] or 'all interfaces'} needs a token "
+                             f"(set SCRAPER_QUEUE_TOKEN on the coordinator and every worker)")
+        super().__init__(address, QueueRequestHandler)
+        self.queue = queue
+        self.token = token
+        self.run = run
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        if host in ('0.0.0.0', ''):
+            host = '127.0.0.1'
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'QueueServer':
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name='queue-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class QueueRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: QueueServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        if self.server.token and not hmac.compare_digest(self.headers.get('X-Queue-Token', '').encode(),
+                                                         self.server.token.encode()):
+            return self._send(403, {'error': 'forbidden'})
+
+        method = self.path.strip('/')
+        if method not in REMOTE_METHODS:
+            return self._send(404, {'error': f'unknown method {method}'})
+        try:
+            kwargs = json.loads(raw or b'{}')
+            if method == 'is_shutdown' and not kwargs.get('run'):
+                kwargs['run'] = self.server.run  # Workers started by hand don't know the run id
+            return self._send(200, {'value': getattr(self.server.queue, method)(**kwargs)})
+        except (TypeError, ValueError) as e:
+            return self._send(400, {'error': str(e)})
+        except sqlite3.Error as e:
+            return self._send(503, {'error': str(e)})
+
+    def _send(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class RemoteWorkQueue:
+    """Worker-side client for a QueueServer (same methods as SqliteWorkQueue's worker side)"""
+
+    def __init__(self, url: str, token: Optional[str] = QUEUE_TOKEN, timeout: float = 30.0):
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+
+    def _call(self, method: str, **kwargs) -> Any:
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['X-Queue-Token'] = self.token
+        req = urllib_request.Request(f"{self.url}/{method}", data=json.dumps(kwargs).encode('utf-8'),
+                                     headers=headers, method='POST')
+        try:
+            with urllib_request.urlopen(req, timeout=self.timeout) as response:
+                return json.loads(response.read())['value']
+        except urllib_error.HTTPError as e:
+            raise ConnectionError(f'queue {method} failed: HTTP {e.code} {e.read()[:200]!r}')
+
+    def claim(self, worker: str, lease_seconds: int = LEASE_SECONDS, kinds: Optional[List[str]] = None):
+        return self._call('claim', worker=worker, lease_seconds=lease_seconds, kinds=kinds)
+
+    def heartbeat(self, task_id: str, worker: str, lease_seconds: int = LEASE_SECONDS) -> bool:
+        return self._call('heartbeat', task_id=task_id, worker=worker, lease_seconds=lease_seconds)
+
+    def complete(self, task_id: str, worker: str, result: Any = None) -> bool:
+        return self._call('complete', task_id=task_id, worker=worker, result=result)
+
+    def fail(self, task_id: str, worker: str, error: str) -> bool:
+        return self._call('fail', task_id=task_id, worker=worker, error=error)
+
+    def counts(self, job: Optional[str] = None) -> Dict[str, int]:
+        return self._call('counts', job=job)
+
+    def is_shutdown(self, run: Optional[str] = None) -> bool:
+        return self._call('is_shutdown', run=run)
+
+
+def open_queue(spec: str = DEFAULT_QUEUE_PATH):
+    """http(s)://host:port -> RemoteWorkQueue; anything else is a SQLite path"""
+    if spec.startswith(('http://', 'https://')):
+        return RemoteWorkQueue(spec)
+    return SqliteWorkQueue(spec)
+
+
+# ============================================================================
+# HEARTBEAT
+# ============================================================================
+
+class Heartbeat:
+    """Keeps a task's lease alive from a background thread while the worker runs it"""
+
+    def __init__(self, queue, task_id: str, worker: str, lease_seconds: int = LEASE_SECONDS):
+        self.queue = queue
+        self.task_id = task_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name='queue-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+    def _beat(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(self.task_id, self.worker, self.lease_seconds):
+                    self.lost = True
+                    return
+            except (OSError, ConnectionError):
+                continue  # Transient; the lease still has two beats of slack
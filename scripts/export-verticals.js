@@ -0,0 +1,42 @@
+// scripts/export-verticals.js
+// Exports the scraper-facing part of config/verticals/*.vertical.ts to
+// config/verticals/verticals.json, which scrapers/vertical_registry.py loads.
+// Run after changing a vertical: npm run export-verticals
+const fs = require('fs');
+const path = require('path');
+const ts = require('typescript');
+
+const OUTPUT = path.join(__dirname, '..', 'config', 'verticals', 'verticals.json');
+
+// Load the .ts configs directly by transpiling them on require
+require.extensions['.ts'] = (module, filename) => {
+  const { outputText } = ts.transpileModule(fs.readFileSync(filename, 'utf8'), {
+    compilerOptions: { module: ts.ModuleKind.CommonJS, target: ts.ScriptTarget.ES2019 },
+    fileName: filename,
+  });
+  module._compile(outputText, filename);
+};
+
+const { verticalRegistry } = require('../config/verticals/registry.ts');
+
+const exportVerticals = () => {
+  const verticals = {};
+  for (const [slug, config] of Object.entries(verticalRegistry.verticals)) {
+    if (!config.scraper) {
+      throw new Error(`Vertical "${slug}" has no scraper config`);
+    }
+    verticals[slug] = {
+      name: config.info.name,
+      domain: config.info.domain,
+      include_keywords: config.scraper.includeKeywords,
+      exclude_keywords: config.scraper.excludeKeywords,
+      bizbuysell_categories: config.scraper.bizbuysellCategories || [],
+    };
+  }
+
+  const body = { source: 'config/verticals/registry.ts', verticals };
+  fs.writeFileSync(OUTPUT, JSON.stringify(body, null, 2) + '\n');
+  console.log(`✅ Exported ${Object.keys(verticals).length} verticals to ${path.relative(process.cwd(), OUTPUT)}`);
+};
+
+exportVerticals();